@@ -175,7 +175,7 @@ class ReservationAdmin(admin.ModelAdmin):
 # SALES MANAGEMENT
 # -----------------------
 
-from .models import CustomerCredit, Return
+from .models import CreditEntry, StockMovement, Return, DailySalesRollup, StoreCustomer
 
 @admin.register(Sale)
 class SaleAdmin(admin.ModelAdmin):
@@ -197,20 +197,67 @@ class SaleAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at",)
 
 
-@admin.register(CustomerCredit)
-class CustomerCreditAdmin(admin.ModelAdmin):
-    list_display = ("id", "store", "customer_name", "customer_phone", "amount", "created_at")
-    list_filter = ("store",)
-    search_fields = ("customer_name", "customer_phone")
+@admin.register(CreditEntry)
+class CreditEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "store", "phone", "customer_name", "kind", "amount", "created_at")
+    list_filter = ("store", "kind")
+    search_fields = ("phone", "customer_name", "sale__invoice_no")
+    ordering = ("-created_at",)
+    raw_id_fields = ("sale",)
+
+    # Append-only, and written together with the balance: corrections go
+    # through the adjust-credit endpoint
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ("id", "store", "product", "size_label", "delta", "reason", "reference", "created_at")
+    list_filter = ("store", "reason")
+    search_fields = ("product__name", "reference")
     ordering = ("-created_at",)
+    raw_id_fields = ("product", "size")
+
+    # Written only by core.services.inventory_service together with the stock change
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Return)
 class ReturnAdmin(admin.ModelAdmin):
-    list_display = ("id", "store", "invoice_no", "processed_by", "created_at")
+    list_display = ("id", "store", "invoice_no", "quantity", "amount", "processed_by", "created_at")
     list_filter = ("store", "created_at")
     search_fields = ("invoice_no", "store__store_name", "processed_by__username")
     readonly_fields = ("created_at",)
+    raw_id_fields = ("sale", "sale_line")
+
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ("store", "date", "pos_orders", "pos_revenue", "reservation_orders", "reservation_revenue")
+    list_filter = ("store",)
+    ordering = ("-date",)
+
+
+@admin.register(StoreCustomer)
+class StoreCustomerAdmin(admin.ModelAdmin):
+    list_display = ("store", "phone", "name", "total_orders", "total_spent", "outstanding_credit", "last_purchase")
+    list_filter = ("store",)
+    search_fields = ("phone", "name")
+    ordering = ("-last_purchase",)
 
 
 # -----------------------
@@ -0,0 +1,99 @@
+# core/idempotency.py
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from core.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+
+
+def _request_hash(request):
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    raw = json.dumps(
+        {"method": request.method, "path": request.path, "data": data},
+        sort_keys=True,
+        cls=DjangoJSONEncoder,
+        default=str,
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _ttl():
+    return timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def _replay(record, request_hash):
+    if record.request_hash != request_hash:
+        return Response({"detail": f"{HEADER} was already used for a different request."}, status=422)
+    if record.status_code is None:
+        return Response({"detail": f"A request with this {HEADER} is still in progress."}, status=409)
+    return Response(record.response_body, status=record.status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def _should_store(response):
+    # Only completed requests are pinned; a rejected one (stock, validation,
+    # server error) can be retried with the same key once the cause is fixed
+    return 200 <= response.status_code < 300 and hasattr(response, "data")
+
+
+def idempotent(view):
+    """
+    Honor an Idempotency-Key header on a POST view (function or viewset
+    method). The first response is stored against (user, key); retries with
+    the same body get it back from one indexed lookup without running the
+    view again. Put it inside the view's transaction.atomic so the stored
+    response commits or rolls back together with the view's writes.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        request = args[0] if hasattr(args[0], "META") else args[1]
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return Response({"detail": f"{HEADER} must be at most 255 characters."}, status=400)
+
+        request_hash = _request_hash(request)
+        record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+        if record and record.created_at < timezone.now() - _ttl():
+            record.delete()
+            record = None
+        if record:
+            return _replay(record, request_hash)
+
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(user=request.user, key=key, request_hash=request_hash)
+        except IntegrityError:
+            return Response({"detail": f"A request with this {HEADER} is still in progress."}, status=409)
+
+        response = view(*args, **kwargs)
+
+        if transaction.get_connection().in_atomic_block and transaction.get_rollback():
+            # The view rolled its transaction back; the claim goes with it
+            return response
+        if _should_store(response):
+            record.status_code = response.status_code
+            record.response_body = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+            record.save(update_fields=["status_code", "response_body"])
+        else:
+            record.delete()
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys():
+    """Delete stored responses older than IDEMPOTENCY_KEY_TTL. Returns rows deleted."""
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - _ttl()).delete()
+    return deleted
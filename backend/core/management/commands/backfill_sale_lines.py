@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.services.sale_line_service import backfill_sale_lines
+
+
+class Command(BaseCommand):
+    help = "Create SaleLine rows from Sale.products JSON for sales that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--store",
+            type=int,
+            action="append",
+            dest="stores",
+            help="Only backfill this store id (can be repeated).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = backfill_sale_lines(batch_size=options["batch_size"], store_ids=options["stores"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} sale lines."))
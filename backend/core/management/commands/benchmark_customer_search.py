@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Store, StoreCustomer
+from core.services.customer_service import search_customers
+
+FIRST_NAMES = ("Anu", "Arjun", "Deepa", "Fathima", "Gokul", "Lakshmi", "Manu", "Nikhil", "Ravi", "Sneha")
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway store with N customers and time the typeahead lookup "
+        "(search_customers) as a phone / name is typed. Everything runs inside "
+        "a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=100_000)
+        parser.add_argument("--lookups", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        try:
+            with transaction.atomic():
+                store, phones = self._seed(options["customers"])
+                self.stdout.write(f"{'customers':>9}  {'typed':<14} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+                for label, queries in self._scenarios(phones, options["lookups"]):
+                    timings = []
+                    for query in queries:
+                        started = time.perf_counter()
+                        search_customers(store, query)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    timings.sort()
+                    self.stdout.write(
+                        f"{options['customers']:>9}  {label:<14} {statistics.median(timings):>8.2f} "
+                        f"{timings[int(len(timings) * 0.95) - 1]:>8.2f} {timings[-1]:>8.2f}"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, count):
+        User = get_user_model()
+        owner = User.objects.create_user(username="bench-owner", password=None, phone="0000000000", is_store=True)
+        store = Store.objects.create(owner=owner, store_name="Bench", place="-", phone="0", category="clothing")
+
+        phones = random.sample(range(6_000_000_000, 10_000_000_000), count)
+        StoreCustomer.objects.bulk_create(
+            [
+                StoreCustomer(
+                    store=store,
+                    phone=str(phone),
+                    name=f"{random.choice(FIRST_NAMES)} {i}",
+                    total_spent=Decimal(random.randint(100, 50_000)),
+                )
+                for i, phone in enumerate(phones)
+            ],
+            batch_size=5000,
+        )
+        return store, [str(p) for p in phones]
+
+    def _scenarios(self, phones, lookups):
+        picks = random.sample(phones, min(lookups, len(phones)))
+        for length in (3, 5, 7, 10):
+            yield f"phone {length} digits", [p[:length] for p in picks]
+        yield "phone +91 full", [f"+91 {p[:5]} {p[5:]}" for p in picks]
+        yield "name prefix", [random.choice(FIRST_NAMES)[:3] for _ in picks]
+        yield "no match", ["5" + p[:6] for p in picks]
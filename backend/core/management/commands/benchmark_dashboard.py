@@ -0,0 +1,155 @@
+import random
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.utils import timezone
+
+from core.models import Product, ProductSize, Reservation, Sale, SaleLine, Store
+from core.services.analytics_service import (
+    compute_kpis,
+    customer_summaries,
+    filtered_querysets,
+    reservation_rows,
+    top_products,
+)
+
+SCENARIOS = {
+    "customer prefix": {"customer": "98"},
+    "product substring": {"product": "shirt"},
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway store with N synthetic sales and time the live (non-rollup) "
+        "dashboard path: latency, peak Python memory and query count per section. "
+        "Everything runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        self.stdout.write(f"{'sales':>9}  {'scenario':<20} {'section':<10} {'ms':>9} {'peak KiB':>10} {'queries':>8}")
+
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    store = self._seed(size, options["batch_size"])
+                    for scenario, filters in SCENARIOS.items():
+                        for section, ms, peak, queries in self._measure(store, filters):
+                            self.stdout.write(
+                                f"{size:>9}  {scenario:<20} {section:<10} {ms:>9.1f} {peak / 1024:>10.0f} {queries:>8}"
+                            )
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    # -------------------------------
+    # SYNTHETIC DATA
+    # -------------------------------
+    def _seed(self, size, batch_size):
+        User = get_user_model()
+        owner = User.objects.create_user(username="bench-owner", password=None, phone="0000000000", is_store=True)
+        store = Store.objects.create(owner=owner, store_name="Bench", place="-", phone="0", category="clothing")
+
+        products = []
+        for i in range(50):
+            product = Product.objects.create(store=store, name=f"{random.choice(['Shirt', 'Kurta', 'Jeans'])} {i}")
+            sizes = ProductSize.objects.bulk_create([
+                ProductSize(
+                    product=product, store=store, size_label=label,
+                    price=Decimal(random.randint(200, 2000)), quantity=1000,
+                )
+                for label in ("S", "M", "L")
+            ])
+            products.append((product, sizes))
+
+        customers = User.objects.bulk_create([
+            User(username=f"bench-cust-{i}", phone=f"9{i:09d}") for i in range(200)
+        ])
+
+        created = 0
+        while created < size:
+            n = min(batch_size, size - created)
+            carts = []
+            for _ in range(n):
+                items = []
+                for product, sizes in random.sample(products, random.randint(1, 3)):
+                    size_obj = random.choice(sizes)
+                    items.append((product, size_obj, random.randint(1, 3)))
+                carts.append(items)
+
+            sales = Sale.objects.bulk_create([
+                Sale(
+                    store=store,
+                    products=[
+                        {"product_id": p.id, "product": p.name, "size": s.size_label, "price": str(s.price), "quantity": q}
+                        for p, s, q in items
+                    ],
+                    total_amount=sum(s.price * q for _, s, q in items),
+                    customer_name=f"Customer {random.randint(0, 4999)}",
+                    customer_phone=f"{random.choice(['98', '97', '81'])}{random.randint(0, 99_999_999):08d}",
+                )
+                for items in carts
+            ])
+            SaleLine.objects.bulk_create([
+                SaleLine(
+                    sale=sale, store=store, product=p, size=s, product_name=p.name, size_label=s.size_label,
+                    unit_price=s.price, quantity=q, line_total=s.price * q,
+                )
+                for sale, items in zip(sales, carts)
+                for p, s, q in items
+            ])
+
+            product, sizes = random.choice(products)
+            Reservation.objects.bulk_create([
+                Reservation(
+                    customer=random.choice(customers), product=product, size=random.choice(sizes), store=store,
+                    advance_amount=Decimal("100.00"), unique_code=f"B{created + i}",
+                    reserved_until=timezone.now() + timedelta(days=1),
+                )
+                for i in range(max(1, n // 10))
+            ])
+            created += n
+
+        return store
+
+    # -------------------------------
+    # MEASUREMENT
+    # -------------------------------
+    def _measure(self, store, filters):
+        sales_qs, reservations_qs = filtered_querysets(store, filters)
+        sections = {
+            "kpis": lambda: compute_kpis(store, filters, sales_qs, reservations_qs),
+            "top": lambda: top_products(sales_qs, reservations_qs),
+            "customers": lambda: customer_summaries(store, sales_qs, reservations_qs, limit=50),
+            "res rows": lambda: reservation_rows(reservations_qs),
+        }
+
+        force_debug = connection.force_debug_cursor
+        connection.force_debug_cursor = True
+        try:
+            for section, run in sections.items():
+                reset_queries()
+                tracemalloc.start()
+                started = time.perf_counter()
+                run()
+                elapsed = (time.perf_counter() - started) * 1000
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                yield section, elapsed, peak, len(connection.queries)
+        finally:
+            connection.force_debug_cursor = force_debug
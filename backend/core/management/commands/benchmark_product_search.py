@@ -0,0 +1,109 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Product, Store, StoreCategory
+from core.services.search_service import rebuild_search_index, search_product_ids
+
+COLOURS = ("red", "blue", "black", "white", "green", "maroon", "olive", "navy", "beige", "mustard")
+ITEMS = ("shirt", "kurta", "saree", "jeans", "lehenga", "churidar", "jacket", "frock", "dhoti", "blazer")
+FABRICS = ("cotton", "linen", "silk", "denim", "rayon", "khadi", "chiffon", "georgette")
+CATEGORIES = ("Men", "Women", "Kids", "Ethnic", "Party wear", "Daily wear")
+STORE_WORDS = ("Threads", "Fashions", "Boutique", "Silks", "Collections", "Trends", "Textiles", "Emporium")
+TOWNS = ("Kochi", "Thrissur", "Kozhikode", "Kannur", "Kollam", "Palakkad", "Kottayam", "Malappuram")
+DESCRIPTIONS = ("Comfortable", "Elegant", "Festive", "Everyday", "Premium", "Breathable", "Handwoven", "Classic")
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed N products over a set of throwaway stores, build the search "
+        "index and time search_product_ids for typical queries. Everything "
+        "runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=500_000)
+        parser.add_argument("--stores", type=int, default=200)
+        parser.add_argument("--lookups", type=int, default=100)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                self._seed(options["products"], options["stores"])
+                indexed = rebuild_search_index()
+                self.stdout.write(f"seeded and indexed {indexed} products in {time.perf_counter() - started:.1f}s")
+
+                self.stdout.write(f"{'products':>9}  {'query':<22} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+                for label, queries, offset in self._scenarios(options["lookups"]):
+                    timings = []
+                    for query in queries:
+                        started = time.perf_counter()
+                        search_product_ids(query, limit=21, offset=offset)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    timings.sort()
+                    self.stdout.write(
+                        f"{options['products']:>9}  {label:<22} {statistics.median(timings):>8.2f} "
+                        f"{timings[int(len(timings) * 0.95) - 1]:>8.2f} {timings[-1]:>8.2f}"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, count, store_count):
+        User = get_user_model()
+        stores = []
+        for i in range(store_count):
+            owner = User.objects.create_user(
+                username=f"bench-search-{i}", password=None, phone=f"00000{i:05d}", is_store=True
+            )
+            store = Store.objects.create(
+                owner=owner, store_name=f"{random.choice(TOWNS)} {random.choice(STORE_WORDS)} {i}",
+                place="-", phone="0", category="clothing",
+            )
+            categories = StoreCategory.objects.bulk_create(
+                [StoreCategory(store=store, name=name) for name in CATEGORIES]
+            )
+            stores.append((store, categories))
+
+        batch = []
+        for i in range(count):
+            store, categories = random.choice(stores)
+            colour, item, fabric = random.choice(COLOURS), random.choice(ITEMS), random.choice(FABRICS)
+            batch.append(Product(
+                store=store,
+                store_category=random.choice(categories),
+                name=f"{colour.title()} {fabric} {item} {i}",
+                keywords=f"{item},{fabric},{colour}",
+                description=f"{random.choice(DESCRIPTIONS)} {fabric} {item} in {colour}, style {i % 997}.",
+            ))
+            if len(batch) >= 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+
+    def _scenarios(self, lookups):
+        picks = range(lookups)
+        yield "one word", [random.choice(ITEMS) for _ in picks], 0
+        yield "two words", [f"{random.choice(COLOURS)} {random.choice(ITEMS)}" for _ in picks], 0
+        yield "three words", [
+            f"{random.choice(COLOURS)} {random.choice(FABRICS)} {random.choice(ITEMS)}" for _ in picks
+        ], 0
+        yield "typing (2-5 chars)", [random.choice(ITEMS)[:random.randint(2, 5)] for _ in picks], 0
+        yield "typing 2nd word", [
+            f"{random.choice(COLOURS)} {random.choice(ITEMS)[:random.randint(2, 5)]}" for _ in picks
+        ], 0
+        yield "description word", [random.choice(DESCRIPTIONS) for _ in picks], 0
+        yield "store name", [f"{random.choice(TOWNS)} {random.choice(STORE_WORDS)}" for _ in picks], 0
+        yield "two words, page 5", [f"{random.choice(COLOURS)} {random.choice(ITEMS)}" for _ in picks], 80
+        yield "no match", [f"zz{random.randrange(1000)}" for _ in picks], 0
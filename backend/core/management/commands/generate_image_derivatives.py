@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.services.card_service import rebuild_cards
+from core.services.image_service import rebuild_derivatives
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP / JPEG derivatives for stored product, store and category images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--force", action="store_true", help="Rewrite derivatives that already exist.")
+
+    def handle(self, *args, **options):
+        count, original_bytes, webp_bytes = rebuild_derivatives(
+            force=options["force"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(f"{count} images, originals {original_bytes / 1024:.0f} KiB")
+        for width, size in webp_bytes.items():
+            share = size / original_bytes if original_bytes else 0
+            self.stdout.write(f"  {width}w webp: {size / 1024:.0f} KiB ({share:.1%} of originals)")
+
+        # Cards carry the main image's derivative URLs
+        rebuild_cards()
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {count} images."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.services.customer_service import normalize_stored_phones
+
+
+class Command(BaseCommand):
+    help = "Rewrite Sale / Reservation customer phones saved before normalization into canonical form."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--store",
+            type=int,
+            action="append",
+            dest="stores",
+            help="Only backfill this store id (can be repeated).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        sales, reservations = normalize_stored_phones(batch_size=options["batch_size"], store_ids=options["stores"])
+        self.stdout.write(self.style.SUCCESS(f"Normalized {sales} sale and {reservations} reservation phones."))
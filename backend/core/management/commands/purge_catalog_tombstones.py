@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.services.catalog_service import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete catalog tombstones older than CATALOG_TOMBSTONE_TTL."
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired catalog tombstones."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.services.facet_service import rebuild_availability
+
+
+class Command(BaseCommand):
+    help = "Rebuild the catalog facet / availability table from products and their sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = rebuild_availability(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed availability for {count} products."))
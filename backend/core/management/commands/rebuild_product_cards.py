@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.services.card_service import rebuild_cards
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product card read model used by product listings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = rebuild_cards(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} product cards."))
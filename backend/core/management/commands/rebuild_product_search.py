@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.services.search_service import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Recreate the product full-text search index from the product table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} products."))
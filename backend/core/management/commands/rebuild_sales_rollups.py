@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.services.rollup_service import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-store daily sales rollup table from sales, reservations and returns."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--store",
+            type=int,
+            action="append",
+            dest="stores",
+            help="Only rebuild this store id (can be repeated).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups(store_ids=options["stores"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily rollup rows."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.services.customer_service import rebuild_store_customers
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-store customer table from sales, reservations and credits."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--store",
+            type=int,
+            action="append",
+            dest="stores",
+            help="Only rebuild this store id (can be repeated).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = rebuild_store_customers(store_ids=options["stores"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} customer rows."))
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Product, Sale, Store
+
+
+class Command(BaseCommand):
+    help = (
+        "Run parallel checkouts against one throwaway store and verify every sale got a "
+        "distinct, gap-free invoice number. The store and its sales are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--sales", type=int, default=50, help="Sales per thread.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        owner = User.objects.create_user(username="stress-invoice-owner", password=None, phone="0000000001", is_store=True)
+        store = Store.objects.create(owner=owner, store_name="Stress", place="-", phone="0", category="clothing")
+        Product.objects.create(store=store, name="Stress item")
+
+        errors = []
+        start = threading.Barrier(options["threads"])
+
+        def checkout_loop():
+            try:
+                start.wait()
+                for _ in range(options["sales"]):
+                    with transaction.atomic():
+                        # A read before the insert, like create_sale's stock checks
+                        Product.objects.filter(store=store).exists()
+                        Sale.objects.create(store=store, products=[], total_amount=1)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        try:
+            threads = [threading.Thread(target=checkout_loop) for _ in range(options["threads"])]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+
+            numbers = list(Sale.objects.filter(store=store).values_list("invoice_no", flat=True))
+            seqs = sorted(int(n.split("-")[-1]) for n in numbers)
+        finally:
+            store.delete()
+            owner.delete()
+
+        expected = options["threads"] * options["sales"]
+        if errors:
+            raise CommandError(f"{len(errors)} checkout(s) failed, first: {errors[0]!r}")
+        if seqs != list(range(1, expected + 1)):
+            raise CommandError(f"Expected invoice numbers 1..{expected}, got {len(set(seqs))} distinct of {len(seqs)}.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{expected} parallel checkouts in {elapsed:.2f}s, invoice numbers 1..{expected} with no gaps or duplicates."
+        ))
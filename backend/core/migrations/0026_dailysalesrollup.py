@@ -0,0 +1,105 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:36
+
+import django.db.models.deletion
+from collections import defaultdict
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+from django.db import migrations, models
+from django.utils import timezone
+
+# Every existing store gets this zone from 0028_store_time_zone
+STORE_TIME_ZONE = ZoneInfo("Asia/Kolkata")
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _units(products):
+    return sum(_int(item.get("quantity")) for item in products or [] if isinstance(item, dict))
+
+
+def fill_rollups(apps, schema_editor):
+    """
+    Roll up the existing sales, reservations and returns so the dashboard
+    keeps its history (rollup_service.rebuild_rollups, as of this schema).
+    """
+    Sale = apps.get_model("core", "Sale")
+    Reservation = apps.get_model("core", "Reservation")
+    Return = apps.get_model("core", "Return")
+    DailySalesRollup = apps.get_model("core", "DailySalesRollup")
+
+    rows = defaultdict(lambda: defaultdict(lambda: 0))
+
+    def row(store_id, created_at):
+        return rows[(store_id, timezone.localdate(created_at, STORE_TIME_ZONE))]
+
+    for sale in Sale.objects.order_by().iterator(chunk_size=2000):
+        r = row(sale.store_id, sale.created_at)
+        r["pos_revenue"] += sale.total_amount or 0
+        r["pos_orders"] += 1
+        r["units_sold"] += _units(sale.products)
+        r["discount"] += sale.discount or 0
+        if sale.is_credit:
+            r["credit_issued"] += sale.credit_amount or 0
+
+    for store_id, advance, status, created_at in Reservation.objects.order_by().values_list(
+        "product__store_id", "advance_amount", "status", "created_at"
+    ).iterator(chunk_size=2000):
+        r = row(store_id, created_at)
+        r["reservation_revenue"] += advance or 0
+        r["reservation_orders"] += 1
+        r["reservations_completed"] += status == "completed"
+
+    for ret in Return.objects.order_by().iterator(chunk_size=2000):
+        item = ret.sale_item if isinstance(ret.sale_item, dict) else {}
+        quantity = max(_int(item.get("quantity")), 0)
+        try:
+            unit_price = Decimal(str(item.get("unit_price") or item.get("price") or 0))
+        except ArithmeticError:
+            unit_price = Decimal("0.00")
+        r = row(ret.store_id, ret.created_at)
+        r["returns_amount"] += unit_price * quantity
+        r["units_returned"] += quantity
+
+    DailySalesRollup.objects.bulk_create(
+        [DailySalesRollup(store_id=store_id, date=day, **values) for (store_id, day), values in rows.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_reservation_customer_name_reservation_customer_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('pos_revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('pos_orders', models.PositiveIntegerField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('discount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('credit_issued', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('reservation_revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('reservation_orders', models.PositiveIntegerField(default=0)),
+                ('reservations_completed', models.PositiveIntegerField(default=0)),
+                ('returns_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('units_returned', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='core.store')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('store', 'date')},
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:37
+
+import django.db.models.deletion
+from decimal import Decimal, InvalidOperation
+from django.db import migrations, models
+
+
+def _int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value)) if value not in (None, "") else None
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _size_label(item):
+    return (
+        item.get("size_label")
+        or item.get("size")
+        or (item.get("sizes", [{}])[0].get("size_label") if item.get("sizes") else None)
+        or ""
+    )
+
+
+def fill_sale_lines(apps, schema_editor):
+    """
+    One SaleLine per item of every existing Sale.products list, resolved
+    like sale_line_service.build_sale_lines (product id, else the product
+    name within the store).
+    """
+    Sale = apps.get_model("core", "Sale")
+    SaleLine = apps.get_model("core", "SaleLine")
+    Product = apps.get_model("core", "Product")
+    ProductSize = apps.get_model("core", "ProductSize")
+
+    products_by_id = Product.objects.in_bulk()
+    products_by_name = {(p.store_id, p.name): p for p in products_by_id.values()}
+    sizes_by_key = {(s.product_id, s.size_label): s for s in ProductSize.objects.all()}
+
+    batch = []
+    for sale in Sale.objects.order_by("id").iterator(chunk_size=1000):
+        for item in sale.products or []:
+            if not isinstance(item, dict):
+                continue
+            product = products_by_id.get(_int(item.get("product_id") or item.get("id"), default=None))
+            if product is None and item.get("product"):
+                product = products_by_name.get((sale.store_id, item["product"]))
+
+            size_label = _size_label(item)
+            size = sizes_by_key.get((product.id, size_label)) if product else None
+            qty = max(_int(item.get("quantity", 0)), 0)
+            unit_price = _decimal(item.get("price") or item.get("unit_price"))
+            if unit_price is None:
+                unit_price = size.price if size else Decimal("0.00")
+
+            batch.append(SaleLine(
+                sale_id=sale.id,
+                store_id=sale.store_id,
+                product=product,
+                size=size,
+                product_name=(item.get("product") or (product.name if product else "Unknown Product"))[:150],
+                size_label=size_label[:20],
+                unit_price=unit_price,
+                quantity=qty,
+                line_total=unit_price * qty,
+            ))
+        if len(batch) >= 1000:
+            SaleLine.objects.bulk_create(batch)
+            batch = []
+    SaleLine.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_dailysalesrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(blank=True, max_length=150)),
+                ('size_label', models.CharField(blank=True, max_length=20)),
+                ('unit_price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('line_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sale_lines', to='core.product')),
+                ('sale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='core.sale')),
+                ('size', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sale_lines', to='core.productsize')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_lines', to='core.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store', 'product'], name='core_saleli_store_i_7e099e_idx'), models.Index(fields=['store', 'product_name'], name='core_saleli_store_i_4880fd_idx')],
+            },
+        ),
+        migrations.RunPython(fill_sale_lines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_saleline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='time_zone',
+            field=models.CharField(default='Asia/Kolkata', max_length=64),
+        ),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:47
+
+import django.db.models.deletion
+import django.utils.timezone
+import re
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def _normalize_phone(phone):
+    digits = re.sub(r"\D", "", str(phone or ""))
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits
+
+
+def _return_amount(item):
+    item = item if isinstance(item, dict) else {}
+    try:
+        return Decimal(str(item.get("unit_price") or item.get("price") or 0)) * max(int(item.get("quantity") or 0), 0)
+    except (ArithmeticError, TypeError, ValueError):
+        return Decimal("0.00")
+
+
+def fill_store_customers(apps, schema_editor):
+    """
+    One row per (store, phone) from the existing sales, reservations,
+    returns and CustomerCredit balances, computed like
+    customer_service.rebuild_store_customers.
+    """
+    Sale = apps.get_model("core", "Sale")
+    Reservation = apps.get_model("core", "Reservation")
+    Return = apps.get_model("core", "Return")
+    CustomerCredit = apps.get_model("core", "CustomerCredit")
+    StoreCustomer = apps.get_model("core", "StoreCustomer")
+
+    rows = defaultdict(lambda: {
+        "name": "",
+        "pos_orders": 0,
+        "reservations": 0,
+        "total_orders": 0,
+        "total_spent": Decimal("0.00"),
+        "outstanding_credit": Decimal("0.00"),
+        "last_purchase": None,
+    })
+
+    def add(store_id, phone, name, when, spent, pos=0, res=0):
+        phone = _normalize_phone(phone)
+        if not phone:
+            return
+        row = rows[(store_id, phone)]
+        row["pos_orders"] += pos
+        row["reservations"] += res
+        row["total_orders"] += pos + res
+        row["total_spent"] += Decimal(spent or 0)
+        if row["last_purchase"] is None or when >= row["last_purchase"]:
+            row["last_purchase"] = when
+            row["name"] = name or row["name"]
+
+    for store_id, phone, name, total, created_at in Sale.objects.order_by("created_at").values_list(
+        "store_id", "customer_phone", "customer_name", "total_amount", "created_at"
+    ).iterator(chunk_size=2000):
+        add(store_id, phone, name, created_at, total, pos=1)
+
+    for store_id, phone, user_phone, name, username, advance, created_at in Reservation.objects.order_by(
+        "created_at"
+    ).values_list(
+        "product__store_id", "customer_phone", "customer__phone",
+        "customer_name", "customer__username", "advance_amount", "created_at",
+    ).iterator(chunk_size=2000):
+        add(store_id, phone or user_phone, name or username, created_at, advance, res=1)
+
+    # Returns only name their invoice so far
+    phones_by_invoice = dict(
+        ((store_id, invoice_no), _normalize_phone(phone))
+        for store_id, invoice_no, phone in Sale.objects.filter(
+            invoice_no__in=Return.objects.exclude(invoice_no=None).values("invoice_no")
+        ).values_list("store_id", "invoice_no", "customer_phone")
+    )
+    for store_id, invoice_no, item in Return.objects.values_list("store_id", "invoice_no", "sale_item"):
+        key = (store_id, phones_by_invoice.get((store_id, invoice_no)))
+        if key in rows:
+            rows[key]["total_spent"] -= _return_amount(item)
+
+    for r in CustomerCredit.objects.values("store_id", "customer_phone").annotate(amount=Sum("amount")):
+        key = (r["store_id"], _normalize_phone(r["customer_phone"]))
+        if key[1] and (r["amount"] or key in rows):
+            rows[key]["outstanding_credit"] += r["amount"] or 0
+
+    StoreCustomer.objects.bulk_create(
+        [
+            StoreCustomer(store_id=store_id, phone=phone, **{**values, "last_purchase": values["last_purchase"] or timezone.now()})
+            for (store_id, phone), values in rows.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_store_time_zone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreCustomer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone', models.CharField(max_length=32)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('pos_orders', models.PositiveIntegerField(default=0)),
+                ('reservations', models.PositiveIntegerField(default=0)),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('outstanding_credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('last_purchase', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customers', to='core.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store', 'last_purchase'], name='core_storec_store_i_695d56_idx'), models.Index(fields=['store', 'total_spent'], name='core_storec_store_i_0601b0_idx'), models.Index(fields=['store', 'outstanding_credit'], name='core_storec_store_i_c63470_idx')],
+                'unique_together': {('store', 'phone')},
+            },
+        ),
+        migrations.RunPython(fill_store_customers, migrations.RunPython.noop),
+    ]
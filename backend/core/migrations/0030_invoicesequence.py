@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_storecustomer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='sale',
+            name='invoice_no',
+            field=models.CharField(blank=True, max_length=128, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='sale',
+            constraint=models.UniqueConstraint(fields=('store', 'invoice_no'), name='unique_invoice_per_store'),
+        ),
+        migrations.AddField(
+            model_name='invoicesequence',
+            name='store',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_sequences', to='core.store'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='invoicesequence',
+            unique_together={('store', 'date')},
+        ),
+    ]
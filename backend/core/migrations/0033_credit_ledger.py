@@ -0,0 +1,129 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+import re
+
+
+def _normalize_phone(phone):
+    digits = re.sub(r"\D", "", str(phone or ""))
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits
+
+
+def carry_over_credits(apps, schema_editor):
+    """
+    Open one issue entry per CustomerCredit row that still has an amount,
+    dated like the original credit so aging stays right. A credit without a
+    phone takes its invoice's phone; one with neither is kept under a blank
+    phone (no customer can settle it until it is adjusted onto one) and
+    listed in the migration output.
+    """
+    CustomerCredit = apps.get_model("core", "CustomerCredit")
+    CreditEntry = apps.get_model("core", "CreditEntry")
+
+    batch = []
+    unmatched = []
+    for credit in CustomerCredit.objects.filter(amount__gt=0).select_related("reference_sale").iterator(chunk_size=2000):
+        phone = _normalize_phone(credit.customer_phone)
+        if not phone and credit.reference_sale:
+            phone = _normalize_phone(credit.reference_sale.customer_phone)
+        note = "Carried over from CustomerCredit"
+        if not phone:
+            note += " (no phone)"
+            unmatched.append(credit)
+        batch.append(CreditEntry(
+            store_id=credit.store_id,
+            phone=phone,
+            customer_name=credit.customer_name or "",
+            kind="issue",
+            amount=credit.amount,
+            sale_id=credit.reference_sale_id,
+            note=note,
+            created_at=credit.created_at,
+        ))
+        if len(batch) >= 500:
+            CreditEntry.objects.bulk_create(batch)
+            batch = []
+    CreditEntry.objects.bulk_create(batch)
+
+    for credit in unmatched:
+        print(
+            f"\n  Credit #{credit.id} (store {credit.store_id}, {credit.customer_name or 'no name'}, "
+            f"₹{credit.amount}) has no phone; kept in the ledger under a blank phone.",
+            end="",
+        )
+
+
+def recompute_balances(apps, schema_editor):
+    """StoreCustomer.outstanding_credit = sum of the customer's ledger entries."""
+    CreditEntry = apps.get_model("core", "CreditEntry")
+    StoreCustomer = apps.get_model("core", "StoreCustomer")
+
+    balances = {
+        (store_id, phone): total
+        for store_id, phone, total in CreditEntry.objects.exclude(phone="")
+        .values("store_id", "phone").annotate(total=Sum("amount")).values_list("store_id", "phone", "total")
+    }
+    changed = []
+    for customer in StoreCustomer.objects.order_by("id").iterator(chunk_size=2000):
+        balance = balances.pop((customer.store_id, customer.phone), None) or Decimal("0.00")
+        if customer.outstanding_credit != balance:
+            customer.outstanding_credit = balance
+            changed.append(customer)
+    StoreCustomer.objects.bulk_update(changed, ["outstanding_credit"], batch_size=500)
+
+    # Credit holders who never bought anything
+    StoreCustomer.objects.bulk_create(
+        [
+            StoreCustomer(store_id=store_id, phone=phone, outstanding_credit=total)
+            for (store_id, phone), total in balances.items()
+            if total
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_sale_client_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone', models.CharField(max_length=32)),
+                ('customer_name', models.CharField(blank=True, max_length=255)),
+                ('kind', models.CharField(choices=[('issue', 'Issue'), ('settle', 'Settle'), ('adjust', 'Adjust')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('sale', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='credit_entries', to='core.sale')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credit_entries', to='core.store')),
+            ],
+        ),
+        migrations.RunPython(carry_over_credits, migrations.RunPython.noop),
+        migrations.RunPython(recompute_balances, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='CustomerCredit',
+        ),
+        migrations.AddIndex(
+            model_name='creditentry',
+            index=models.Index(fields=['store', 'phone', 'created_at'], name='core_credit_store_i_e17572_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditentry',
+            index=models.Index(fields=['store', 'kind', 'created_at'], name='core_credit_store_i_fa5168_idx'),
+        ),
+    ]
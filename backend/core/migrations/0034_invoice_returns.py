@@ -0,0 +1,91 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:13
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def link_existing_returns(apps, schema_editor):
+    """
+    Fill quantity / amount from the sale_item JSON and, where the invoice and
+    item can be found, link the sale line and count the return against it
+    (capped at what the line sold).
+    """
+    Return = apps.get_model("core", "Return")
+    Sale = apps.get_model("core", "Sale")
+    SaleLine = apps.get_model("core", "SaleLine")
+
+    for ret in Return.objects.order_by("id").iterator(chunk_size=500):
+        item = ret.sale_item if isinstance(ret.sale_item, dict) else {}
+        ret.quantity = max(_int(item.get("quantity")), 0)
+        try:
+            unit_price = Decimal(str(item.get("unit_price") or item.get("price") or 0))
+        except ArithmeticError:
+            unit_price = Decimal("0.00")
+        ret.amount = unit_price * ret.quantity
+
+        sale = Sale.objects.filter(store_id=ret.store_id, invoice_no=ret.invoice_no).first() if ret.invoice_no else None
+        if sale:
+            ret.sale_id = sale.id
+            line = SaleLine.objects.filter(
+                sale=sale,
+                product_id=_int(item.get("product_id") or item.get("id")) or None,
+                size_label=item.get("size_label") or item.get("size") or "",
+            ).first()
+            if line:
+                ret.sale_line_id = line.id
+                line.returned_quantity = min(line.quantity, line.returned_quantity + ret.quantity)
+                line.save(update_fields=["returned_quantity"])
+
+        ret.save(update_fields=["quantity", "amount", "sale", "sale_line"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_credit_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='return',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='return',
+            name='quantity',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='return',
+            name='sale',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='returns', to='core.sale'),
+        ),
+        migrations.AddField(
+            model_name='return',
+            name='sale_line',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='returns', to='core.saleline'),
+        ),
+        migrations.AddField(
+            model_name='saleline',
+            name='returned_quantity',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(link_existing_returns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='return',
+            index=models.Index(fields=['store', 'created_at'], name='core_return_store_i_bc9753_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='saleline',
+            constraint=models.CheckConstraint(condition=models.Q(('returned_quantity__lte', models.F('quantity'))), name='sale_line_returned_lte_sold'),
+        ),
+    ]
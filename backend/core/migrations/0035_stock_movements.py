@@ -0,0 +1,85 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_stock_ledger(apps, schema_editor):
+    """One "opening" movement per size with stock, so the ledger sums to today's quantities."""
+    ProductSize = apps.get_model("core", "ProductSize")
+    StockMovement = apps.get_model("core", "StockMovement")
+
+    batch = []
+    for size in ProductSize.objects.filter(quantity__gt=0).select_related("product").iterator(chunk_size=2000):
+        batch.append(StockMovement(
+            store_id=size.product.store_id,
+            product_id=size.product_id,
+            size_id=size.id,
+            size_label=size.size_label,
+            delta=size.quantity,
+            reason="opening",
+        ))
+        if len(batch) >= 500:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_invoice_returns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size_label', models.CharField(blank=True, max_length=20)),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(choices=[('opening', 'Opening balance'), ('initial', 'New size'), ('adjust', 'Manual adjustment'), ('removed', 'Size removed'), ('sale', 'POS sale'), ('reservation_sale', 'Reservation sale'), ('buy_now', 'Buy now order'), ('return', 'Return')], max_length=20)),
+                ('reference', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='productsize',
+            constraint=models.CheckConstraint(condition=models.Q(('quantity__gte', 0)), name='product_size_quantity_non_negative'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='core.product'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='size',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='core.productsize'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='store',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='core.store'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['store', 'created_at'], name='core_stockm_store_i_34a385_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['size', 'created_at'], name='core_stockm_size_id_145af0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', 'created_at'], name='core_stockm_product_ef6271_idx'),
+        ),
+        migrations.RunPython(open_stock_ledger, migrations.RunPython.noop),
+    ]
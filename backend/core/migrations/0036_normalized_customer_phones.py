@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:22
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_stock_movements'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['store', 'customer_phone'], name='core_sale_store_i_0e5ea7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storecustomer',
+            index=models.Index(models.F('store'), django.db.models.functions.text.Lower('name'), name='storecustomer_store_name_ci'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def _internal_barcode(size_id):
+    body = f"2{size_id:011d}"
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def fill_store_and_sku(apps, schema_editor):
+    """Copy each size's store from its product and give it an internal barcode."""
+    Product = apps.get_model("core", "Product")
+    ProductSize = apps.get_model("core", "ProductSize")
+
+    ProductSize.objects.update(
+        store_id=Subquery(Product.objects.filter(pk=OuterRef("product_id")).values("store_id")[:1])
+    )
+
+    batch = []
+    for size in ProductSize.objects.only("id").iterator(chunk_size=2000):
+        size.sku = _internal_barcode(size.id)
+        batch.append(size)
+        if len(batch) >= 500:
+            ProductSize.objects.bulk_update(batch, ["sku"])
+            batch = []
+    ProductSize.objects.bulk_update(batch, ["sku"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_catalog_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productsize',
+            name='sku',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='productsize',
+            name='store',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='product_sizes', to='core.store'),
+        ),
+        migrations.RunPython(fill_store_and_sku, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='productsize',
+            name='store',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='product_sizes', to='core.store'),
+        ),
+        migrations.AddConstraint(
+            model_name='productsize',
+            constraint=models.UniqueConstraint(condition=models.Q(('sku', ''), _negated=True), fields=('store', 'sku'), name='unique_sku_per_store'),
+        ),
+    ]
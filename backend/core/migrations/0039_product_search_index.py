@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:05
+
+from django.db import migrations
+
+# Side table for core.services.search_service; not a Django model, so it is
+# created per database vendor here and filled from the existing products.
+SOURCE = """
+    FROM core_product p
+    JOIN core_store st ON st.id = p.store_id
+    LEFT JOIN core_storecategory c ON c.id = p.store_category_id
+    LEFT JOIN core_storesubcategory sc ON sc.id = p.store_subcategory_id
+"""
+
+SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_product_search USING fts5("
+    "name, keywords, description, category, store_name, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')",
+    "INSERT INTO core_product_search (rowid, name, keywords, description, category, store_name) "
+    "SELECT p.id, p.name, REPLACE(COALESCE(p.keywords, ''), ',', ' '), COALESCE(p.description, ''), "
+    "TRIM(COALESCE(c.name, '') || ' ' || COALESCE(sc.name, '')), COALESCE(st.store_name, '')" + SOURCE,
+]
+
+POSTGRES = [
+    "CREATE TABLE IF NOT EXISTS core_product_search ("
+    "product_id bigint PRIMARY KEY REFERENCES core_product (id) ON DELETE CASCADE, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS core_product_search_document ON core_product_search USING gin (document)",
+    "INSERT INTO core_product_search (product_id, document) "
+    "SELECT p.id, "
+    "setweight(to_tsvector('simple', p.name), 'A') || "
+    "setweight(to_tsvector('simple', REPLACE(COALESCE(p.keywords, ''), ',', ' ')), 'B') || "
+    "setweight(to_tsvector('simple', COALESCE(p.description, '')), 'D') || "
+    "setweight(to_tsvector('simple', COALESCE(c.name, '') || ' ' || COALESCE(sc.name, '')), 'C') || "
+    "setweight(to_tsvector('simple', COALESCE(st.store_name, '')), 'C')" + SOURCE,
+]
+
+
+def create_search_index(apps, schema_editor):
+    statements = POSTGRES if schema_editor.connection.vendor == "postgresql" else SQLITE
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute("DROP TABLE IF EXISTS core_product_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_product_size_sku'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
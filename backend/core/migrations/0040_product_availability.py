@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# facet_service.PRICE_RANGES lower bounds at the time of this migration
+PRICE_BAND_FLOORS = (0, 500, 1000, 2000, 5000)
+
+
+def _price_band(price):
+    return sum(1 for floor in PRICE_BAND_FLOORS[1:] if price >= floor)
+
+
+def fill_availability(apps, schema_editor):
+    ProductSize = apps.get_model("core", "ProductSize")
+    ProductAvailability = apps.get_model("core", "ProductAvailability")
+
+    batch = []
+    for size in ProductSize.objects.select_related("product").iterator(chunk_size=2000):
+        batch.append(ProductAvailability(
+            size_id=size.id,
+            product_id=size.product_id,
+            store_id=size.product.store_id,
+            store_category_id=size.product.store_category_id,
+            store_subcategory_id=size.product.store_subcategory_id,
+            offer_category_id=size.product.offer_category_id,
+            size_label=size.size_label,
+            price=size.price,
+            price_band=_price_band(size.price),
+            in_stock=size.quantity > 0,
+        ))
+        if len(batch) >= 1000:
+            ProductAvailability.objects.bulk_create(batch)
+            batch = []
+    ProductAvailability.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0039_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAvailability',
+            fields=[
+                ('size', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='availability', serialize=False, to='core.productsize')),
+                ('size_label', models.CharField(max_length=20)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('price_band', models.PositiveSmallIntegerField(default=0)),
+                ('in_stock', models.BooleanField(default=False)),
+                ('offer_category', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.offercategory')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability', to='core.product')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.store')),
+                ('store_category', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.storecategory')),
+                ('store_subcategory', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.storesubcategory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store_category', 'product'], name='core_produc_store_c_cf17b5_idx'), models.Index(fields=['store_subcategory', 'product'], name='core_produc_store_s_c71d73_idx'), models.Index(fields=['offer_category', 'product'], name='core_produc_offer_c_f2bdbf_idx'), models.Index(fields=['in_stock', 'size_label', 'product'], name='core_produc_in_stoc_82cf4e_idx'), models.Index(fields=['price_band', 'product'], name='core_produc_price_b_91c062_idx'), models.Index(fields=['price'], name='core_produc_price_9028b0_idx')],
+            },
+        ),
+        migrations.RunPython(fill_availability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_cards(apps, schema_editor):
+    Product = apps.get_model("core", "Product")
+    ProductCard = apps.get_model("core", "ProductCard")
+
+    products = Product.objects.select_related(
+        "store", "store_category", "store_subcategory", "offer_category"
+    ).prefetch_related("sizes").order_by("id")
+
+    batch = []
+    for product in products.iterator(chunk_size=500):
+        sizes = sorted(product.sizes.all(), key=lambda size: size.id)
+        prices = [size.price for size in sizes]
+        batch.append(ProductCard(
+            product_id=product.id,
+            store_id=product.store_id,
+            name=product.name,
+            summary=(product.description or "")[:100],
+            store_name=product.store.store_name,
+            store_category=product.store_category.name if product.store_category else None,
+            store_subcategory=product.store_subcategory.name if product.store_subcategory else None,
+            offer_category=product.offer_category.title if product.offer_category else None,
+            main_image=product.main_image.url if product.main_image else "",
+            min_price=min(prices, default=None),
+            max_price=max(prices, default=None),
+            total_stock=sum(size.quantity for size in sizes),
+            sizes=[
+                {"id": size.id, "size_label": size.size_label, "price": str(size.price), "quantity": size.quantity}
+                for size in sizes
+            ],
+            sizes_in_stock=[size.size_label for size in sizes if size.quantity > 0],
+            created_at=product.created_at,
+        ))
+        if len(batch) >= 500:
+            ProductCard.objects.bulk_create(batch)
+            batch = []
+    ProductCard.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0040_product_availability'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCard',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='core.product')),
+                ('name', models.CharField(max_length=150)),
+                ('summary', models.CharField(blank=True, max_length=100)),
+                ('store_name', models.CharField(max_length=100)),
+                ('store_category', models.CharField(blank=True, max_length=100, null=True)),
+                ('store_subcategory', models.CharField(blank=True, max_length=100, null=True)),
+                ('offer_category', models.CharField(blank=True, max_length=150, null=True)),
+                ('main_image', models.CharField(blank=True, max_length=255)),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('total_stock', models.PositiveIntegerField(default=0)),
+                ('sizes', models.JSONField(default=list)),
+                ('sizes_in_stock', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('store', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store', 'product'], name='core_produc_store_i_af1851_idx')],
+            },
+        ),
+        migrations.RunPython(fill_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0041_product_cards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcard',
+            name='main_image_variants',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -1,10 +1,14 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from django.utils import timezone
 from datetime import date
+from zoneinfo import ZoneInfo
 import uuid
 
+from core.phones import normalize_phone
+
 # ===============================
 # ✅ CUSTOM USER MODEL
 # ===============================
@@ -61,10 +65,22 @@ class Store(models.Model):
         help_text="Short description or about section for the store",
     )
 
+    # Reporting timezone (dashboard days / hours are bucketed in this zone)
+    time_zone = models.CharField(max_length=64, default="Asia/Kolkata")
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.store_name
+
+    @property
+    def tzinfo(self):
+        try:
+            return ZoneInfo(self.time_zone or settings.STORE_TIME_ZONE)
+        except (KeyError, ValueError):
+            return ZoneInfo(settings.STORE_TIME_ZONE)
+
+
 class StoreCategory(models.Model):
     store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name="categories")
     name = models.CharField(max_length=100)
@@ -158,6 +174,13 @@ class Product(models.Model):
     )
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Catalog delta sync (core.services.catalog_service)
+            models.Index(fields=["store", "updated_at"]),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.store.store_name})"
@@ -180,16 +203,194 @@ class ProductImage(models.Model):
         return f"Image of {self.product.name}"
 
 
+def internal_barcode(size_id):
+    """EAN-13 in the in-store range (leading 2) for sizes saved without a SKU."""
+    body = f"2{size_id:011d}"
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
 class ProductSize(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="sizes")
+    # Copy of product.store_id, so SKUs can be unique per store
+    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="product_sizes", editable=False)
     size_label = models.CharField(max_length=20)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.PositiveIntegerField(default=0)
+    sku = models.CharField(max_length=64, blank=True, default="")
+    # Queryset .update() skips auto_now; stock writers set it explicitly
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def save(self, *args, **kwargs):
+        if not self.store_id:
+            self.store_id = self.product.store_id
+        self.sku = (self.sku or "").strip()
+        super().save(*args, **kwargs)
+        if not self.sku:
+            self.sku = internal_barcode(self.pk)
+            ProductSize.objects.filter(pk=self.pk).update(sku=self.sku)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(quantity__gte=0), name="product_size_quantity_non_negative"),
+            # Also the index for POS barcode scans
+            models.UniqueConstraint(
+                fields=["store", "sku"],
+                condition=~models.Q(sku=""),
+                name="unique_sku_per_store",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.size_label}"
 
 
+class CatalogTombstone(models.Model):
+    """
+    A deleted Product / ProductSize id, kept so POS terminals syncing the
+    catalog by delta learn about deletions. Purged after
+    CATALOG_TOMBSTONE_TTL; clients older than that get a full snapshot.
+    """
+    KIND_CHOICES = (
+        ("product", "Product"),
+        ("size", "Product size"),
+    )
+
+    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="catalog_tombstones")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["store", "deleted_at"]),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.kind} #{self.object_id} @ {self.store_id}"
+
+
+class ProductAvailability(models.Model):
+    """
+    One row per ProductSize with its product's category / subcategory /
+    offer copied in, so catalog facets are filtered and counted on a single
+    narrow indexed table. Kept in step by core.services.facet_service;
+    rows go away with their size or product.
+    """
+    size = models.OneToOneField(ProductSize, on_delete=models.CASCADE, primary_key=True, related_name="availability")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="availability")
+    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="+")
+    # Facet columns are indexed together with product, so counting distinct
+    # products per value reads only the index
+    store_category = models.ForeignKey(
+        StoreCategory, on_delete=models.SET_NULL, null=True, related_name="+", db_index=False
+    )
+    store_subcategory = models.ForeignKey(
+        StoreSubCategory, on_delete=models.SET_NULL, null=True, related_name="+", db_index=False
+    )
+    offer_category = models.ForeignKey(
+        OfferCategory, on_delete=models.SET_NULL, null=True, related_name="+", db_index=False
+    )
+    size_label = models.CharField(max_length=20)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Index of the facet_service.PRICE_RANGES bucket the price falls in
+    price_band = models.PositiveSmallIntegerField(default=0)
+    in_stock = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["store_category", "product"]),
+            models.Index(fields=["store_subcategory", "product"]),
+            models.Index(fields=["offer_category", "product"]),
+            models.Index(fields=["in_stock", "size_label", "product"]),
+            models.Index(fields=["price_band", "product"]),
+            models.Index(fields=["price"]),
+        ]
+
+    def __str__(self):
+        return f"{self.size_label} of product #{self.product_id}"
+
+
+class ProductCard(models.Model):
+    """
+    Read model behind product listings: what a product card shows, flattened
+    from the product, its store, category labels and sizes so a page of
+    cards is one query. Rebuilt by core.services.card_service on every write
+    that changes any of it.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="card")
+    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="+", db_index=False)
+    name = models.CharField(max_length=150)
+    summary = models.CharField(max_length=100, blank=True)
+    store_name = models.CharField(max_length=100)
+    store_category = models.CharField(max_length=100, null=True, blank=True)
+    store_subcategory = models.CharField(max_length=100, null=True, blank=True)
+    offer_category = models.CharField(max_length=150, null=True, blank=True)
+    # Storage URL (relative for local media); made absolute when serialized
+    main_image = models.CharField(max_length=255, blank=True)
+    # image_service.image_variants() of the main image ({format: {width: url}})
+    main_image_variants = models.JSONField(null=True, blank=True)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    total_stock = models.PositiveIntegerField(default=0)
+    # [{"id", "size_label", "price", "quantity"}] in size id order, and the
+    # labels of those with stock
+    sizes = models.JSONField(default=list)
+    sizes_in_stock = models.JSONField(default=list)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["store", "product"]),
+        ]
+
+    def __str__(self):
+        return f"Card of {self.name}"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only log of every ProductSize.quantity change, written by
+    core.services.inventory_service. For a live size the deltas sum to its
+    quantity; product / size_label survive the size row being deleted.
+    """
+    REASON_CHOICES = (
+        ("opening", "Opening balance"),
+        ("initial", "New size"),
+        ("adjust", "Manual adjustment"),
+        ("removed", "Size removed"),
+        ("sale", "POS sale"),
+        ("reservation_sale", "Reservation sale"),
+        ("buy_now", "Buy now order"),
+        ("return", "Return"),
+    )
+
+    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="stock_movements")
+    product = models.ForeignKey(
+        Product, on_delete=models.SET_NULL, null=True, blank=True, related_name="stock_movements"
+    )
+    size = models.ForeignKey(
+        ProductSize, on_delete=models.SET_NULL, null=True, blank=True, related_name="movements"
+    )
+    size_label = models.CharField(max_length=20, blank=True)
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    reference = models.CharField(max_length=64, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["store", "created_at"]),
+            models.Index(fields=["size", "created_at"]),
+            models.Index(fields=["product", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_reason_display()} {self.delta:+d} {self.size_label}"
+
+
 class Reservation(models.Model):
     customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="reservations")
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reservations")
@@ -209,6 +410,8 @@ class Reservation(models.Model):
     def save(self, *args, **kwargs):
         if not self.unique_code:
             self.unique_code = str(uuid.uuid4().int)[:4]
+        if self.customer_phone:
+            self.customer_phone = normalize_phone(self.customer_phone)
         super().save(*args, **kwargs)
 
     def is_expired(self):
@@ -218,28 +421,69 @@ class Reservation(models.Model):
         return f"Reservation {self.unique_code} - {self.customer.username}"
 
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from decimal import Decimal
 from django.conf import settings
 from django.utils import timezone
 
 
-def generate_invoice_no():
-    today = timezone.now().strftime("%Y%m%d")
-    last_sale = Sale.objects.filter(
-        invoice_no__startswith=f"INV-{today}"
-    ).order_by("-id").first()
+class InvoiceSequence(models.Model):
+    """
+    Last invoice number handed out per (store, store-local day). Allocation
+    is one UPDATE of this row, so concurrent checkouts serialize on a single
+    row lock instead of racing on a scan of Sale.
+    """
+    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="invoice_sequences")
+    date = models.DateField()
+    last_value = models.PositiveIntegerField(default=0)
 
-    if last_sale and last_sale.invoice_no:
+    class Meta:
+        unique_together = ("store", "date")
+
+    def __str__(self):
+        return f"{self.store_id} {self.date}: {self.last_value}"
+
+
+def _existing_invoice_seq(store, prefix):
+    """Highest number already issued under `prefix` (seeds a new day's counter)."""
+    last = 0
+    for invoice_no in Sale.objects.filter(store=store, invoice_no__startswith=prefix).values_list("invoice_no", flat=True):
         try:
-            last_seq = int(last_sale.invoice_no.split("-")[-1])
+            last = max(last, int(invoice_no.split("-")[-1]))
         except ValueError:
-            last_seq = 0
-    else:
-        last_seq = 0
+            continue
+    return last
+
+
+def reserve_invoice_numbers(store, count, day=None):
+    """
+    Allocate `count` consecutive INV-YYYYMMDD-NNN numbers for the store's
+    local day, or for `day` (a store-local date, e.g. of an offline sale).
+    """
+    today = day or timezone.localdate(timezone=store.tzinfo)
+    prefix = f"INV-{today.strftime('%Y%m%d')}-"
+    counter = InvoiceSequence.objects.filter(store=store, date=today)
 
-    new_seq = str(last_seq + 1).zfill(3)
-    return f"INV-{today}-{new_seq}"
+    with transaction.atomic():
+        # Write first: the UPDATE takes the row lock before anything is read
+        if not counter.update(last_value=F("last_value") + count):
+            try:
+                with transaction.atomic():
+                    InvoiceSequence.objects.create(
+                        store=store, date=today, last_value=_existing_invoice_seq(store, prefix) + count
+                    )
+            except IntegrityError:
+                # Another checkout created today's row first
+                counter.update(last_value=F("last_value") + count)
+        last = counter.values_list("last_value", flat=True).get()
+
+    return [f"{prefix}{str(seq).zfill(3)}" for seq in range(last - count + 1, last + 1)]
+
+
+def generate_invoice_no(store):
+    """Next INV-YYYYMMDD-NNN for the store's local day (unique per store)."""
+    return reserve_invoice_numbers(store, 1)[0]
 
 
 class Sale(models.Model):
@@ -248,18 +492,21 @@ class Sale(models.Model):
     subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
     discount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
     total_amount = models.DecimalField(max_digits=12, decimal_places=2)
-    invoice_no = models.CharField(max_length=128, blank=True, null=True, unique=True)
+    invoice_no = models.CharField(max_length=128, blank=True, null=True)
     customer_name = models.CharField(max_length=255, blank=True, null=True)
     customer_phone = models.CharField(max_length=32, blank=True, null=True)
     payment = models.JSONField(blank=True, null=True)  # {mode, paid_amount, credit_amount}
     is_credit = models.BooleanField(default=False)
     credit_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
     reservation = models.ForeignKey("Reservation", on_delete=models.SET_NULL, null=True, blank=True)
+    client_id = models.CharField(max_length=64, blank=True, null=True)  # POS-generated id for offline sync
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
         if not self.invoice_no:
-            self.invoice_no = generate_invoice_no()
+            self.invoice_no = generate_invoice_no(self.store)
+        if self.customer_phone:
+            self.customer_phone = normalize_phone(self.customer_phone)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -267,31 +514,193 @@ class Sale(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["store", "invoice_no"], name="unique_invoice_per_store"),
+            models.UniqueConstraint(
+                fields=["store", "client_id"],
+                condition=models.Q(client_id__isnull=False),
+                name="unique_client_sale_per_store",
+            ),
+        ]
+        indexes = [
+            # Phones are stored normalized, so lookups / prefix typeahead use this
+            models.Index(fields=["store", "customer_phone"]),
+        ]
+
+
+class SaleLine(models.Model):
+    """One row per cart line of a Sale (normalized copy of Sale.products)."""
+    sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name="lines")
+    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="sale_lines")
+    product = models.ForeignKey("Product", on_delete=models.SET_NULL, null=True, blank=True, related_name="sale_lines")
+    size = models.ForeignKey("ProductSize", on_delete=models.SET_NULL, null=True, blank=True, related_name="sale_lines")
+    product_name = models.CharField(max_length=150, blank=True)
+    size_label = models.CharField(max_length=20, blank=True)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    quantity = models.PositiveIntegerField(default=0)
+    returned_quantity = models.PositiveIntegerField(default=0)
+    line_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
 
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(returned_quantity__lte=models.F("quantity")),
+                name="sale_line_returned_lte_sold",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["store", "product"]),
+            models.Index(fields=["store", "product_name"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product_name} ({self.size_label}) × {self.quantity}"
+
+
+class CreditEntry(models.Model):
+    """
+    Append-only customer credit ledger. `amount` is signed: issue > 0,
+    settle < 0, adjust either way. The running balance per (store, phone)
+    is StoreCustomer.outstanding_credit; rows are never edited.
+    """
+    KIND_CHOICES = (
+        ("issue", "Issue"),
+        ("settle", "Settle"),
+        ("adjust", "Adjust"),
+    )
+
+    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="credit_entries")
+    phone = models.CharField(max_length=32)
+    customer_name = models.CharField(max_length=255, blank=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    sale = models.ForeignKey(Sale, on_delete=models.SET_NULL, null=True, blank=True, related_name="credit_entries")
+    note = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["store", "phone", "created_at"]),
+            models.Index(fields=["store", "kind", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} ₹{self.amount} for {self.phone}"
+
+
+class StoreCustomer(models.Model):
+    """
+    One row per (store, normalized phone) with running totals, kept current
+    by the sale / reservation / credit write paths. outstanding_credit is the
+    materialized balance of the customer's CreditEntry rows.
+    """
+    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="customers")
+    phone = models.CharField(max_length=32)
+    name = models.CharField(max_length=255, blank=True)
+
+    pos_orders = models.PositiveIntegerField(default=0)
+    reservations = models.PositiveIntegerField(default=0)
+    total_orders = models.PositiveIntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    outstanding_credit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    last_purchase = models.DateTimeField(default=timezone.now)
 
-class CustomerCredit(models.Model):
-    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="credits")
-    customer_name = models.CharField(max_length=255, blank=True, null=True)
-    customer_phone = models.CharField(max_length=32, blank=True, null=True)
-    amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
-    reference_sale = models.ForeignKey(Sale, on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("store", "phone")
+        indexes = [
+            models.Index(fields=["store", "last_purchase"]),
+            models.Index(fields=["store", "total_spent"]),
+            models.Index(fields=["store", "outstanding_credit"]),
+            # Typeahead by name (search_customers)
+            models.Index("store", Lower("name"), name="storecustomer_store_name_ci"),
+        ]
 
     def __str__(self):
-        return f"Credit ₹{self.amount} for {self.customer_phone or self.customer_name}"
+        return f"{self.name or self.phone} @ {self.store.store_name}"
 
 
 class Return(models.Model):
     store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="returns")
+    sale = models.ForeignKey(Sale, on_delete=models.SET_NULL, null=True, blank=True, related_name="returns")
+    sale_line = models.ForeignKey(
+        "SaleLine", on_delete=models.SET_NULL, null=True, blank=True, related_name="returns"
+    )
     sale_item = models.JSONField()  # {product_id, size_label, quantity, unit_price}
+    quantity = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
     reason = models.TextField(blank=True, null=True)
     invoice_no = models.CharField(max_length=128, blank=True, null=True)
     processed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["store", "created_at"]),
+        ]
+
     def __str__(self):
         return f"Return #{self.id} - {self.store.store_name}"
 
+
+# ===============================
+# ✅ DAILY SALES ROLLUP (DASHBOARD)
+# ===============================
+class DailySalesRollup(models.Model):
+    """
+    Per-store, per-day totals maintained by the sale / reservation / return
+    write paths so the dashboard KPIs read one row per day instead of every sale.
+    """
+    store = models.ForeignKey("Store", on_delete=models.CASCADE, related_name="daily_rollups")
+    date = models.DateField()
+
+    pos_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    pos_orders = models.PositiveIntegerField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    credit_issued = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    reservation_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    reservation_orders = models.PositiveIntegerField(default=0)
+    reservations_completed = models.PositiveIntegerField(default=0)
+
+    returns_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    units_returned = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("store", "date")
+        ordering = ["-date"]
+
+    def __str__(self):
+        return f"{self.store.store_name} - {self.date}"
+
+# ===============================
+# ✅ IDEMPOTENCY KEYS (POS / BUY NOW RETRIES)
+# ===============================
+class IdempotencyKey(models.Model):
+    """
+    Response of the first request sent with a given Idempotency-Key, replayed
+    for retries. status_code is null while the original request is running.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.status_code or 'pending'})"
+
+
 # ===============================
 # ✅ ADVERTISEMENT MODEL
 # ===============================
@@ -0,0 +1,85 @@
+# core/pagination.py
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_PARAM = "cursor"
+PAGE_SIZE_PARAM = "page_size"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(value):
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(request):
+    """Opaque ?cursor= value -> original JSON value (None if absent)."""
+    raw = request.query_params.get(CURSOR_PARAM)
+    if not raw:
+        return None
+    try:
+        padded = raw + "=" * (-len(raw) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        size = int(request.query_params.get(PAGE_SIZE_PARAM, default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def cursor_response(request, results, next_value, **extra):
+    """DRF CursorPagination-style body: {"next": url | null, "results": [...]}."""
+    next_url = None
+    if next_value is not None:
+        next_url = replace_query_param(
+            request.build_absolute_uri(), CURSOR_PARAM, encode_cursor(next_value)
+        )
+    return Response({**extra, "next": next_url, "results": results})
+
+
+def keyset_page(queryset, field, after=None, limit=DEFAULT_PAGE_SIZE, descending=False):
+    """
+    One page of `queryset` ordered by (field, id), both in the same direction.
+    `after` is the [value, id] pair of the previous page's last row; `field`
+    must be non-null. Works on model and .values() querysets.
+    Returns (rows, next_after | None).
+    """
+    order = [f"-{field}", "-id"] if descending else [field, "id"]
+    queryset = queryset.order_by(*order)
+
+    if after is not None:
+        value, last_id = after
+        op = "lt" if descending else "gt"
+        queryset = queryset.filter(
+            Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": last_id})
+        )
+
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    value, last_id = (last[field], last["id"]) if isinstance(last, dict) else (getattr(last, field), last.id)
+    return rows, [value.isoformat() if hasattr(value, "isoformat") else str(value), last_id]
+
+
+class NewestFirstPagination(CursorPagination):
+    """Cursor pagination for generic list views, newest pk first, same query params as above."""
+    ordering = "-pk"
+    cursor_query_param = CURSOR_PARAM
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = PAGE_SIZE_PARAM
+    max_page_size = MAX_PAGE_SIZE
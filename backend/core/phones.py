@@ -0,0 +1,41 @@
+# core/phones.py
+import re
+
+from django.db.models import Q
+
+
+def normalize_phone(phone):
+    """
+    Digits only, without the +91 / leading-zero prefixes, so "+91 98470-12345",
+    "098470 12345" and "9847012345" map to the same customer. "" if empty.
+    """
+    digits = re.sub(r"\D", "", str(phone or ""))
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits
+
+
+def normalize_phone_prefix(value):
+    """
+    normalize_phone for a partly typed number: "+91 98" and "098" are
+    prefixes of "98...". A bare "91" is kept, since local numbers can start
+    with it.
+    """
+    value = str(value or "").strip()
+    digits = re.sub(r"\D", "", value)
+    if value.startswith("+91"):
+        return digits[2:]
+    if len(digits) < 11:
+        return digits.lstrip("0")
+    return normalize_phone(digits)
+
+
+def phone_prefix_q(field, prefix):
+    """
+    Q matching normalized phones in `field` that start with the digits
+    `prefix`. Written as a range (":" sorts right after "9") so a B-tree
+    index on the column is used, unlike LIKE / icontains.
+    """
+    return Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix + ":"})
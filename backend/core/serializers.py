@@ -3,15 +3,19 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 import json
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from .models import (
     Store,
     Product,
+    ProductCard,
     ProductSize,
     ProductImage,
     Reservation,
     Sale,
-    CustomerCredit,
+    CreditEntry,
+    StockMovement,
+    StoreCustomer,
     Return,
     Advertisement,
     Staff,
@@ -22,9 +26,29 @@ from .models import (
     StoreSubCategory,
     OfferCategory,
 )
+from .services.catalog_service import record_deletions
+from .services.image_service import derive_images, image_variants, srcset
+from .services.inventory_service import log_movements, sku_conflicts
 
 User = get_user_model()
 
+
+def _srcset(field_file, request):
+    # {"webp": "<url> 160w, ...", "jpeg": ...}
+    return srcset(image_variants(field_file), request.build_absolute_uri)
+
+
+class DerivedImagesMixin:
+    """Writes the resized derivatives of the `image_fields` uploaded with a save."""
+    image_fields = ()
+
+    def save(self, **kwargs):
+        uploaded = [field for field in self.image_fields if kwargs.get(field) or self.validated_data.get(field)]
+        instance = super().save(**kwargs)
+        derive_images(instance, *uploaded)
+        return instance
+
+
 # ======================================================
 # 🔐 USER REGISTRATION SERIALIZER
 # ======================================================
@@ -53,8 +77,9 @@ class RegisterSerializer(serializers.ModelSerializer):
 # ======================================================
 # 🏪 STORE SERIALIZER
 # ======================================================
-class StoreSerializer(serializers.ModelSerializer):
+class StoreSerializer(DerivedImagesMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source="owner.username")
+    image_fields = ("logo", "cover_image")
 
     # Make them writable!
     logo = serializers.ImageField(required=False)
@@ -71,10 +96,18 @@ class StoreSerializer(serializers.ModelSerializer):
             "bio",
             "logo",
             "cover_image",
+            "time_zone",
             "created_at",
             "owner",
         ]
 
+    def validate_time_zone(self, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError("Unknown timezone.")
+        return value
+
     def to_representation(self, instance):
         rep = super().to_representation(instance)
         request = self.context.get("request")
@@ -85,6 +118,9 @@ class StoreSerializer(serializers.ModelSerializer):
         if instance.cover_image:
             rep["cover_image"] = request.build_absolute_uri(instance.cover_image.url)
 
+        rep["logo_srcset"] = _srcset(instance.logo, request)
+        rep["cover_image_srcset"] = _srcset(instance.cover_image, request)
+
         return rep
 
 # ======================================================
@@ -93,7 +129,47 @@ class StoreSerializer(serializers.ModelSerializer):
 class ProductSizeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductSize
-        fields = ["id", "size_label", "price", "quantity"]
+        fields = ["id", "size_label", "price", "quantity", "sku"]
+
+    def _store_id(self):
+        if self.instance is not None:
+            return self.instance.store_id
+        # On create the size joins the store of the submitted product (the
+        # view rejects products of other stores)
+        product_id = str(self.initial_data.get("product") or "")
+        if not product_id.isdigit():
+            return None
+        return Product.objects.filter(pk=product_id).values_list("store_id", flat=True).first()
+
+    def validate_sku(self, value):
+        value = (value or "").strip()
+        if not value:
+            return value
+        store_id = self._store_id()
+        taken = ProductSize.objects.filter(store_id=store_id, sku=value)
+        if self.instance is not None:
+            taken = taken.exclude(pk=self.instance.pk)
+        if store_id is not None and taken.exists():
+            raise serializers.ValidationError("SKU already in use.")
+        return value
+
+
+def _match_size(remaining, data):
+    """Pop the size a submitted row refers to: by id, then SKU, then label."""
+    for field in ("id", "sku", "size_label"):
+        value = str(data.get(field) or "").strip()
+        if not value:
+            continue
+        for size in remaining.values():
+            if str(getattr(size, field)) == value:
+                return remaining.pop(size.id)
+    return None
+
+
+def _check_skus(store, sizes, exclude_product=None):
+    taken = sku_conflicts(store, [size.get("sku") for size in sizes], exclude_product=exclude_product)
+    if taken:
+        raise serializers.ValidationError({"sizes": f"SKU already in use: {', '.join(taken)}"})
 
 
 # ======================================================
@@ -101,10 +177,11 @@ class ProductSizeSerializer(serializers.ModelSerializer):
 # ======================================================
 class ProductImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
-        fields = ["id", "image", "image_url"]
+        fields = ["id", "image", "image_url", "image_srcset"]
 
     def get_image_url(self, obj):
         request = self.context.get("request")
@@ -112,6 +189,9 @@ class ProductImageSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
+    def get_image_srcset(self, obj):
+        return _srcset(obj.image, self.context.get("request"))
+
 
 # ======================================================
 # 🛍 PRODUCT SERIALIZER (FIXED)
@@ -121,7 +201,7 @@ class ProductImageSerializer(serializers.ModelSerializer):
 # ======================================================
 # 🛍 UPDATED PRODUCT SERIALIZER (FINAL WORKING VERSION)
 # ======================================================
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(DerivedImagesMixin, serializers.ModelSerializer):
 
     # Read-only store details
     store_id = serializers.IntegerField(source="store.id", read_only=True)
@@ -159,6 +239,8 @@ class ProductSerializer(serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
 
     main_image = serializers.ImageField(required=False)
+    main_image_srcset = serializers.SerializerMethodField()
+    image_fields = ("main_image",)
 
     average_price = serializers.SerializerMethodField()
 
@@ -183,6 +265,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "name",
             "description",
             "main_image",
+            "main_image_srcset",
             "keywords",
 
             # Pricing & stock
@@ -193,11 +276,15 @@ class ProductSerializer(serializers.ModelSerializer):
             "created_at",
         ]
 
+    def get_main_image_srcset(self, obj):
+        return _srcset(obj.main_image, self.context.get("request"))
+
     # ----------------------------------------------------
     # GET FIRST SIZE PRICE
     # ----------------------------------------------------
     def get_average_price(self, obj):
-        first = obj.sizes.first()
+        # First size by id, read from all() so a prefetch of sizes is reused
+        first = min(obj.sizes.all(), key=lambda size: size.id, default=None)
         return first.price if first else None
 
     # ----------------------------------------------------
@@ -210,21 +297,27 @@ class ProductSerializer(serializers.ModelSerializer):
         sizes_json = request.data.get("sizes")
         sizes = json.loads(sizes_json) if sizes_json else []
 
+        _check_skus(validated_data["store"], sizes)
+
         # Create Product
         product = Product.objects.create(**validated_data)
 
         # ---- SAVE SIZES ----
-        for size in sizes:
+        created = [
             ProductSize.objects.create(
                 product=product,
                 size_label=size["size_label"],
                 price=size["price"],
                 quantity=size["quantity"],
+                sku=size.get("sku") or "",
             )
+            for size in sizes
+        ]
+        log_movements(product.store, [(s, int(s.quantity), "") for s in created], "initial", user=request.user)
 
         # ---- SAVE GALLERY IMAGES ----
         for img in request.FILES.getlist("images"):
-            ProductImage.objects.create(product=product, image=img)
+            derive_images(ProductImage.objects.create(product=product, image=img), "image")
 
         return product
 
@@ -234,6 +327,10 @@ class ProductSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         request = self.context["request"]
 
+        sizes_json = request.data.get("sizes")
+        sizes = json.loads(sizes_json) if sizes_json else []
+        _check_skus(instance.store, sizes, exclude_product=instance)
+
         # Update basic fields
         for field in ["name", "description", "keywords",
                       "store_category", "store_subcategory", "offer_category"]:
@@ -246,25 +343,44 @@ class ProductSerializer(serializers.ModelSerializer):
 
         instance.save()
 
-        # ---- UPDATE SIZES ----
-        sizes_json = request.data.get("sizes")
-        sizes = json.loads(sizes_json) if sizes_json else []
-
-        # Delete old sizes
-        ProductSize.objects.filter(product=instance).delete()
-
-        # Insert new sizes
-        for size in sizes:
-            ProductSize.objects.create(
-                product=instance,
-                size_label=size["size_label"],
-                price=size["price"],
-                quantity=size["quantity"],
-            )
+        # ---- UPDATE SIZES IN PLACE ----
+        # Submitted rows update the size they refer to, so sale lines,
+        # reservations and barcodes keep pointing at it; only sizes left out
+        # of the form are deleted.
+        remaining = {s.id: s for s in ProductSize.objects.filter(product=instance)}
+        matched = [(size, _match_size(remaining, size)) for size in sizes]
+
+        # Dropped sizes go first (their stock leaves the movement ledger), freeing their SKUs
+        removed = list(remaining.values())
+        log_movements(instance.store, [(s, -s.quantity, "") for s in removed], "removed", user=request.user)
+        record_deletions(instance.store, size_ids=[s.id for s in removed])
+        ProductSize.objects.filter(id__in=[s.id for s in removed]).delete()
+
+        adjusted, created = [], []
+        for size, existing in matched:
+            if existing is None:
+                created.append(ProductSize.objects.create(
+                    product=instance,
+                    size_label=size["size_label"],
+                    price=size["price"],
+                    quantity=size["quantity"],
+                    sku=size.get("sku") or "",
+                ))
+                continue
+            before = existing.quantity
+            existing.size_label = size["size_label"]
+            existing.price = size["price"]
+            existing.quantity = int(size["quantity"])
+            existing.sku = str(size.get("sku") or "").strip() or existing.sku
+            existing.save()
+            adjusted.append((existing, existing.quantity - before, ""))
+
+        log_movements(instance.store, adjusted, "adjust", user=request.user)
+        log_movements(instance.store, [(s, int(s.quantity), "") for s in created], "initial", user=request.user)
 
         # ---- APPEND NEW IMAGES ----
         for img in request.FILES.getlist("images"):
-            ProductImage.objects.create(product=instance, image=img)
+            derive_images(ProductImage.objects.create(product=instance, image=img), "image")
 
         return instance
 
@@ -294,8 +410,96 @@ class ProductSerializer(serializers.ModelSerializer):
         return rep
 
 
-class StoreCategorySerializer(serializers.ModelSerializer):
+# ======================================================
+# 🔄 POS CATALOG SYNC (lean rows, sizes listed separately)
+# ======================================================
+class CatalogProductSerializer(serializers.ModelSerializer):
+    main_image = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            "id",
+            "name",
+            "keywords",
+            "store_category_id",
+            "store_subcategory_id",
+            "offer_category_id",
+            "main_image",
+            "image",
+            "updated_at",
+        ]
+
+    def _url(self, field):
+        return self.context["request"].build_absolute_uri(field.url) if field else None
+
+    def get_main_image(self, obj):
+        return self._url(obj.main_image)
+
+    def get_image(self, obj):
+        # First gallery image (images are prefetched in id order)
+        first = next(iter(obj.images.all()), None)
+        return self._url(first.image) if first else None
+
+
+class CatalogSizeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductSize
+        fields = ["id", "product_id", "size_label", "price", "quantity", "sku", "updated_at"]
+
+
+# ======================================================
+# 🃏 PRODUCT CARD (listings, read from ProductCard)
+# ======================================================
+class ProductCardSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="product_id", read_only=True)
+    store_id = serializers.IntegerField(read_only=True)
+    description = serializers.CharField(source="summary", read_only=True)
+    main_image = serializers.SerializerMethodField()
+    main_image_srcset = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductCard
+        fields = [
+            "id",
+            "store_id",
+            "store_name",
+            "store_category",
+            "store_subcategory",
+            "offer_category",
+            "name",
+            "description",
+            "main_image",
+            "main_image_srcset",
+            "min_price",
+            "max_price",
+            "total_stock",
+            "sizes",
+            "sizes_in_stock",
+            "created_at",
+        ]
+
+    def _absolute(self, url):
+        if url.startswith(("http://", "https://")):
+            return url
+        # Site root resolved once per response, not per card
+        base = self.context.get("absolute_base")
+        if base is None:
+            base = self.context["request"].build_absolute_uri("/").rstrip("/")
+            self.context["absolute_base"] = base
+        return base + url
+
+    def get_main_image(self, obj):
+        return self._absolute(obj.main_image) if obj.main_image else None
+
+    def get_main_image_srcset(self, obj):
+        return srcset(obj.main_image_variants, self._absolute)
+
+
+class StoreCategorySerializer(DerivedImagesMixin, serializers.ModelSerializer):
     dp_image = serializers.ImageField(required=False)
+    image_fields = ("dp_image",)
 
     class Meta:
         model = StoreCategory
@@ -307,6 +511,7 @@ class StoreCategorySerializer(serializers.ModelSerializer):
 
         if instance.dp_image:
             data["dp_image"] = request.build_absolute_uri(instance.dp_image.url)
+        data["dp_image_srcset"] = _srcset(instance.dp_image, request)
 
         return data
 
@@ -316,12 +521,14 @@ class StoreCategorySerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class StoreSubCategorySerializer(serializers.ModelSerializer):
+class StoreSubCategorySerializer(DerivedImagesMixin, serializers.ModelSerializer):
     dp_image_url = serializers.SerializerMethodField()
+    image_fields = ("dp_image",)
+    dp_image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = StoreSubCategory
-        fields = ["id", "category", "name", "dp_image", "dp_image_url"]
+        fields = ["id", "category", "name", "dp_image", "dp_image_url", "dp_image_srcset"]
         extra_kwargs = {
             "category": {"required": False},
         }
@@ -347,8 +554,13 @@ class StoreSubCategorySerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.dp_image.url)
         return None
 
-class OfferCategorySerializer(serializers.ModelSerializer):
+    def get_dp_image_srcset(self, obj):
+        return _srcset(obj.dp_image, self.context.get("request"))
+
+class OfferCategorySerializer(DerivedImagesMixin, serializers.ModelSerializer):
     banner_image_url = serializers.SerializerMethodField()
+    image_fields = ("banner_image",)
+    banner_image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = OfferCategory
@@ -360,6 +572,7 @@ class OfferCategorySerializer(serializers.ModelSerializer):
             "end_date",
             "banner_image",
             "banner_image_url",
+            "banner_image_srcset",
             "created_at",
         ]
         extra_kwargs = {
@@ -383,6 +596,9 @@ class OfferCategorySerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.banner_image.url)
         return None
 
+    def get_banner_image_srcset(self, obj):
+        return _srcset(obj.banner_image, self.context.get("request"))
+
 
 # ======================================================
 # 📅 RESERVATION
@@ -391,12 +607,13 @@ class ReservationSerializer(serializers.ModelSerializer):
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
     size = serializers.PrimaryKeyRelatedField(queryset=ProductSize.objects.all())
 
-    product_name = serializers.CharField(source="product.name", read_only=True)
+    # Product details come from its listing card
+    product_name = serializers.CharField(source="product.card.name", read_only=True)
     product_image = serializers.SerializerMethodField()
 
-    category = serializers.CharField(source="product.store_category.name", read_only=True)
-    subcategory = serializers.CharField(source="product.store_subcategory.name", read_only=True)
-    offer = serializers.CharField(source="product.offer_category.title", read_only=True)
+    category = serializers.CharField(source="product.card.store_category", read_only=True)
+    subcategory = serializers.CharField(source="product.card.store_subcategory", read_only=True)
+    offer = serializers.CharField(source="product.card.offer_category", read_only=True)
 
     size_label = serializers.CharField(source="size.size_label", read_only=True)
     price = serializers.DecimalField(source="size.price", max_digits=10, decimal_places=2, read_only=True)
@@ -429,10 +646,8 @@ class ReservationSerializer(serializers.ModelSerializer):
         read_only_fields = ["unique_code", "status", "customer"]
 
     def get_product_image(self, obj):
-        request = self.context.get("request")
-        if obj.product.main_image:
-            return request.build_absolute_uri(obj.product.main_image.url)
-        return None
+        card = getattr(obj.product, "card", None)
+        return ProductCardSerializer(context=self.context).get_main_image(card) if card else None
 
 
 
@@ -466,22 +681,62 @@ class SaleSerializer(serializers.ModelSerializer):
         ]
 
 
-class CustomerCreditSerializer(serializers.ModelSerializer):
-    store_name = serializers.CharField(source="store.store_name", read_only=True)
+class CreditEntrySerializer(serializers.ModelSerializer):
+    invoice_no = serializers.CharField(source="sale.invoice_no", read_only=True, default=None)
+    created_by_name = serializers.CharField(source="created_by.username", read_only=True, default=None)
 
     class Meta:
-        model = CustomerCredit
+        model = CreditEntry
         fields = [
             "id",
-            "store_name",
+            "phone",
             "customer_name",
-            "customer_phone",
+            "kind",
             "amount",
-            "reference_sale",
+            "sale",
+            "invoice_no",
+            "note",
+            "created_by_name",
+            "created_at",
+        ]
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source="product.name", read_only=True, default=None)
+    created_by_name = serializers.CharField(source="created_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = StockMovement
+        fields = [
+            "id",
+            "product",
+            "product_name",
+            "size",
+            "size_label",
+            "delta",
+            "reason",
+            "reference",
+            "created_by_name",
             "created_at",
         ]
 
 
+class StoreCustomerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StoreCustomer
+        fields = [
+            "id",
+            "phone",
+            "name",
+            "pos_orders",
+            "reservations",
+            "total_orders",
+            "total_spent",
+            "outstanding_credit",
+            "last_purchase",
+        ]
+
+
 class ReturnSerializer(serializers.ModelSerializer):
     store_name = serializers.CharField(source="store.store_name", read_only=True)
     processed_by_name = serializers.CharField(source="processed_by.username", read_only=True)
@@ -491,7 +746,11 @@ class ReturnSerializer(serializers.ModelSerializer):
         fields = [
             "id",
             "store_name",
+            "sale",
+            "sale_line",
             "sale_item",
+            "quantity",
+            "amount",
             "reason",
             "invoice_no",
             "processed_by_name",
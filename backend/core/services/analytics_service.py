@@ -0,0 +1,721 @@
+# core/services/analytics_service.py
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Count, DateField, Exists, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, NullIf, Trunc
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.models import DailySalesRollup, Product, ProductSize, Reservation, Return, Sale, SaleLine
+from core.phones import normalize_phone_prefix, phone_prefix_q
+
+
+FILTER_PARAMS = (
+    "start_date",
+    "end_date",
+    "category",
+    "customer",
+    "customer_name",
+    "product",
+    "sale_type",
+    "reservation_status",
+)
+
+BUCKETS = ("hour", "day", "week", "month")
+MAX_BUCKETS = 2000
+
+INVENTORY_ORDERING = ("stock_left", "name", "id")
+LOW_STOCK_THRESHOLD = 5
+
+
+# -------------------------------
+# DATES (STORE LOCAL TIME)
+# -------------------------------
+def parse_day(value):
+    """'YYYY-MM-DD' -> date. Raises ValueError for anything else."""
+    if isinstance(value, date):
+        return value
+    day = parse_date(value or "")
+    if day is None:
+        raise ValueError(f"Invalid date: {value!r}")
+    return day
+
+
+def local_day_start(day, tz):
+    """Aware datetime for local midnight of `day` in `tz`."""
+    return timezone.make_aware(datetime.combine(day, time.min), tz)
+
+
+def local_today(store):
+    return timezone.localdate(timezone=store.tzinfo)
+
+
+# -------------------------------
+# FILTERS
+# -------------------------------
+def dashboard_filters(params):
+    """
+    Read the dashboard filter set from query params. Dates are validated
+    (ValueError on bad input); empty values are dropped to None.
+    """
+    filters = {key: (params.get(key) or None) for key in FILTER_PARAMS}
+    for key in ("start_date", "end_date"):
+        if filters[key]:
+            filters[key] = parse_day(filters[key])
+    return filters
+
+
+def filtered_querysets(store, filters):
+    """Apply dashboard filters, returning (sales_qs, reservations_qs)."""
+    tz = store.tzinfo
+    sales_qs = Sale.objects.filter(store=store)
+    reservations_qs = Reservation.objects.filter(product__store=store)
+
+    # Date range (local days -> UTC instants, so created_at indexes apply)
+    if filters.get("start_date"):
+        start = local_day_start(filters["start_date"], tz)
+        sales_qs = sales_qs.filter(created_at__gte=start)
+        reservations_qs = reservations_qs.filter(created_at__gte=start)
+
+    if filters.get("end_date"):
+        end = local_day_start(filters["end_date"] + timedelta(days=1), tz)
+        sales_qs = sales_qs.filter(created_at__lt=end)
+        reservations_qs = reservations_qs.filter(created_at__lt=end)
+
+    # Category (store level)
+    if filters.get("category"):
+        sales_qs = sales_qs.filter(store__category=filters["category"])
+        reservations_qs = reservations_qs.filter(product__store__category=filters["category"])
+
+    # Customer phone (prefix of the normalized number) / name
+    if filters.get("customer"):
+        phone = normalize_phone_prefix(filters["customer"])
+        if phone:
+            sales_qs = sales_qs.filter(phone_prefix_q("customer_phone", phone))
+            reservations_qs = reservations_qs.filter(
+                phone_prefix_q("customer_phone", phone) | Q(customer__phone__startswith=phone)
+            )
+        else:
+            sales_qs, reservations_qs = sales_qs.none(), reservations_qs.none()
+
+    if filters.get("customer_name"):
+        sales_qs = sales_qs.filter(customer_name__icontains=filters["customer_name"])
+        reservations_qs = reservations_qs.filter(customer__username__icontains=filters["customer_name"])
+
+    # Product: a numeric value is an exact product id, anything else a name match
+    product_filter = filters.get("product")
+    if product_filter:
+        if product_filter.isdigit():
+            line_match = Q(product_id=int(product_filter))
+            reservations_qs = reservations_qs.filter(product_id=int(product_filter))
+        else:
+            line_match = Q(product_name__icontains=product_filter)
+            reservations_qs = reservations_qs.filter(product__name__icontains=product_filter)
+
+        sales_qs = sales_qs.filter(
+            Exists(SaleLine.objects.filter(line_match, sale=OuterRef("pk")))
+        )
+
+    if filters.get("reservation_status"):
+        reservations_qs = reservations_qs.filter(status=filters["reservation_status"])
+
+    # Sale type
+    if filters.get("sale_type") == "pos":
+        reservations_qs = reservations_qs.none()
+    elif filters.get("sale_type") == "reservation":
+        sales_qs = sales_qs.none()
+
+    return sales_qs, reservations_qs
+
+
+def filtered_returns(store, filters):
+    """
+    Returns processed in the dashboard date range. Customer filters match
+    the original sale, product filters the returned line.
+    """
+    tz = store.tzinfo
+    qs = Return.objects.filter(store=store)
+    if filters.get("start_date"):
+        qs = qs.filter(created_at__gte=local_day_start(filters["start_date"], tz))
+    if filters.get("end_date"):
+        qs = qs.filter(created_at__lt=local_day_start(filters["end_date"] + timedelta(days=1), tz))
+    if filters.get("category"):
+        qs = qs.filter(store__category=filters["category"])
+    if filters.get("customer"):
+        phone = normalize_phone_prefix(filters["customer"])
+        qs = qs.filter(phone_prefix_q("sale__customer_phone", phone)) if phone else qs.none()
+    if filters.get("customer_name"):
+        qs = qs.filter(sale__customer_name__icontains=filters["customer_name"])
+
+    product_filter = filters.get("product")
+    if product_filter:
+        if product_filter.isdigit():
+            qs = qs.filter(sale_line__product_id=int(product_filter))
+        else:
+            qs = qs.filter(sale_line__product_name__icontains=product_filter)
+
+    if filters.get("sale_type") == "reservation":
+        qs = qs.none()
+    return qs
+
+
+def rollup_eligible(filters):
+    """Rollups cannot answer per-customer / per-product / status slices."""
+    return not (
+        filters.get("customer")
+        or filters.get("customer_name")
+        or filters.get("product")
+        or filters.get("reservation_status")
+    )
+
+
+# -------------------------------
+# TIME SERIES
+# -------------------------------
+def _label(bucket, value):
+    if bucket == "hour":
+        return value.strftime("%Y-%m-%dT%H:00")
+    if bucket == "month":
+        return value.strftime("%Y-%m")
+    return value.isoformat()
+
+
+def _bucket_starts(bucket, start, end):
+    """Local wall-clock bucket starts covering [start, end] (dates)."""
+    if bucket == "hour":
+        day = start
+        while day <= end:
+            for hour in range(24):
+                yield datetime.combine(day, time(hour))
+            day += timedelta(days=1)
+    elif bucket == "day":
+        day = start
+        while day <= end:
+            yield day
+            day += timedelta(days=1)
+    elif bucket == "week":
+        day = start - timedelta(days=start.weekday())
+        while day <= end:
+            yield day
+            day += timedelta(days=7)
+    else:
+        day = start.replace(day=1)
+        while day <= end:
+            yield day
+            day = (day + timedelta(days=32)).replace(day=1)
+
+
+def default_range(store, bucket):
+    end = local_today(store)
+    span = {"hour": 0, "day": 6, "week": 7 * 12 - 1, "month": 365}[bucket]
+    return end - timedelta(days=span), end
+
+
+def _check_range(bucket, start, end):
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+    if start > end:
+        raise ValueError("start_date must be on or before end_date")
+
+    days = (end - start).days + 1
+    approx = {"hour": days * 24, "day": days, "week": days // 7 + 2, "month": days // 28 + 2}[bucket]
+    if approx > MAX_BUCKETS:
+        raise ValueError("Date range too large for this bucket size")
+
+
+def _assemble(bucket, start, end, pos, res):
+    series = []
+    for period in _bucket_starts(bucket, start, end):
+        key = _label(bucket, period)
+        pos_total, pos_orders = pos.get(key, (0.0, 0))
+        res_total, res_orders = res.get(key, (0.0, 0))
+        series.append({
+            "period": key,
+            "pos_total": pos_total,
+            "pos_orders": pos_orders,
+            "reservation_total": res_total,
+            "reservations": res_orders,
+            "total": round(pos_total + res_total, 2),
+        })
+    return series
+
+
+def time_series(store, sales_qs, reservations_qs, bucket, start, end):
+    """
+    POS and reservation totals per local-time bucket over [start, end].
+    One GROUP BY per source; empty buckets are zero-filled.
+    """
+    _check_range(bucket, start, end)
+
+    tz = store.tzinfo
+    range_start = local_day_start(start, tz)
+    range_end = local_day_start(end + timedelta(days=1), tz)
+
+    def grouped(qs, amount_field):
+        rows = (
+            qs.filter(created_at__gte=range_start, created_at__lt=range_end)
+            .order_by()
+            .annotate(period=Trunc("created_at", bucket, tzinfo=tz))
+            .values("period")
+            .annotate(total=Sum(amount_field), orders=Count("id"))
+        )
+        out = {}
+        for r in rows:
+            period = timezone.localtime(r["period"], tz)
+            key = _label(bucket, period if bucket == "hour" else period.date())
+            out[key] = (float(r["total"] or 0), r["orders"])
+        return out
+
+    return _assemble(
+        bucket, start, end,
+        grouped(sales_qs, "total_amount"),
+        grouped(reservations_qs, "advance_amount"),
+    )
+
+
+def rollup_time_series(store, filters, bucket, start, end):
+    """
+    Same shape as time_series() but read from DailySalesRollup, so cost is
+    O(days in range). Only valid for rollup_eligible() filters and
+    day / week / month buckets.
+    """
+    _check_range(bucket, start, end)
+    if bucket == "hour":
+        raise ValueError("Hourly buckets are not available from rollups")
+
+    qs = DailySalesRollup.objects.filter(store=store, date__gte=start, date__lte=end)
+    if filters.get("start_date"):
+        qs = qs.filter(date__gte=filters["start_date"])
+    if filters.get("end_date"):
+        qs = qs.filter(date__lte=filters["end_date"])
+    if filters.get("category") and filters["category"] != store.category:
+        qs = qs.none()
+
+    include_pos = filters.get("sale_type") != "reservation"
+    include_res = filters.get("sale_type") != "pos"
+
+    period = F("date") if bucket == "day" else Trunc("date", bucket, output_field=DateField())
+    pos, res = {}, {}
+    for r in (
+        qs.order_by()
+        .annotate(period=period)
+        .values("period")
+        .annotate(
+            pos_total=Sum("pos_revenue"),
+            pos_orders=Sum("pos_orders"),
+            res_total=Sum("reservation_revenue"),
+            res_orders=Sum("reservation_orders"),
+        )
+    ):
+        key = _label(bucket, r["period"])
+        if include_pos:
+            pos[key] = (float(r["pos_total"] or 0), r["pos_orders"] or 0)
+        if include_res:
+            res[key] = (float(r["res_total"] or 0), r["res_orders"] or 0)
+
+    return _assemble(bucket, start, end, pos, res)
+
+
+# -------------------------------
+# DASHBOARD SECTIONS
+# -------------------------------
+RESERVATION_ROW_FIELDS = (
+    "id",
+    "product_id",
+    "product__name",
+    "size__size_label",
+    "quantity",
+    "advance_amount",
+    "status",
+    "created_at",
+    "customer__username",
+    "customer__phone",
+)
+
+SALE_ROW_FIELDS = ("id", "customer_name", "customer_phone", "total_amount", "created_at", "products")
+
+
+def reservation_rows(reservations_qs):
+    """Filtered reservations as plain rows (one query, no per-row lookups)."""
+    return list(reservations_qs.values(*RESERVATION_ROW_FIELDS))
+
+
+def compute_kpis(store, filters, sales_qs, reservations_qs, reservation_rows=None):
+    """Headline numbers. Rollup-backed when the filter set allows it."""
+    if rollup_eligible(filters):
+        qs = DailySalesRollup.objects.filter(store=store)
+        if filters.get("start_date"):
+            qs = qs.filter(date__gte=filters["start_date"])
+        if filters.get("end_date"):
+            qs = qs.filter(date__lte=filters["end_date"])
+        if filters.get("category") and filters["category"] != store.category:
+            qs = qs.none()
+
+        include_pos = filters.get("sale_type") != "reservation"
+        include_res = filters.get("sale_type") != "pos"
+
+        totals = qs.aggregate(
+            pos_orders=Sum("pos_orders"),
+            pos_revenue=Sum("pos_revenue"),
+            res_orders=Sum("reservation_orders"),
+            res_completed=Sum("reservations_completed"),
+            res_revenue=Sum("reservation_revenue"),
+            returns=Sum("returns_amount"),
+        )
+
+        total_sales = (totals["pos_orders"] or 0) if include_pos else 0
+        pos_revenue = float(totals["pos_revenue"] or 0) if include_pos else 0.0
+        total_reservations = (totals["res_orders"] or 0) if include_res else 0
+        completed_reservations = (totals["res_completed"] or 0) if include_res else 0
+        reservation_revenue = float(totals["res_revenue"] or 0) if include_res else 0.0
+        returns_amount = float(totals["returns"] or 0) if include_pos else 0.0
+    else:
+        sales_totals = sales_qs.aggregate(count=Count("id"), revenue=Sum("total_amount"))
+        total_sales = sales_totals["count"]
+        pos_revenue = float(sales_totals["revenue"] or 0)
+        returns_amount = float(filtered_returns(store, filters).aggregate(total=Sum("amount"))["total"] or 0)
+
+        if reservation_rows is not None:
+            total_reservations = len(reservation_rows)
+            completed_reservations = sum(1 for r in reservation_rows if r["status"] == "completed")
+            reservation_revenue = float(sum(r["advance_amount"] for r in reservation_rows))
+        else:
+            res_totals = reservations_qs.aggregate(
+                count=Count("id"),
+                completed=Count("id", filter=Q(status="completed")),
+                revenue=Sum("advance_amount"),
+            )
+            total_reservations = res_totals["count"]
+            completed_reservations = res_totals["completed"]
+            reservation_revenue = float(res_totals["revenue"] or 0)
+
+    total_revenue = pos_revenue + reservation_revenue
+    total_orders = total_sales + total_reservations
+
+    return {
+        "total_sales": total_sales,
+        "total_reservations": total_reservations,
+        "converted_reservations": completed_reservations,
+        "reservation_conversion_rate": (
+            round(completed_reservations / total_reservations * 100, 2)
+            if total_reservations else 0
+        ),
+        "pos_revenue": round(pos_revenue, 2),
+        "reservation_revenue": round(reservation_revenue, 2),
+        "total_revenue": round(total_revenue, 2),
+        "returns_amount": round(returns_amount, 2),
+        "net_revenue": round(total_revenue - returns_amount, 2),
+        "avg_order_value": round(total_revenue / total_orders, 2) if total_orders else 0,
+    }
+
+
+def category_sales(store, kpis):
+    """Every sale and reservation here belongs to this store's category."""
+    if not (kpis["total_sales"] or kpis["total_reservations"]):
+        return []
+    return [{"category": store.category or "Other", "revenue": kpis["total_revenue"]}]
+
+
+def weekly_trend(store, filters, sales_qs, reservations_qs):
+    """Last 7 local days, in the dashboard's chart format."""
+    today = local_today(store)
+    week_start = today - timedelta(days=6)
+
+    if rollup_eligible(filters):
+        series = rollup_time_series(store, filters, "day", week_start, today)
+    else:
+        series = time_series(store, sales_qs, reservations_qs, "day", week_start, today)
+
+    return [
+        {
+            "day": parse_day(row["period"]).strftime("%b %d"),
+            "pos_total": row["pos_total"],
+            "reservation_total": row["reservation_total"],
+        }
+        for row in series
+    ]
+
+
+def _reserved_units(reservations_qs, reservation_rows=None, key="product_id"):
+    if reservation_rows is None:
+        return dict(
+            reservations_qs.order_by().values_list(key).annotate(qty=Sum("quantity"))
+        )
+    out = {}
+    for r in reservation_rows:
+        out[r[key]] = out.get(r[key], 0) + r["quantity"]
+    return out
+
+
+def top_products(sales_qs, reservations_qs, reservation_rows=None):
+    """All products ranked by units sold + reserved (callers slice)."""
+    stats = {}
+
+    for row in (
+        SaleLine.objects.filter(sale__in=sales_qs)
+        .values("product_name")
+        .annotate(qty=Sum("quantity"))
+    ):
+        name = row["product_name"] or "Unknown Product"
+        stats.setdefault(name, {"quantity": 0, "reservation_quantity": 0})
+        stats[name]["quantity"] += row["qty"] or 0
+
+    for name, qty in _reserved_units(reservations_qs, reservation_rows, key="product__name").items():
+        stats.setdefault(name, {"quantity": 0, "reservation_quantity": 0})
+        stats[name]["reservation_quantity"] += qty or 0
+
+    return sorted(
+        [
+            {
+                "name": name,
+                "quantity": s["quantity"],
+                "reservation_quantity": s["reservation_quantity"],
+                "total_sold": s["quantity"] + s["reservation_quantity"],
+            }
+            for name, s in stats.items()
+        ],
+        key=lambda x: x["total_sold"],
+        reverse=True,
+    )
+
+
+def _format_time(value, tz):
+    return timezone.localtime(value, tz).strftime("%Y-%m-%d %H:%M")
+
+
+def sale_order_entry(row, tz):
+    item_string = ", ".join([
+        f"{(i.get('product') or 'Unknown Product')} "
+        f"{'(' + i.get('size') + ')' if i.get('size') else ''} × {i.get('quantity')}"
+        for i in row["products"] or []
+        if isinstance(i, dict)
+    ])
+    return {
+        "name": row["customer_name"] or "Unknown",
+        "phone": row["customer_phone"] or "N/A",
+        "order_id": row["id"],
+        "type": "pos",
+        "items": item_string,
+        "amount": float(row["total_amount"]),
+        "date": _format_time(row["created_at"], tz),
+        "status": "completed",
+    }
+
+
+def reservation_order_entry(row, tz):
+    return {
+        "name": row["customer__username"],
+        "phone": row["customer__phone"],
+        "order_id": row["id"],
+        "type": "reservation",
+        "items": f"{row['product__name']} ({row['size__size_label']}) × {row['quantity']}",
+        "amount": float(row["advance_amount"]),
+        "date": _format_time(row["created_at"], tz),
+        "status": row["status"],
+    }
+
+
+def order_entries(store, sales_qs, reservation_rows):
+    """Every filtered order: POS sales first, then reservations."""
+    tz = store.tzinfo
+    orders = [sale_order_entry(row, tz) for row in sales_qs.values(*SALE_ROW_FIELDS).iterator()]
+    orders.extend(reservation_order_entry(row, tz) for row in reservation_rows)
+    return orders
+
+
+def orders_page(store, sales_qs, reservations_qs, after=None, limit=50):
+    """
+    Newest-first page over sales + reservations.
+    Keyset order is (created_at, kind, id) descending with POS (kind 1)
+    before reservations (kind 0) at equal timestamps. `after` is the key of
+    the last row already returned. Returns (entries, next_key | None).
+    """
+    tz = store.tzinfo
+    sales = sales_qs.order_by("-created_at", "-id")
+    reservations = reservations_qs.order_by("-created_at", "-id")
+
+    if after:
+        ts = datetime.fromisoformat(after["t"])
+        if after["k"] == 1:
+            sales = sales.filter(Q(created_at__lt=ts) | Q(created_at=ts, id__lt=after["i"]))
+            reservations = reservations.filter(created_at__lte=ts)
+        else:
+            sales = sales.filter(created_at__lt=ts)
+            reservations = reservations.filter(Q(created_at__lt=ts) | Q(created_at=ts, id__lt=after["i"]))
+
+    merged = [
+        ((row["created_at"], 1, row["id"]), row)
+        for row in sales.values(*SALE_ROW_FIELDS)[:limit + 1]
+    ] + [
+        ((row["created_at"], 0, row["id"]), row)
+        for row in reservations.values(*RESERVATION_ROW_FIELDS)[:limit + 1]
+    ]
+    merged.sort(key=lambda pair: pair[0], reverse=True)
+
+    page = merged[:limit]
+    entries = [
+        sale_order_entry(row, tz) if kind == 1 else reservation_order_entry(row, tz)
+        for (_, kind, _), row in page
+    ]
+
+    next_key = None
+    if len(merged) > limit and page:
+        created_at, kind, pk = page[-1][0]
+        next_key = {"t": created_at.isoformat(), "k": kind, "i": pk}
+    return entries, next_key
+
+
+def customer_summaries(store, sales_qs, reservations_qs, reservation_rows=None, after_phone=None, limit=None):
+    """
+    Per-phone order counts and spend, ordered by phone. With `limit`, a
+    page starting after `after_phone`; returns (rows, has_more).
+
+    Paging happens in SQL: both sources are grouped and read in phone order,
+    so the first limit + 1 merged phones always come from the first
+    limit + 1 of each, and memory stays bounded by the page size.
+    """
+    tz = store.tzinfo
+    customers = {}
+
+    def bump(phone, name, pos, res, spent, last):
+        c = customers.setdefault(phone, {
+            "name": name,
+            "phone": phone,
+            "pos_orders": 0,
+            "reservations": 0,
+            "total_orders": 0,
+            "total_spent": 0,
+            "last_purchase": None,
+        })
+        c["pos_orders"] += pos
+        c["reservations"] += res
+        c["total_orders"] += pos + res
+        c["total_spent"] += spent
+        if last and (c["last_purchase"] is None or last > c["last_purchase"]):
+            c["last_purchase"] = last
+
+    sale_groups = (
+        sales_qs.order_by()
+        .annotate(phone_key=Coalesce(NullIf("customer_phone", Value("")), Value("N/A")))
+        .values("phone_key")
+        .annotate(
+            name=Max("customer_name"),
+            orders=Count("id"),
+            spent=Sum("total_amount"),
+            last=Max("created_at"),
+        )
+    )
+    if after_phone is not None:
+        sale_groups = sale_groups.filter(phone_key__gt=after_phone)
+    if limit is not None:
+        sale_groups = sale_groups.order_by("phone_key")[:limit + 1]
+
+    for row in sale_groups:
+        bump(
+            row["phone_key"], row["name"] or "Unknown",
+            row["orders"], 0, float(row["spent"] or 0), row["last"],
+        )
+
+    if reservation_rows is None:
+        res_groups = (
+            reservations_qs.order_by()
+            .values("customer__phone")
+            .annotate(
+                name=Max("customer__username"),
+                orders=Count("id"),
+                spent=Sum("advance_amount"),
+                last=Max("created_at"),
+            )
+        )
+        if after_phone is not None:
+            res_groups = res_groups.filter(customer__phone__gt=after_phone)
+        if limit is not None:
+            res_groups = res_groups.order_by("customer__phone")[:limit + 1]
+
+        for row in res_groups:
+            bump(row["customer__phone"], row["name"], 0, row["orders"], float(row["spent"] or 0), row["last"])
+    else:
+        for r in reservation_rows:
+            if after_phone is None or (r["customer__phone"] or "") > after_phone:
+                bump(r["customer__phone"], r["customer__username"], 0, 1, float(r["advance_amount"]), r["created_at"])
+
+    rows = sorted(customers.values(), key=lambda c: c["phone"] or "")
+
+    has_more = False
+    if limit is not None:
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+    for c in rows:
+        c["total_spent"] = round(c["total_spent"], 2)
+        c["last_purchase"] = _format_time(c["last_purchase"], tz) if c["last_purchase"] else None
+
+    return (rows, has_more) if limit is not None else rows
+
+
+def inventory_queryset(store):
+    """
+    Store products annotated in SQL with stock_left (sum of size quantities)
+    and top_size (label of the best-stocked size, "N/A" without sizes).
+    """
+    sizes = ProductSize.objects.filter(product=OuterRef("pk"))
+    return Product.objects.filter(store=store).annotate(
+        stock_left=Coalesce(
+            Subquery(
+                sizes.order_by().values("product").annotate(total=Sum("quantity")).values("total"),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+        top_size=Coalesce(
+            Subquery(sizes.order_by("-quantity", "id").values("size_label")[:1]),
+            Value("N/A"),
+        ),
+    )
+
+
+def inventory_counts(store, low_stock=LOW_STOCK_THRESHOLD):
+    """Catalog-wide stock totals in one aggregate query."""
+    counts = inventory_queryset(store).aggregate(
+        total_products=Count("id"),
+        total_units=Coalesce(Sum("stock_left"), Value(0)),
+        out_of_stock=Count("id", filter=Q(stock_left=0)),
+        low_stock=Count("id", filter=Q(stock_left__gt=0, stock_left__lte=low_stock)),
+    )
+    counts["low_stock_threshold"] = low_stock
+    return counts
+
+
+def inventory_rows(store, sales_qs, reservations_qs, reservation_rows=None, after_id=None, limit=None):
+    """
+    Stock and sold units per product, ordered by id. With `limit`, a page
+    after `after_id`; returns (rows, has_more).
+    """
+    products = inventory_queryset(store).order_by("id").values("id", "name", "stock_left", "top_size")
+    if after_id is not None:
+        products = products.filter(id__gt=after_id)
+
+    has_more = False
+    if limit is not None:
+        products = list(products[:limit + 1])
+        has_more = len(products) > limit
+        products = products[:limit]
+
+    product_ids = [p["id"] for p in products] if limit is not None else None
+
+    lines = SaleLine.objects.filter(sale__in=sales_qs, product__isnull=False)
+    if product_ids is not None:
+        lines = lines.filter(product_id__in=product_ids)
+        reservations_qs = reservations_qs.filter(product_id__in=product_ids)
+    units_by_product = dict(lines.values_list("product_id").annotate(qty=Sum("quantity")))
+    reserved_by_product = _reserved_units(reservations_qs, reservation_rows)
+
+    rows = []
+    for p in products:
+        rows.append({
+            **p,
+            "total_sales": units_by_product.get(p["id"], 0) or 0,
+            "reservation_sales": reserved_by_product.get(p["id"], 0) or 0,
+        })
+
+    return (rows, has_more) if limit is not None else rows
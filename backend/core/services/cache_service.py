@@ -0,0 +1,114 @@
+# core/services/cache_service.py
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# -------------------------------
+# PER-STORE VERSION COUNTER
+# -------------------------------
+# Bumped with every store's counter, for cache entries that span stores
+CATALOG_VERSION_KEY = "catalog:data-version"
+
+
+def _version_key(store_id):
+    return f"store:{store_id}:data-version"
+
+
+def _current(key):
+    """
+    Current value of a version counter. A missing counter is seeded with a
+    timestamp, so an evicted counter can never come back at a value that
+    older cache entries were written under.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def store_version(store_id):
+    """Current data version for a store."""
+    return _current(_version_key(store_id))
+
+
+def catalog_version():
+    """Current data version across all stores."""
+    return _current(CATALOG_VERSION_KEY)
+
+
+def bump_store_version(store_id):
+    """
+    Invalidate every cached dashboard and facet entry for the store. Runs
+    after the surrounding transaction commits so readers never re-cache
+    old rows.
+    """
+    def _bump():
+        for key in (_version_key(store_id), CATALOG_VERSION_KEY):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time.time_ns(), timeout=None)
+
+    transaction.on_commit(_bump)
+
+
+# -------------------------------
+# DASHBOARD RESPONSES
+# -------------------------------
+def _normalize(params):
+    return {
+        key: value.isoformat() if hasattr(value, "isoformat") else value
+        for key, value in sorted(params.items())
+        if value not in (None, "")
+    }
+
+
+def dashboard_cache_key(store_id, section, params):
+    digest = hashlib.sha1(
+        json.dumps(_normalize(params), sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"dashboard:{store_id}:v{store_version(store_id)}:{section}:{digest}"
+
+
+def cached_dashboard(store, section, params, compute):
+    """
+    Return (value, hit). `params` is everything that shapes the result
+    (filters, paging, the store's local date); `compute` builds it on a miss.
+    """
+    key = dashboard_cache_key(store.id, section, params)
+    value = cache.get(key)
+    if value is not None:
+        return value, True
+
+    value = compute()
+    cache.set(key, value, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    return value, False
+
+
+# -------------------------------
+# CATALOG FACETS
+# -------------------------------
+def cached_facets(params, compute):
+    """
+    Facet counts for a set of catalog filters, reused for up to
+    FACET_CACHE_TIMEOUT seconds. Keyed on the filtered store's version (the
+    catalog version without a store filter), so writes invalidate them;
+    the timeout still bounds offers starting or ending.
+    """
+    digest = hashlib.sha1(
+        json.dumps(_normalize(params), sort_keys=True, default=str).encode()
+    ).hexdigest()
+    store_id = params.get("store")
+    version = f"store{store_id}:v{store_version(store_id)}" if store_id else f"v{catalog_version()}"
+    key = f"catalog-facets:{version}:{digest}"
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout=settings.FACET_CACHE_TIMEOUT)
+    return value
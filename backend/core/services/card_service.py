@@ -0,0 +1,71 @@
+# core/services/card_service.py
+from django.db.models import Prefetch
+
+from core.models import Product, ProductCard, ProductSize
+from core.services.image_service import image_variants
+
+CARD_FIELDS = [
+    "store", "name", "summary", "store_name", "store_category", "store_subcategory", "offer_category",
+    "main_image", "main_image_variants", "min_price", "max_price", "total_stock", "sizes", "sizes_in_stock", "created_at",
+]
+
+
+def _card(product):
+    sizes = list(product.sizes.all())
+    prices = [size.price for size in sizes]
+    return ProductCard(
+        product=product,
+        store_id=product.store_id,
+        name=product.name,
+        summary=(product.description or "")[:100],
+        store_name=product.store.store_name,
+        store_category=product.store_category.name if product.store_category else None,
+        store_subcategory=product.store_subcategory.name if product.store_subcategory else None,
+        offer_category=product.offer_category.title if product.offer_category else None,
+        main_image=product.main_image.url if product.main_image else "",
+        main_image_variants=image_variants(product.main_image),
+        min_price=min(prices, default=None),
+        max_price=max(prices, default=None),
+        total_stock=sum(size.quantity for size in sizes),
+        sizes=[
+            {"id": size.id, "size_label": size.size_label, "price": str(size.price), "quantity": size.quantity}
+            for size in sizes
+        ],
+        sizes_in_stock=[size.size_label for size in sizes if size.quantity > 0],
+        created_at=product.created_at,
+    )
+
+
+def refresh_cards(product_ids):
+    """
+    Rebuild the cards of these products (one read, one upsert). Call after
+    any write to a product, its sizes, its store name or its category /
+    offer labels; deleted products take their card with them.
+    """
+    products = (
+        Product.objects.filter(id__in=list(product_ids))
+        .select_related("store", "store_category", "store_subcategory", "offer_category")
+        .prefetch_related(Prefetch("sizes", queryset=ProductSize.objects.order_by("id")))
+    )
+    ProductCard.objects.bulk_create(
+        [_card(product) for product in products],
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=CARD_FIELDS + ["updated_at"],
+        batch_size=500,
+    )
+
+
+def rebuild_cards(batch_size=1000):
+    """Refresh every product's card. Returns the number of products processed."""
+    count = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Product.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return count
+        refresh_cards(ids)
+        count += len(ids)
+        last_id = ids[-1]
@@ -0,0 +1,80 @@
+# core/services/catalog_service.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Prefetch
+from django.utils import timezone
+
+from core.models import CatalogTombstone, Product, ProductImage, ProductSize
+
+# A delta re-reads this far behind the client's cursor, so a write that
+# committed just after the previous sync (with an earlier updated_at) is not
+# missed. Clients apply rows as upserts, so repeats are harmless.
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+def _ttl():
+    return timedelta(seconds=settings.CATALOG_TOMBSTONE_TTL)
+
+
+# -------------------------------
+# TOMBSTONES
+# -------------------------------
+def record_deletions(store, product_ids=(), size_ids=()):
+    """Call alongside deleting products / sizes so delta syncs can report them."""
+    CatalogTombstone.objects.bulk_create(
+        [CatalogTombstone(store=store, kind="product", object_id=pk) for pk in product_ids]
+        + [CatalogTombstone(store=store, kind="size", object_id=pk) for pk in size_ids]
+    )
+
+
+def purge_tombstones():
+    """Delete tombstones older than CATALOG_TOMBSTONE_TTL. Returns rows deleted."""
+    deleted, _ = CatalogTombstone.objects.filter(deleted_at__lt=timezone.now() - _ttl()).delete()
+    return deleted
+
+
+# -------------------------------
+# SYNC
+# -------------------------------
+def catalog_version(store):
+    """Time of the latest change to the store's catalog (None if it is empty)."""
+    stamps = (
+        Product.objects.filter(store=store).aggregate(t=Max("updated_at"))["t"],
+        ProductSize.objects.filter(product__store=store).aggregate(t=Max("updated_at"))["t"],
+        CatalogTombstone.objects.filter(store=store).aggregate(t=Max("deleted_at"))["t"],
+    )
+    stamps = [t for t in stamps if t]
+    return max(stamps) if stamps else None
+
+
+def catalog_changes(store, since=None):
+    """
+    Products, sizes and deleted ids changed after `since`. Without `since`,
+    or when it is older than the tombstones kept, everything is returned
+    with full=True and the client replaces its copy. `cursor` is the time
+    to send back on the next sync.
+    """
+    now = timezone.now()
+    full = since is None or since < now - _ttl()
+
+    products = (
+        Product.objects.filter(store=store)
+        .only("id", "name", "keywords", "main_image", "store_category_id", "store_subcategory_id",
+              "offer_category_id", "updated_at")
+        .prefetch_related(Prefetch("images", queryset=ProductImage.objects.order_by("id")))
+        .order_by("id")
+    )
+    sizes = ProductSize.objects.filter(product__store=store).order_by("id")
+    deleted = {"products": [], "sizes": []}
+
+    if not full:
+        after = since - SYNC_OVERLAP
+        products = products.filter(updated_at__gt=after)
+        sizes = sizes.filter(updated_at__gt=after)
+        for kind, object_id in CatalogTombstone.objects.filter(
+            store=store, deleted_at__gt=after
+        ).values_list("kind", "object_id"):
+            deleted["products" if kind == "product" else "sizes"].append(object_id)
+
+    return {"full": full, "cursor": now, "products": products, "sizes": sizes, "deleted": deleted}
@@ -0,0 +1,195 @@
+# core/services/credit_service.py
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from core.models import CreditEntry, StoreCustomer
+from core.services.customer_service import normalize_phone
+
+AGING_BUCKETS = (
+    ("0_30", 0, 30),
+    ("31_60", 31, 60),
+    ("60_plus", 61, None),
+)
+
+ZERO = Decimal("0.00")
+
+
+# -------------------------------
+# BALANCES (O(1) READS)
+# -------------------------------
+def outstanding_balance(store, phone):
+    """Materialized balance for (store, phone); one indexed lookup."""
+    phone = normalize_phone(phone)
+    if not phone:
+        return ZERO
+    balance = (
+        StoreCustomer.objects.filter(store=store, phone=phone)
+        .values_list("outstanding_credit", flat=True)
+        .first()
+    )
+    return balance if balance is not None else ZERO
+
+
+# -------------------------------
+# LEDGER WRITES
+# -------------------------------
+def issue_credits(sales, user=None):
+    """
+    Append one "issue" entry per credit sale. The balance itself moves with
+    record_customer_sale / record_customer_sales, which every sale path calls.
+    """
+    CreditEntry.objects.bulk_create([
+        CreditEntry(
+            store_id=sale.store_id,
+            phone=normalize_phone(sale.customer_phone),
+            customer_name=sale.customer_name or "",
+            kind="issue",
+            amount=Decimal(sale.credit_amount),
+            sale=sale,
+            created_by=user,
+            created_at=sale.created_at,
+        )
+        for sale in sales
+        if sale.is_credit and sale.credit_amount and normalize_phone(sale.customer_phone)
+    ])
+
+
+def _post(store, phone, kind, amount, user=None, sale=None, note="", name=""):
+    CreditEntry.objects.create(
+        store=store, phone=phone, customer_name=name, kind=kind, amount=amount,
+        sale=sale, note=note, created_by=user,
+    )
+    StoreCustomer.objects.filter(store=store, phone=phone).update(
+        outstanding_credit=F("outstanding_credit") + amount,
+        updated_at=timezone.now(),
+    )
+
+
+@transaction.atomic
+def settle_customer_credit(store, phone, amount, user=None, sale=None):
+    """
+    Pay down up to `amount` of the customer's balance: one locked balance
+    read, one ledger insert, one F() update. Returns the amount settled.
+    """
+    phone = normalize_phone(phone)
+    amount = Decimal(amount or 0)
+    if not phone or amount <= 0:
+        return ZERO
+
+    balance = (
+        StoreCustomer.objects.select_for_update()
+        .filter(store=store, phone=phone)
+        .values_list("outstanding_credit", flat=True)
+        .first()
+    )
+    settled = min(amount, balance or ZERO)
+    if settled <= 0:
+        return ZERO
+
+    _post(store, phone, "settle", -settled, user=user, sale=sale)
+    return settled
+
+
+@transaction.atomic
+def adjust_customer_credit(store, phone, amount, note="", user=None):
+    """
+    Correct a balance by a signed amount (write-offs, opening balances).
+    Raises ValueError if it would take the balance below zero. Returns the
+    new balance.
+    """
+    phone = normalize_phone(phone)
+    amount = Decimal(amount or 0)
+    if not phone:
+        raise ValueError("Phone is required.")
+    if not amount:
+        raise ValueError("Adjustment amount cannot be zero.")
+
+    customer, _ = StoreCustomer.objects.select_for_update().get_or_create(store=store, phone=phone)
+    balance = customer.outstanding_credit + amount
+    if balance < 0:
+        raise ValueError(f"Adjustment would leave a negative balance (outstanding ₹{customer.outstanding_credit}).")
+
+    _post(store, phone, "adjust", amount, user=user, note=note, name=customer.name)
+    return balance
+
+
+# -------------------------------
+# AGING
+# -------------------------------
+def _open_amount():
+    """
+    Part of each debit entry still unpaid. Payments are applied oldest debt
+    first, so the balance is made up of the newest debits: an entry is open
+    by whatever of the balance is left after every newer debit.
+    """
+    newer = (
+        CreditEntry.objects.filter(store=OuterRef("store"), phone=OuterRef("phone"), amount__gt=0)
+        .filter(Q(created_at__gt=OuterRef("created_at")) | Q(created_at=OuterRef("created_at"), id__gt=OuterRef("id")))
+        .order_by()
+        .values("phone")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    balance = StoreCustomer.objects.filter(store=OuterRef("store"), phone=OuterRef("phone")).values("outstanding_credit")
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    return Least(
+        F("amount"),
+        Greatest(
+            Coalesce(Subquery(balance, output_field=money), Value(ZERO), output_field=money)
+            - Coalesce(Subquery(newer, output_field=money), Value(ZERO), output_field=money),
+            Value(ZERO),
+            output_field=money,
+        ),
+        output_field=money,
+    )
+
+
+def _bucket_sums(now):
+    money = DecimalField(max_digits=14, decimal_places=2)
+    sums = {}
+    for name, low, high in AGING_BUCKETS:
+        in_bucket = Q()
+        if low:
+            in_bucket &= Q(created_at__lte=now - timedelta(days=low))
+        if high is not None:
+            in_bucket &= Q(created_at__gt=now - timedelta(days=high + 1))
+        sums[f"days_{name}"] = Coalesce(
+            Sum(Case(When(in_bucket, then=F("open_amount")), default=Value(ZERO), output_field=money)),
+            Value(ZERO),
+            output_field=money,
+        )
+    sums["outstanding"] = Coalesce(Sum("open_amount"), Value(ZERO), output_field=money)
+    return sums
+
+
+def credit_aging(store, now=None, after_phone=None):
+    """
+    Outstanding credit split by age (0-30 / 31-60 / 60+ days), aggregated
+    in SQL. Returns (totals, per_customer_queryset); the queryset yields one
+    dict per phone with a balance, ordered by phone and starting after
+    `after_phone`, so callers slice it for a page.
+    """
+    now = now or timezone.now()
+    debits = (
+        CreditEntry.objects.filter(store=store, amount__gt=0, phone__in=StoreCustomer.objects.filter(
+            store=store, outstanding_credit__gt=0
+        ).values("phone"))
+        .annotate(open_amount=_open_amount())
+    )
+    sums = _bucket_sums(now)
+    totals = debits.aggregate(**sums)
+    per_customer = (
+        debits.order_by()
+        .values("phone")
+        .annotate(name=Max("customer_name"), **sums)
+        .order_by("phone")
+    )
+    if after_phone:
+        per_customer = per_customer.filter(phone__gt=after_phone)
+    return totals, per_customer
@@ -0,0 +1,242 @@
+# core/services/customer_service.py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, CharField, DateTimeField, F, Sum, Value, When
+from django.db.models.functions import Greatest, Lower
+from django.utils import timezone
+
+from core.models import CreditEntry, Reservation, Return, Sale, StoreCustomer
+from core.phones import normalize_phone, normalize_phone_prefix, phone_prefix_q
+
+
+# -------------------------------
+# RUNNING TOTALS
+# -------------------------------
+def _touch(store_id, phone, name=None, when=None, **deltas):
+    """Create the (store, phone) row if needed and apply deltas in one UPDATE."""
+    phone = normalize_phone(phone)
+    if not phone:
+        return
+
+    row, _ = StoreCustomer.objects.get_or_create(
+        store_id=store_id,
+        phone=phone,
+        defaults={"name": name or "", "last_purchase": when or timezone.now()},
+    )
+
+    updates = {field: F(field) + value for field, value in deltas.items() if value}
+    if name:
+        updates["name"] = name
+    if when:
+        updates["last_purchase"] = Greatest(F("last_purchase"), Value(when, output_field=DateTimeField()))
+    if updates:
+        StoreCustomer.objects.filter(pk=row.pk).update(updated_at=timezone.now(), **updates)
+
+
+def record_customer_sale(sale):
+    """Call once per Sale, after credit fields are final (credit issued counts as outstanding)."""
+    _touch(
+        sale.store_id,
+        sale.customer_phone,
+        name=sale.customer_name,
+        when=sale.created_at,
+        pos_orders=1,
+        total_orders=1,
+        total_spent=Decimal(sale.total_amount or 0),
+        outstanding_credit=Decimal(sale.credit_amount or 0) if sale.is_credit else Decimal("0.00"),
+    )
+
+
+def record_customer_reservation(reservation):
+    """Call once when a reservation (and its advance) is created."""
+    customer = reservation.customer
+    _touch(
+        reservation.product.store_id,
+        reservation.customer_phone or customer.phone,
+        name=reservation.customer_name or customer.username,
+        when=reservation.created_at,
+        reservations=1,
+        total_orders=1,
+        total_spent=Decimal(reservation.advance_amount or 0),
+    )
+
+
+def record_customer_sales(sales):
+    """record_customer_sale for a batch: one update per distinct phone."""
+    totals = {}
+    for sale in sales:
+        phone = normalize_phone(sale.customer_phone)
+        if not phone:
+            continue
+        t = totals.setdefault((sale.store_id, phone), {
+            "name": None, "when": sale.created_at, "count": 0,
+            "spent": Decimal("0.00"), "credit": Decimal("0.00"),
+        })
+        t["count"] += 1
+        t["spent"] += Decimal(sale.total_amount or 0)
+        if sale.is_credit:
+            t["credit"] += Decimal(sale.credit_amount or 0)
+        if sale.created_at >= t["when"]:
+            t["when"] = sale.created_at
+            t["name"] = sale.customer_name or t["name"]
+
+    for (store_id, phone), t in totals.items():
+        _touch(
+            store_id, phone, name=t["name"], when=t["when"],
+            pos_orders=t["count"], total_orders=t["count"],
+            total_spent=t["spent"], outstanding_credit=t["credit"],
+        )
+
+
+def record_customer_return(sale, amount):
+    """Call once per return batch against `sale`; refunds come off total_spent."""
+    _touch(sale.store_id, sale.customer_phone, total_spent=-Decimal(amount or 0))
+
+
+# -------------------------------
+# TYPEAHEAD
+# -------------------------------
+TYPEAHEAD_FIELDS = ("phone", "name", "outstanding_credit", "last_purchase")
+
+
+def search_customers(store, query, limit=10):
+    """
+    Customers whose phone (digits typed) or name (anything else) starts with
+    `query`. Both are range scans on a (store, ...) index, so the cost is the
+    number of rows returned, not the size of the table.
+    """
+    query = (query or "").strip()
+    digits = normalize_phone_prefix(query)
+    qs = StoreCustomer.objects.filter(store=store)
+    if digits and not any(c.isalpha() for c in query):
+        qs = qs.filter(phone_prefix_q("phone", digits)).order_by("phone")
+    elif query:
+        # Same expression as the (store, Lower(name)) index, as a range
+        prefix = query.lower()
+        qs = (
+            qs.annotate(name_key=Lower("name"))
+            .filter(name_key__gte=prefix, name_key__lt=prefix + "\uffff")
+            .order_by("name_key", "phone")
+        )
+    else:
+        return []
+    return list(qs.values(*TYPEAHEAD_FIELDS)[:limit])
+
+
+# -------------------------------
+# FULL REBUILD
+# -------------------------------
+@transaction.atomic
+def rebuild_store_customers(store_ids=None, chunk_size=2000):
+    """
+    Recompute StoreCustomer from Sale / Reservation / Return / CreditEntry.
+    Returns the number of customer rows written.
+    """
+    sales = Sale.objects.order_by("created_at")
+    reservations = Reservation.objects.order_by("created_at")
+    returns = Return.objects.filter(sale__isnull=False).order_by()
+    credits = CreditEntry.objects.order_by()
+    if store_ids:
+        sales = sales.filter(store_id__in=store_ids)
+        reservations = reservations.filter(product__store_id__in=store_ids)
+        returns = returns.filter(store_id__in=store_ids)
+        credits = credits.filter(store_id__in=store_ids)
+
+    rows = defaultdict(lambda: {
+        "name": "",
+        "pos_orders": 0,
+        "reservations": 0,
+        "total_orders": 0,
+        "total_spent": Decimal("0.00"),
+        "outstanding_credit": Decimal("0.00"),
+        "last_purchase": None,
+    })
+
+    def add(store_id, phone, name, when, spent, pos=0, res=0):
+        phone = normalize_phone(phone)
+        if not phone:
+            return
+        row = rows[(store_id, phone)]
+        row["pos_orders"] += pos
+        row["reservations"] += res
+        row["total_orders"] += pos + res
+        row["total_spent"] += Decimal(spent or 0)
+        if row["last_purchase"] is None or when >= row["last_purchase"]:
+            row["last_purchase"] = when
+            row["name"] = name or row["name"]
+
+    for store_id, phone, name, total, created_at in sales.values_list(
+        "store_id", "customer_phone", "customer_name", "total_amount", "created_at"
+    ).iterator(chunk_size=chunk_size):
+        add(store_id, phone, name, created_at, total, pos=1)
+
+    for store_id, phone, user_phone, name, username, advance, created_at in reservations.values_list(
+        "product__store_id", "customer_phone", "customer__phone",
+        "customer_name", "customer__username", "advance_amount", "created_at",
+    ).iterator(chunk_size=chunk_size):
+        add(store_id, phone or user_phone, name or username, created_at, advance, res=1)
+
+    for r in returns.values("store_id", "sale__customer_phone").annotate(amount=Sum("amount")):
+        key = (r["store_id"], normalize_phone(r["sale__customer_phone"]))
+        if key in rows:
+            rows[key]["total_spent"] -= r["amount"] or 0
+
+    for r in credits.values("store_id", "phone").annotate(amount=Sum("amount")):
+        # Adjustments can open a balance for a phone that never bought anything
+        if r["amount"] or (r["store_id"], r["phone"]) in rows:
+            rows[(r["store_id"], r["phone"])]["outstanding_credit"] += r["amount"] or 0
+
+    existing = StoreCustomer.objects.all()
+    if store_ids:
+        existing = existing.filter(store_id__in=store_ids)
+
+    existing.delete()
+    StoreCustomer.objects.bulk_create(
+        [
+            StoreCustomer(store_id=store_id, phone=phone, **{**values, "last_purchase": values["last_purchase"] or timezone.now()})
+            for (store_id, phone), values in rows.items()
+        ],
+        batch_size=500,
+    )
+    return len(rows)
+
+
+# -------------------------------
+# PHONE BACKFILL
+# -------------------------------
+def _normalize_column(base, batch_size):
+    """Rewrite customer_phone to normalize_phone() for one model, one batch per UPDATE."""
+    base = base.exclude(customer_phone__isnull=True).exclude(customer_phone="").order_by("id")
+    model = base.model
+    changed = 0
+    last_id = 0
+    while True:
+        batch = list(base.filter(id__gt=last_id).values_list("id", "customer_phone")[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        fixes = {row_id: normalize_phone(phone) for row_id, phone in batch if normalize_phone(phone) != phone}
+        if fixes:
+            model.objects.filter(id__in=fixes).update(customer_phone=Case(
+                *[When(id=row_id, then=Value(phone)) for row_id, phone in fixes.items()],
+                output_field=CharField(),
+            ))
+            changed += len(fixes)
+    return changed
+
+
+def normalize_stored_phones(batch_size=1000, store_ids=None):
+    """
+    Bring Sale / Reservation phones written before normalization on save
+    into canonical form, walking each table in primary-key order.
+    Returns (sales_changed, reservations_changed).
+    """
+    sales = Sale.objects.all()
+    reservations = Reservation.objects.all()
+    if store_ids:
+        sales = sales.filter(store_id__in=store_ids)
+        reservations = reservations.filter(product__store_id__in=store_ids)
+    return _normalize_column(sales, batch_size), _normalize_column(reservations, batch_size)
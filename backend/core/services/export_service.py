@@ -0,0 +1,125 @@
+# core/services/export_service.py
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.services.analytics_service import filtered_querysets, filtered_returns
+from core.services.sale_line_service import _item_product_id, _item_size_label, _to_decimal, _to_int
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+
+# -------------------------------
+# ROW SOURCES
+# -------------------------------
+SALE_COLUMNS = (
+    "sale_id", "invoice_no", "created_at", "customer_name", "customer_phone",
+    "subtotal", "discount", "total_amount", "is_credit", "credit_amount", "reservation_id", "units",
+)
+SALE_LINE_COLUMNS = (
+    "sale_id", "invoice_no", "created_at", "customer_phone",
+    "product_id", "product", "size", "unit_price", "quantity", "line_total",
+)
+RESERVATION_COLUMNS = (
+    "reservation_id", "code", "created_at", "status", "customer", "customer_phone",
+    "product_id", "product", "size", "quantity", "advance_amount", "reserved_until",
+)
+RETURN_COLUMNS = (
+    "return_id", "invoice_no", "created_at", "product_id", "size", "quantity", "unit_price", "amount", "reason",
+)
+
+
+def _local(value, tz):
+    return value.astimezone(tz).isoformat() if value else None
+
+
+def sale_rows(store, filters, chunk_size):
+    sales_qs, _ = filtered_querysets(store, filters)
+    tz = store.tzinfo
+    for s in sales_qs.order_by("created_at", "id").values_list(
+        "id", "invoice_no", "created_at", "customer_name", "customer_phone", "subtotal",
+        "discount", "total_amount", "is_credit", "credit_amount", "reservation_id", "products",
+    ).iterator(chunk_size=chunk_size):
+        units = sum(_to_int(i.get("quantity", 0)) for i in s[11] or [] if isinstance(i, dict))
+        yield (*s[:2], _local(s[2], tz), *s[3:11], units)
+
+
+def sale_line_rows(store, filters, chunk_size):
+    """One row per Sale.products item (works for sales written before SaleLine existed)."""
+    sales_qs, _ = filtered_querysets(store, filters)
+    tz = store.tzinfo
+    for sale_id, invoice_no, created_at, phone, products in sales_qs.order_by("created_at", "id").values_list(
+        "id", "invoice_no", "created_at", "customer_phone", "products",
+    ).iterator(chunk_size=chunk_size):
+        created_at = _local(created_at, tz)
+        for item in products or []:
+            if not isinstance(item, dict):
+                continue
+            qty = _to_int(item.get("quantity", 0))
+            unit_price = _to_decimal(item.get("price") or item.get("unit_price"))
+            yield (
+                sale_id, invoice_no, created_at, phone,
+                _item_product_id(item), item.get("product") or item.get("name") or "",
+                _item_size_label(item), unit_price, qty,
+                unit_price * qty if unit_price is not None else None,
+            )
+
+
+def reservation_rows(store, filters, chunk_size):
+    _, reservations_qs = filtered_querysets(store, filters)
+    tz = store.tzinfo
+    for r in reservations_qs.order_by("created_at", "id").values_list(
+        "id", "unique_code", "created_at", "status", "customer__username", "customer__phone",
+        "product_id", "product__name", "size__size_label", "quantity", "advance_amount", "reserved_until",
+    ).iterator(chunk_size=chunk_size):
+        yield (*r[:2], _local(r[2], tz), *r[3:11], _local(r[11], tz))
+
+
+def return_rows(store, filters, chunk_size):
+    tz = store.tzinfo
+    for ret_id, invoice_no, created_at, item, quantity, amount, reason in filtered_returns(store, filters).order_by(
+        "created_at", "id"
+    ).values_list(
+        "id", "invoice_no", "created_at", "sale_item", "quantity", "amount", "reason",
+    ).iterator(chunk_size=chunk_size):
+        item = item or {}
+        yield (
+            ret_id, invoice_no, _local(created_at, tz),
+            _item_product_id(item), _item_size_label(item), quantity,
+            _to_decimal(item.get("unit_price") or item.get("price")), amount, reason,
+        )
+
+
+DATASETS = {
+    "sales": (SALE_COLUMNS, sale_rows),
+    "sale-lines": (SALE_LINE_COLUMNS, sale_line_rows),
+    "reservations": (RESERVATION_COLUMNS, reservation_rows),
+    "returns": (RETURN_COLUMNS, return_rows),
+}
+
+
+# -------------------------------
+# ENCODERS
+# -------------------------------
+class _Echo:
+    """csv.writer target that hands each formatted line straight back."""
+    def write(self, value):
+        return value
+
+
+def encode_rows(columns, rows, fmt):
+    """Yield the export one line at a time (header first for CSV)."""
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def export_stream(store, dataset, filters, fmt, chunk_size=2000):
+    columns, source = DATASETS[dataset]
+    return encode_rows(columns, source(store, filters, chunk_size), fmt)
@@ -0,0 +1,205 @@
+# core/services/facet_service.py
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from core.models import (
+    OfferCategory,
+    Product,
+    ProductAvailability,
+    ProductCard,
+    ProductSize,
+    StoreCategory,
+    StoreSubCategory,
+)
+from core.services.cache_service import bump_store_version, cached_facets
+
+# Price facet buckets: (from, up to) in rupees, upper bound exclusive. Rows
+# store the bucket index (price_band); run rebuild_product_availability
+# after changing the bounds.
+PRICE_RANGES = ((0, 500), (500, 1000), (1000, 2000), (2000, 5000), (5000, None))
+
+# Values listed per category / subcategory facet (most products first)
+FACET_LIMIT = 50
+
+
+def price_band(price):
+    """Index of the PRICE_RANGES bucket `price` falls in."""
+    return sum(1 for low, _ in PRICE_RANGES[1:] if price >= low)
+
+
+# -------------------------------
+# MAINTENANCE
+# -------------------------------
+def refresh_availability(product_ids):
+    """
+    Rewrite the availability rows of these products from their sizes and
+    invalidate their stores' cached facets. Call after creating / editing
+    products or sizes; deletes cascade on their own.
+    """
+    product_ids = list(product_ids)
+    rows = list(ProductSize.objects.filter(product_id__in=product_ids).values_list(
+        "id", "product_id", "product__store_id", "product__store_category_id",
+        "product__store_subcategory_id", "product__offer_category_id", "size_label", "price", "quantity",
+    ))
+    ProductAvailability.objects.filter(product_id__in=product_ids).delete()
+    ProductAvailability.objects.bulk_create(
+        [
+            ProductAvailability(
+                size_id=size_id,
+                product_id=product_id,
+                store_id=store_id,
+                store_category_id=category_id,
+                store_subcategory_id=subcategory_id,
+                offer_category_id=offer_id,
+                size_label=size_label,
+                price=price,
+                price_band=price_band(price),
+                in_stock=quantity > 0,
+            )
+            for size_id, product_id, store_id, category_id, subcategory_id, offer_id, size_label, price, quantity in rows
+        ],
+        batch_size=1000,
+    )
+    for store_id in {row[2] for row in rows}:
+        bump_store_version(store_id)
+
+
+def sync_stock_flags(size_ids):
+    """Refresh in_stock for sizes whose quantity changed (one UPDATE)."""
+    ProductAvailability.objects.filter(size_id__in=size_ids).update(
+        in_stock=Exists(ProductSize.objects.filter(pk=OuterRef("size_id"), quantity__gt=0))
+    )
+
+
+def rebuild_availability(batch_size=2000):
+    """Refresh every product's rows. Returns the number of products processed."""
+    count = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Product.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return count
+        refresh_availability(ids)
+        count += len(ids)
+        last_id = ids[-1]
+
+
+# -------------------------------
+# FILTERING
+# -------------------------------
+def _active_offers():
+    now = timezone.now()
+    return OfferCategory.objects.filter(start_date__lte=now, end_date__gte=now).values("id")
+
+
+def _conditions(filters):
+    """
+    One Q per selected facet. `filters` keys: store, categories,
+    subcategories, offers, sizes (lists of ids / labels), min_price,
+    max_price and in_stock; missing or empty keys do not filter.
+    """
+    conditions = {}
+    if filters.get("store"):
+        conditions["store"] = Q(store_id=filters["store"])
+    if filters.get("categories"):
+        conditions["categories"] = Q(store_category_id__in=filters["categories"])
+    if filters.get("subcategories"):
+        conditions["subcategories"] = Q(store_subcategory_id__in=filters["subcategories"])
+    if filters.get("offers"):
+        conditions["offers"] = Q(offer_category_id__in=filters["offers"]) & Q(offer_category_id__in=_active_offers())
+    if filters.get("min_price") is not None or filters.get("max_price") is not None:
+        price = Q()
+        if filters.get("min_price") is not None:
+            price &= Q(price__gte=filters["min_price"])
+        if filters.get("max_price") is not None:
+            price &= Q(price__lte=filters["max_price"])
+        conditions["price"] = price
+    if filters.get("sizes"):
+        conditions["sizes"] = Q(size_label__in=filters["sizes"], in_stock=True)
+    if filters.get("in_stock"):
+        conditions["in_stock"] = Q(in_stock=True)
+    return conditions
+
+
+def _rows(conditions, skip=None):
+    """
+    Availability rows meeting every condition but `skip`. A product matches
+    when one of its sizes does, so price, size and stock filters apply to
+    the same size.
+    """
+    rows = ProductAvailability.objects.all()
+    for name, condition in conditions.items():
+        if name != skip:
+            rows = rows.filter(condition)
+    return rows
+
+
+def matching_cards(filters):
+    """Cards of products with a size meeting `filters`. Products without sizes never match."""
+    return ProductCard.objects.filter(product_id__in=_rows(_conditions(filters)).values("product_id"))
+
+
+def facet_counts(filters):
+    """
+    Number of matching products per facet value. Each facet is counted with
+    every filter except its own applied, so the other values of a selected
+    facet still show how many products selecting them would add. One
+    aggregate query per facet, grouped on an index that includes product;
+    results are cached briefly (cached_facets).
+    """
+    return cached_facets(filters, lambda: _facet_counts(_conditions(filters)))
+
+
+def _per_value(rows, field):
+    return dict(
+        rows.values(field).annotate(count=Count("product", distinct=True)).order_by().values_list(field, "count")
+    )
+
+
+def _top(counts, limit=None):
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def _facet_counts(conditions):
+    categories = _top(_per_value(
+        _rows(conditions, "categories").exclude(store_category=None), "store_category_id"
+    ), FACET_LIMIT)
+    subcategories = _top(_per_value(
+        _rows(conditions, "subcategories").exclude(store_subcategory=None), "store_subcategory_id"
+    ), FACET_LIMIT)
+    offers = _top(_per_value(
+        _rows(conditions, "offers").filter(offer_category_id__in=_active_offers()), "offer_category_id"
+    ))
+    sizes = _top(_per_value(_rows(conditions, "sizes").filter(in_stock=True), "size_label"))
+    price_bands = _per_value(_rows(conditions, "price"), "price_band")
+    in_stock = _rows(conditions, "in_stock").filter(in_stock=True).aggregate(
+        count=Count("product", distinct=True)
+    )["count"]
+
+    # Names for the listed values only
+    category_names = StoreCategory.objects.only("name").in_bulk([pk for pk, _ in categories])
+    subcategory_names = StoreSubCategory.objects.only("name").in_bulk([pk for pk, _ in subcategories])
+    offer_titles = OfferCategory.objects.only("title").in_bulk([pk for pk, _ in offers])
+
+    return {
+        "categories": [
+            {"id": pk, "name": category_names[pk].name, "count": count}
+            for pk, count in categories if pk in category_names
+        ],
+        "subcategories": [
+            {"id": pk, "name": subcategory_names[pk].name, "count": count}
+            for pk, count in subcategories if pk in subcategory_names
+        ],
+        "offers": [
+            {"id": pk, "title": offer_titles[pk].title, "count": count}
+            for pk, count in offers if pk in offer_titles
+        ],
+        "sizes": [{"label": label, "count": count} for label, count in sizes],
+        "price_ranges": [
+            {"min": low, "max": high, "count": price_bands.get(i, 0)}
+            for i, (low, high) in enumerate(PRICE_RANGES)
+        ],
+        "in_stock": in_stock,
+    }
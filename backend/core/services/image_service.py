@@ -0,0 +1,177 @@
+# core/services/image_service.py
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from core.models import OfferCategory, Product, ProductImage, Store, StoreCategory, StoreSubCategory
+
+# Widths (px) served for every uploaded image; smaller originals are not upscaled
+IMAGE_WIDTHS = (160, 480, 1080)
+
+# Derivative formats with their Pillow encoder and options, in the order
+# clients should prefer them (WebP, then JPEG for older browsers)
+IMAGE_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Uploaded image fields that get derivatives
+IMAGE_FIELDS = (
+    (Product, "main_image"),
+    (ProductImage, "image"),
+    (Store, "logo"),
+    (Store, "cover_image"),
+    (StoreCategory, "dp_image"),
+    (StoreSubCategory, "dp_image"),
+    (OfferCategory, "banner_image"),
+)
+
+# Derivatives sit next to the original: products/main/a.jpg -> products/main/derived/a.jpg-480w.webp
+# (the full filename, so a.jpg and a.png never share derivatives)
+DERIVED_DIR = "derived"
+
+
+def derivative_name(name, width, fmt):
+    folder, filename = posixpath.split(name)
+    return posixpath.join(folder, DERIVED_DIR, f"{filename}-{width}w.{fmt}")
+
+
+def _marker(name):
+    # Written last by generate_derivatives, so it only exists once the whole set does
+    return derivative_name(name, min(IMAGE_WIDTHS), list(IMAGE_FORMATS)[-1])
+
+
+# -------------------------------
+# GENERATION
+# -------------------------------
+def _load(field_file):
+    largest = max(IMAGE_WIDTHS)
+    field_file.open("rb")
+    try:
+        with Image.open(field_file) as source:
+            # JPEGs decode straight at a reduced scale still covering the largest width
+            source.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(source)
+    finally:
+        field_file.close()
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+def _encode(image, fmt):
+    encoder, options = IMAGE_FORMATS[fmt]
+    if encoder == "JPEG" and image.mode == "RGBA":
+        flat = Image.new("RGB", image.size, "white")
+        flat.paste(image, mask=image.getchannel("A"))
+        image = flat
+    buffer = BytesIO()
+    image.save(buffer, encoder, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(field_file):
+    """
+    Write every IMAGE_WIDTHS x IMAGE_FORMATS derivative of this image,
+    replacing existing ones. Returns the bytes written, or None when the
+    file is missing or not a readable image.
+    """
+    try:
+        image = _load(field_file)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+    storage = field_file.storage
+    resized = {}
+    current = image
+    for width in sorted(IMAGE_WIDTHS, reverse=True):
+        if width < current.width:
+            height = max(1, round(current.height * width / current.width))
+            # Each width is scaled down from the previous (larger) one
+            current = current.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        resized[width] = current
+
+    written = 0
+    for fmt in IMAGE_FORMATS:
+        for width in sorted(IMAGE_WIDTHS, reverse=True):
+            name = derivative_name(field_file.name, width, fmt)
+            content = _encode(resized[width], fmt)
+            storage.delete(name)
+            storage.save(name, ContentFile(content))
+            written += len(content)
+    return written
+
+
+def derive_images(instance, *fields):
+    """
+    Generate derivatives for these image fields of a just-saved instance;
+    called from every upload path. Blank fields are skipped.
+    """
+    for field in fields:
+        field_file = getattr(instance, field)
+        if field_file:
+            generate_derivatives(field_file)
+
+
+# -------------------------------
+# URLS
+# -------------------------------
+def image_variants(field_file):
+    """
+    {"webp": {"160": url, "480": url, "1080": url}, "jpeg": {...}} for this
+    image, or None without one. URLs are built from the name only (no
+    storage access); derivatives are written on upload, and
+    generate_image_derivatives backfills files stored before that.
+    """
+    if not field_file:
+        return None
+    storage = field_file.storage
+    return {
+        fmt: {str(width): storage.url(derivative_name(field_file.name, width, fmt)) for width in IMAGE_WIDTHS}
+        for fmt in IMAGE_FORMATS
+    }
+
+
+def srcset(variants, absolute):
+    """`srcset` attribute values per format from image_variants() output."""
+    if not variants:
+        return None
+    return {
+        fmt: ", ".join(f"{absolute(url)} {width}w" for width, url in urls.items())
+        for fmt, urls in variants.items()
+    }
+
+
+def rebuild_derivatives(force=False, batch_size=500):
+    """
+    Generate derivatives for every stored image of IMAGE_FIELDS; with
+    force, existing ones are rewritten too. Returns (images processed,
+    bytes of the originals, {width: bytes of the WebP derivatives}).
+    """
+    count = original_bytes = 0
+    webp_bytes = dict.fromkeys(IMAGE_WIDTHS, 0)
+    for model, field in IMAGE_FIELDS:
+        last_id = 0
+        while True:
+            rows = list(
+                model.objects.filter(id__gt=last_id).exclude(**{f"{field}__isnull": True}).exclude(**{field: ""})
+                .order_by("id").only("id", field)[:batch_size]
+            )
+            if not rows:
+                break
+            for row in rows:
+                field_file = getattr(row, field)
+                storage = field_file.storage
+                if force or not storage.exists(_marker(field_file.name)):
+                    if generate_derivatives(field_file) is None:
+                        continue
+                try:
+                    original_bytes += storage.size(field_file.name)
+                    for width in IMAGE_WIDTHS:
+                        webp_bytes[width] += storage.size(derivative_name(field_file.name, width, "webp"))
+                except OSError:
+                    continue
+                count += 1
+            last_id = rows[-1].id
+    return count, original_bytes, webp_bytes
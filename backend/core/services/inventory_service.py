@@ -0,0 +1,148 @@
+# core/services/inventory_service.py
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import ProductSize, StockMovement
+from core.services.cache_service import bump_store_version
+from core.services.card_service import refresh_cards
+from core.services.facet_service import sync_stock_flags
+
+
+# Reasons that only ever take stock out; a positive delta under one of
+# them would restock while logging a sale
+OUTFLOW_REASONS = ("sale", "reservation_sale", "buy_now")
+
+
+class InsufficientStock(Exception):
+    def __init__(self, size):
+        super().__init__(f"Insufficient stock for {size.product.name} ({size.size_label}).")
+        self.size = size
+        self.message = str(self)
+
+
+def _movement(store, size, delta, reason, reference="", user=None):
+    return StockMovement(
+        store=store,
+        product_id=size.product_id,
+        size=size,
+        size_label=size.size_label,
+        delta=delta,
+        reason=reason,
+        reference=str(reference or "")[:64],
+        created_by=user,
+    )
+
+
+# -------------------------------
+# STOCK CHANGES
+# -------------------------------
+@transaction.atomic
+def move_stock(store, moves, reason, user=None):
+    """
+    Apply signed quantity changes to the store's sizes and log them.
+    `moves` is a list of (ProductSize, delta, reference). All changes are one
+    conditional UPDATE (a decrement only applies if the stock covers it) and
+    one bulk insert of StockMovement rows; the sizes' catalog in-stock
+    flags, product cards and the store's cached dashboards are refreshed. If any size is
+    short nothing is changed and InsufficientStock is raised for it.
+    Positive deltas are refused (ValueError) for OUTFLOW_REASONS.
+    """
+    if reason in OUTFLOW_REASONS and any(delta > 0 for _, delta, _ in moves):
+        raise ValueError(f"Stock can only be taken out for a {reason}.")
+
+    net = {}
+    sizes = {}
+    for size, delta, _ in moves:
+        net[size.id] = net.get(size.id, 0) + delta
+        sizes[size.id] = size
+    net = {size_id: delta for size_id, delta in net.items() if delta}
+
+    if net:
+        change = Case(
+            *[When(id=size_id, then=Value(delta)) for size_id, delta in net.items()],
+            output_field=IntegerField(),
+        )
+        needed = Case(
+            *[When(id=size_id, then=Value(max(-delta, 0))) for size_id, delta in net.items()],
+            output_field=IntegerField(),
+        )
+        updated = ProductSize.objects.filter(
+            id__in=net, product__store=store, quantity__gte=needed
+        ).update(quantity=F("quantity") + change, updated_at=timezone.now())
+
+        if updated != len(net):
+            current = dict(ProductSize.objects.filter(id__in=net, product__store=store).values_list("id", "quantity"))
+            for size_id, delta in net.items():
+                if size_id not in current:
+                    raise ValueError(f"Size {size_id} does not belong to this store.")
+                if current[size_id] + delta < 0:
+                    raise InsufficientStock(sizes[size_id])
+            raise InsufficientStock(next(iter(sizes.values())))
+
+        sync_stock_flags(net)
+        refresh_cards({sizes[size_id].product_id for size_id in net})
+
+    StockMovement.objects.bulk_create([
+        _movement(store, size, delta, reason, reference, user)
+        for size, delta, reference in moves
+        if delta
+    ])
+    bump_store_version(store.id)
+
+
+def log_movements(store, moves, reason, user=None):
+    """
+    Log quantity changes that were already written to the size rows (sizes
+    created with stock, edited in place or about to be deleted). Same
+    (ProductSize, delta, reference) triples as move_stock.
+    """
+    StockMovement.objects.bulk_create([
+        _movement(store, size, delta, reason, reference, user)
+        for size, delta, reference in moves
+        if delta
+    ])
+    bump_store_version(store.id)
+
+
+# -------------------------------
+# SKUS
+# -------------------------------
+def sku_conflicts(store, skus, exclude_product=None):
+    """
+    SKUs in `skus` that cannot be used for new sizes of the store: repeated
+    in the list itself or already on another size (sizes of
+    `exclude_product` are being edited, so they do not count).
+    Blank SKUs are auto-generated on save and never conflict.
+    """
+    skus = [str(sku).strip() for sku in skus if str(sku or "").strip()]
+    repeated = {sku for sku, n in Counter(skus).items() if n > 1}
+    taken = ProductSize.objects.filter(store=store, sku__in=set(skus))
+    if exclude_product is not None:
+        taken = taken.exclude(product=exclude_product)
+    return sorted(repeated | set(taken.values_list("sku", flat=True)))
+
+
+# -------------------------------
+# HISTORY / RECONCILIATION
+# -------------------------------
+def ledger_quantities(store):
+    """The store's sizes annotated with `ledger_quantity`, the sum of their movements."""
+    total = (
+        StockMovement.objects.filter(size=OuterRef("pk"))
+        .order_by()
+        .values("size")
+        .annotate(total=Sum("delta"))
+        .values("total")
+    )
+    return ProductSize.objects.filter(product__store=store).annotate(
+        ledger_quantity=Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+    )
+
+
+def stock_discrepancies(store):
+    """Sizes whose quantity does not match their movement history."""
+    return ledger_quantities(store).exclude(quantity=F("ledger_quantity"))
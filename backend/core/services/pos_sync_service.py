@@ -0,0 +1,293 @@
+# core/services/pos_sync_service.py
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import ProductSize, Sale, SaleLine, reserve_invoice_numbers
+from core.phones import normalize_phone
+from core.services.credit_service import issue_credits, settle_customer_credit
+from core.services.customer_service import record_customer_sales
+from core.services.inventory_service import move_stock
+from core.services.rollup_service import record_sales
+from core.services.sale_line_service import build_sale_lines
+
+SYNC_MAX_SALES = 500
+SYNC_CHUNK_SIZE = 50
+
+
+class _Rejected(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# -------------------------------
+# PAYLOAD PARSING
+# -------------------------------
+def _decimal(value):
+    try:
+        return Decimal(str(value or 0))
+    except (InvalidOperation, ValueError):
+        raise _Rejected("invalid", f"Invalid amount: {value!r}.")
+
+
+def _client_id(entry):
+    """The entry's client_id as stored (a string), or None without a usable one."""
+    value = entry.get("client_id") if isinstance(entry, dict) else None
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        return None
+    return str(value) or None
+
+
+def _parse(entry):
+    """Validate one queued sale; returns a plain dict or raises _Rejected."""
+    if not isinstance(entry, dict):
+        raise _Rejected("invalid", "Each sale must be an object.")
+    if entry.get("reservation_id"):
+        raise _Rejected("invalid", "Reservation sales cannot be synced offline.")
+
+    cart = entry.get("cart") or []
+    if not cart:
+        raise _Rejected("invalid", "Cart cannot be empty.")
+
+    lines = []
+    for item in cart:
+        try:
+            qty = int(item.get("quantity", 0))
+        except (TypeError, ValueError, AttributeError):
+            raise _Rejected("invalid", "Invalid cart line.")
+        if qty <= 0:
+            raise _Rejected("invalid", f"Invalid quantity: {item.get('quantity')!r}.")
+        product_id = item.get("id") or item.get("product_id")
+        size_label = (
+            item.get("size_label")
+            or (item.get("sizes", [{}])[0].get("size_label") if item.get("sizes") else None)
+        )
+        lines.append((product_id, size_label, qty))
+
+    created_at = None
+    if entry.get("created_at"):
+        created_at = parse_datetime(str(entry["created_at"]))
+        if created_at is None or timezone.is_naive(created_at):
+            raise _Rejected("invalid", "created_at must be an ISO timestamp with a UTC offset.")
+        created_at = min(created_at, timezone.now())
+
+    customer = entry.get("customer") or {}
+    payment = entry.get("payment") or {}
+    if not isinstance(customer, dict) or not isinstance(payment, dict):
+        raise _Rejected("invalid", "customer and payment must be objects.")
+    return {
+        "lines": lines,
+        "subtotal": _decimal(entry.get("subtotal")),
+        "discount": _decimal(entry.get("discount")),
+        "total": _decimal(entry.get("total")),
+        "customer_name": customer.get("name"),
+        # bulk_create skips Sale.save, so normalize here
+        "customer_phone": normalize_phone(customer.get("phone")) or None,
+        "payment": payment,
+        "credit": _decimal(payment.get("credit_amount")),
+        "settle": _decimal(payment.get("settle_credit_amount")),
+        "created_at": created_at,
+    }
+
+
+# -------------------------------
+# SYNC
+# -------------------------------
+def _sync_chunk(store, chunk, results):
+    """
+    Create the accepted sales of one chunk in a single transaction:
+    one locked size read, one conditional stock UPDATE, bulk inserts.
+    """
+    with transaction.atomic():
+        product_ids = {pid for _, sale in chunk for pid, _, _ in sale["lines"]}
+        sizes = {
+            (s.product_id, s.size_label): s
+            for s in ProductSize.objects.select_for_update(of=("self",))
+            .filter(product_id__in=product_ids, product__store=store)
+            .select_related("product")
+        }
+        available = {s.id: s.quantity for s in sizes.values()}
+
+        accepted = []
+        for index, sale in chunk:
+            needed = {}
+            try:
+                for product_id, size_label, qty in sale["lines"]:
+                    size = sizes.get((product_id, size_label))
+                    if size is None:
+                        raise _Rejected("invalid", f"Invalid size for product {product_id}.")
+                    needed[size.id] = needed.get(size.id, 0) + qty
+                for size_id, qty in needed.items():
+                    if available[size_id] < qty:
+                        size = next(s for s in sizes.values() if s.id == size_id)
+                        raise _Rejected(
+                            "insufficient_stock",
+                            f"Insufficient stock for {size.product.name} ({size.size_label}).",
+                        )
+            except _Rejected as e:
+                results[index].update(status=e.status, message=e.message)
+                continue
+
+            for size_id, qty in needed.items():
+                available[size_id] -= qty
+            accepted.append((index, sale))
+
+        if not accepted:
+            return
+
+        # Numbered on the store-local day each sale was rung up, in batch order
+        today = timezone.localdate(timezone=store.tzinfo)
+        days = [
+            timezone.localdate(sale["created_at"], timezone=store.tzinfo) if sale["created_at"] else today
+            for _, sale in accepted
+        ]
+        numbers = {day: iter(reserve_invoice_numbers(store, days.count(day), day=day)) for day in set(days)}
+        invoice_numbers = [next(numbers[day]) for day in days]
+        sales = Sale.objects.bulk_create([
+            Sale(
+                store=store,
+                client_id=results[index]["client_id"],
+                invoice_no=invoice_no,
+                products=[
+                    {
+                        "product_id": product_id,
+                        "product": sizes[(product_id, size_label)].product.name,
+                        "size": size_label or "",
+                        "price": str(sizes[(product_id, size_label)].price),
+                        "quantity": qty,
+                    }
+                    for product_id, size_label, qty in sale["lines"]
+                ],
+                subtotal=sale["subtotal"],
+                discount=sale["discount"],
+                total_amount=sale["total"],
+                customer_name=sale["customer_name"],
+                customer_phone=sale["customer_phone"],
+                payment=sale["payment"],
+                is_credit=sale["credit"] > 0,
+                credit_amount=sale["credit"] if sale["credit"] > 0 else Decimal("0.00"),
+            )
+            for (index, sale), invoice_no in zip(accepted, invoice_numbers)
+        ])
+
+        # Keep the time the sale happened offline (auto_now_add set "now")
+        offline_times = {
+            created.id: sale["created_at"]
+            for created, (_, sale) in zip(sales, accepted)
+            if sale["created_at"]
+        }
+        if offline_times:
+            Sale.objects.filter(id__in=offline_times).update(created_at=Case(
+                *[When(id=sale_id, then=Value(ts)) for sale_id, ts in offline_times.items()],
+                output_field=DateTimeField(),
+            ))
+            for created in sales:
+                created.created_at = offline_times.get(created.id, created.created_at)
+
+        # Sizes are locked and checked above, so this cannot come up short
+        move_stock(
+            store,
+            [
+                (sizes[(product_id, size_label)], -qty, created.invoice_no)
+                for created, (_, sale) in zip(sales, accepted)
+                for product_id, size_label, qty in sale["lines"]
+            ],
+            "sale",
+        )
+
+        products_by_id = {s.product_id: s.product for s in sizes.values()}
+        SaleLine.objects.bulk_create([
+            line for created in sales for line in build_sale_lines(created, products_by_id, sizes)
+        ])
+        issue_credits(sales)
+        record_sales(sales)
+        # Balances first, so a queued settlement can pay credit issued earlier in the batch
+        record_customer_sales(sales)
+
+        for created, (_, sale) in zip(sales, accepted):
+            if sale["settle"] > 0 and created.customer_phone:
+                settle_customer_credit(store, created.customer_phone, sale["settle"], sale=created)
+
+        for created, (index, _) in zip(sales, accepted):
+            results[index].update(status="created", sale_id=created.id, invoice_no=created.invoice_no)
+
+
+def _synced(store, client_ids):
+    """{client_id: (sale_id, invoice_no)} for ids the store already has."""
+    return {
+        client_id: (sale_id, invoice_no)
+        for client_id, sale_id, invoice_no in Sale.objects.filter(
+            store=store, client_id__in=client_ids
+        ).values_list("client_id", "id", "invoice_no")
+    }
+
+
+def _duplicate(results, index, synced):
+    sale_id, invoice_no = synced[results[index]["client_id"]]
+    results[index] = {
+        "client_id": results[index]["client_id"],
+        "status": "duplicate",
+        "sale_id": sale_id,
+        "invoice_no": invoice_no,
+    }
+
+
+def _sync_chunk_retrying(store, chunk, results):
+    """
+    _sync_chunk, tolerating a concurrent retry of the same queue: when it
+    synced some of these sales first, the chunk rolls back on the client_id
+    constraint, those come back as "duplicate" and the rest run again.
+    """
+    while chunk:
+        try:
+            _sync_chunk(store, chunk, results)
+            return
+        except IntegrityError:
+            synced = _synced(store, [results[index]["client_id"] for index, _ in chunk])
+            if not synced:
+                raise
+            for index, _ in chunk:
+                if results[index]["client_id"] in synced:
+                    _duplicate(results, index, synced)
+            chunk = [(index, sale) for index, sale in chunk if results[index]["client_id"] not in synced]
+
+
+def sync_sales(store, entries, chunk_size=SYNC_CHUNK_SIZE):
+    """
+    Create an ordered batch of queued POS sales. Each entry carries a
+    client-generated `client_id` (numbers are taken as their string form);
+    ids already synced come back as "duplicate". Returns one result per
+    entry, in order.
+    """
+    results = [{"client_id": _client_id(e)} for e in entries]
+    existing = _synced(store, [r["client_id"] for r in results if r["client_id"]])
+
+    pending = []
+    seen = set()
+    for index, entry in enumerate(entries):
+        client_id = results[index]["client_id"]
+        if not client_id or len(client_id) > 64:
+            results[index].update(status="invalid", message="client_id is required (max 64 characters).")
+            continue
+        if client_id in existing:
+            _duplicate(results, index, existing)
+            continue
+        if client_id in seen:
+            results[index].update(status="duplicate", message="Repeated in this batch.")
+            continue
+        seen.add(client_id)
+
+        try:
+            pending.append((index, _parse(entry)))
+        except _Rejected as e:
+            results[index].update(status=e.status, message=e.message)
+
+    for start in range(0, len(pending), chunk_size):
+        _sync_chunk_retrying(store, pending[start:start + chunk_size], results)
+
+    return results
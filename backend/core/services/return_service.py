@@ -0,0 +1,170 @@
+# core/services/return_service.py
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from core.models import ProductSize, Return, Sale, SaleLine
+from core.services.customer_service import record_customer_return
+from core.services.inventory_service import move_stock
+from core.services.rollup_service import record_returns
+from core.services.sale_line_service import _item_product_id, _item_size_label, _to_int
+
+MAX_RETURN_LINES = 200
+
+
+class ReturnRejected(Exception):
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.errors = errors or []
+
+
+# -------------------------------
+# MATCHING
+# -------------------------------
+def _allocate(sale_lines, requested):
+    """
+    Spread each requested line over the sale's lines. A request names a
+    `sale_line_id`, or a product id + size label that may match several
+    lines of the invoice. Returns {sale_line_id: qty} or raises ReturnRejected
+    listing every line that cannot be returned.
+    """
+    returnable = {line.id: line.quantity - line.returned_quantity for line in sale_lines}
+    allocation = {}
+    errors = []
+
+    for index, item in enumerate(requested):
+        if not isinstance(item, dict):
+            errors.append({"line": index, "message": "Each line must be an object."})
+            continue
+        qty = _to_int(item.get("quantity"))
+        if qty <= 0:
+            errors.append({"line": index, "message": "Quantity must be a positive integer."})
+            continue
+
+        if item.get("sale_line_id"):
+            candidates = [line for line in sale_lines if line.id == _to_int(item["sale_line_id"])]
+        else:
+            product_id = _item_product_id(item)
+            size_label = _item_size_label(item)
+            candidates = [
+                line for line in sale_lines
+                if line.product_id == product_id and line.size_label == size_label
+            ]
+        if not candidates:
+            errors.append({"line": index, "message": "Item is not on this invoice."})
+            continue
+
+        left = qty
+        for line in candidates:
+            take = min(left, returnable[line.id])
+            if take > 0:
+                returnable[line.id] -= take
+                allocation[line.id] = allocation.get(line.id, 0) + take
+                left -= take
+        if left:
+            errors.append({
+                "line": index,
+                "message": f"Only {qty - left} of {qty} × {candidates[0].product_name} "
+                           f"({candidates[0].size_label}) can still be returned.",
+            })
+
+    if errors:
+        raise ReturnRejected("Some lines cannot be returned.", errors=errors)
+    return allocation
+
+
+def _restock_sizes(store, lines):
+    """
+    The size each sale line's stock goes back to: the line's own size, or,
+    when that row was deleted since the sale, the product's current size
+    with the same label. Lines with neither are left out.
+    """
+    sizes = {line.id: line.size for line in lines if line.size_id}
+    missing = [line for line in lines if not line.size_id and line.product_id]
+    if missing:
+        current = {
+            (size.product_id, size.size_label): size
+            for size in ProductSize.objects.filter(
+                product__store=store, product_id__in={line.product_id for line in missing}
+            ).select_related("product")
+        }
+        for line in missing:
+            size = current.get((line.product_id, line.size_label))
+            if size is not None:
+                sizes[line.id] = size
+    return sizes
+
+
+# -------------------------------
+# PROCESS
+# -------------------------------
+@transaction.atomic
+def process_invoice_return(store, invoice_no, lines, reason="", user=None):
+    """
+    Return several lines of one invoice in a single transaction: one sale
+    read, one line read, one guarded UPDATE on SaleLine.returned_quantity,
+    one restock (move_stock) and one bulk insert, whatever the number of lines.
+    Returns (sale, [Return], [Return]) where the last list holds the returns
+    whose product or size no longer exists, so nothing was restocked.
+    """
+    if not invoice_no:
+        raise ReturnRejected("Invoice number is required.")
+    if not lines or not isinstance(lines, list):
+        raise ReturnRejected("At least one line is required.")
+    if len(lines) > MAX_RETURN_LINES:
+        raise ReturnRejected(f"At most {MAX_RETURN_LINES} lines per return.")
+
+    sale = Sale.objects.select_related("store").filter(store=store, invoice_no=invoice_no).first()
+    if sale is None:
+        raise ReturnRejected("Invoice not found.", status=404)
+
+    sale_lines = list(SaleLine.objects.filter(sale=sale).select_related("size").order_by("id"))
+    allocation = _allocate(sale_lines, lines)
+    by_id = {line.id: line for line in sale_lines}
+
+    # Guarded so two counters returning the same invoice cannot over-return
+    wanted = Case(
+        *[When(id=line_id, then=Value(qty)) for line_id, qty in allocation.items()],
+        output_field=IntegerField(),
+    )
+    updated = SaleLine.objects.filter(
+        id__in=allocation, quantity__gte=F("returned_quantity") + wanted
+    ).update(returned_quantity=F("returned_quantity") + wanted)
+    if updated != len(allocation):
+        raise ReturnRejected("This invoice was returned concurrently; reload it and try again.", status=409)
+
+    restock = _restock_sizes(store, [by_id[line_id] for line_id in allocation])
+    move_stock(
+        store,
+        [(restock[line_id], qty, sale.invoice_no) for line_id, qty in allocation.items() if line_id in restock],
+        "return",
+        user=user,
+    )
+
+    returns = Return.objects.bulk_create([
+        Return(
+            store=store,
+            sale=sale,
+            sale_line=by_id[line_id],
+            sale_item={
+                "product_id": by_id[line_id].product_id,
+                "product": by_id[line_id].product_name,
+                "size_label": by_id[line_id].size_label,
+                "quantity": qty,
+                "unit_price": str(by_id[line_id].unit_price),
+            },
+            quantity=qty,
+            amount=by_id[line_id].unit_price * qty,
+            reason=reason,
+            invoice_no=sale.invoice_no,
+            processed_by=user,
+        )
+        for line_id, qty in allocation.items()
+    ])
+
+    record_returns(returns)
+    record_customer_return(sale, sum((ret.amount for ret in returns), Decimal("0.00")))
+    return sale, returns, [ret for ret in returns if ret.sale_line_id not in restock]
@@ -0,0 +1,210 @@
+# core/services/rollup_service.py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import DailySalesRollup, Reservation, Return, Sale, Store
+from core.services.cache_service import bump_store_version
+
+
+# -------------------------------
+# HELPERS
+# -------------------------------
+def _units(products):
+    """Total quantity in a Sale.products JSON list."""
+    total = 0
+    for item in products or []:
+        try:
+            total += int(item.get("quantity", 0) or 0)
+        except (TypeError, ValueError, AttributeError):
+            continue
+    return total
+
+
+def _bump(store_id, day, **deltas):
+    """
+    Add deltas to the (store, day) rollup row with a single UPDATE.
+    Every dashboard-visible write passes through here, so it also
+    invalidates the store's cached dashboard responses.
+    """
+    bump_store_version(store_id)
+
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+
+    row, _ = DailySalesRollup.objects.get_or_create(store_id=store_id, date=day)
+    DailySalesRollup.objects.filter(pk=row.pk).update(
+        updated_at=timezone.now(),
+        **{field: F(field) + value for field, value in deltas.items()},
+    )
+
+
+# -------------------------------
+# WRITE PATH HOOKS
+# -------------------------------
+def record_sale(sale):
+    """Call once per Sale, after payment / credit fields are final."""
+    _bump(
+        sale.store_id,
+        timezone.localdate(sale.created_at, sale.store.tzinfo),
+        pos_revenue=Decimal(sale.total_amount or 0),
+        pos_orders=1,
+        units_sold=_units(sale.products),
+        discount=Decimal(sale.discount or 0),
+        credit_issued=Decimal(sale.credit_amount or 0) if sale.is_credit else Decimal("0.00"),
+    )
+
+
+def record_sales(sales):
+    """record_sale for a batch: one rollup update per (store, day)."""
+    days = defaultdict(lambda: defaultdict(lambda: 0))
+    for sale in sales:
+        d = days[(sale.store_id, timezone.localdate(sale.created_at, sale.store.tzinfo))]
+        d["pos_revenue"] += Decimal(sale.total_amount or 0)
+        d["pos_orders"] += 1
+        d["units_sold"] += _units(sale.products)
+        d["discount"] += Decimal(sale.discount or 0)
+        if sale.is_credit:
+            d["credit_issued"] += Decimal(sale.credit_amount or 0)
+
+    for (store_id, day), deltas in days.items():
+        _bump(store_id, day, **deltas)
+
+
+def record_reservation(reservation):
+    """Call once when a reservation (and its advance) is created."""
+    _bump(
+        reservation.product.store_id,
+        timezone.localdate(reservation.created_at, reservation.product.store.tzinfo),
+        reservation_revenue=Decimal(reservation.advance_amount or 0),
+        reservation_orders=1,
+    )
+
+
+def complete_reservation(reservation):
+    """
+    Mark a reservation completed and count the conversion against the day
+    it was created. No-op for the rollup if it was already completed.
+    """
+    if reservation.status == "completed":
+        return
+
+    reservation.status = "completed"
+    reservation.save()
+
+    _bump(
+        reservation.product.store_id,
+        timezone.localdate(reservation.created_at, reservation.product.store.tzinfo),
+        reservations_completed=1,
+    )
+
+
+def record_return(ret):
+    """Call once per Return row."""
+    record_returns([ret])
+
+
+def record_returns(returns):
+    """Call once per batch of Return rows: one rollup update per (store, day)."""
+    days = defaultdict(lambda: defaultdict(lambda: 0))
+    for ret in returns:
+        d = days[(ret.store_id, timezone.localdate(ret.created_at, ret.store.tzinfo))]
+        d["returns_amount"] += Decimal(ret.amount or 0)
+        d["units_returned"] += ret.quantity
+
+    for (store_id, day), deltas in days.items():
+        _bump(store_id, day, **deltas)
+
+
+# -------------------------------
+# FULL REBUILD
+# -------------------------------
+@transaction.atomic
+def rebuild_rollups(store_ids=None, chunk_size=2000):
+    """
+    Recompute DailySalesRollup from Sale / Reservation / Return.
+    Returns the number of rollup rows written.
+    """
+    stores = Store.objects.all()
+    if store_ids:
+        stores = stores.filter(id__in=store_ids)
+
+    # Days are store-local, so aggregate one timezone group at a time
+    tz_groups = defaultdict(list)
+    for store in stores.only("id", "time_zone"):
+        tz_groups[store.tzinfo].append(store.id)
+
+    rows = defaultdict(lambda: defaultdict(lambda: 0))
+
+    for tz, ids in tz_groups.items():
+        sales = Sale.objects.filter(store_id__in=ids).order_by()
+        reservations = Reservation.objects.filter(product__store_id__in=ids).order_by()
+        returns = Return.objects.filter(store_id__in=ids).order_by()
+
+        for r in (
+            sales.annotate(day=TruncDate("created_at", tzinfo=tz))
+            .values("store_id", "day")
+            .annotate(
+                revenue=Sum("total_amount"),
+                orders=Count("id"),
+                discount=Sum("discount"),
+                credit=Sum("credit_amount", filter=Q(is_credit=True)),
+            )
+        ):
+            row = rows[(r["store_id"], r["day"])]
+            row["pos_revenue"] = r["revenue"] or 0
+            row["pos_orders"] = r["orders"]
+            row["discount"] = r["discount"] or 0
+            row["credit_issued"] = r["credit"] or 0
+
+        # Units live inside the JSON blob, so stream just that column
+        for store_id, created_at, products in (
+            sales.values_list("store_id", "created_at", "products").iterator(chunk_size=chunk_size)
+        ):
+            rows[(store_id, timezone.localdate(created_at, tz))]["units_sold"] += _units(products)
+
+        for r in (
+            reservations.annotate(day=TruncDate("created_at", tzinfo=tz))
+            .values("product__store_id", "day")
+            .annotate(
+                revenue=Sum("advance_amount"),
+                orders=Count("id"),
+                completed=Count("id", filter=Q(status="completed")),
+            )
+        ):
+            row = rows[(r["product__store_id"], r["day"])]
+            row["reservation_revenue"] = r["revenue"] or 0
+            row["reservation_orders"] = r["orders"]
+            row["reservations_completed"] = r["completed"]
+
+        for r in (
+            returns.annotate(day=TruncDate("created_at", tzinfo=tz))
+            .values("store_id", "day")
+            .annotate(amount=Sum("amount"), units=Sum("quantity"))
+        ):
+            row = rows[(r["store_id"], r["day"])]
+            row["returns_amount"] = r["amount"] or 0
+            row["units_returned"] = r["units"] or 0
+
+    existing = DailySalesRollup.objects.all()
+    if store_ids:
+        existing = existing.filter(store_id__in=store_ids)
+
+    existing.delete()
+    for ids in tz_groups.values():
+        for store_id in ids:
+            bump_store_version(store_id)
+
+    DailySalesRollup.objects.bulk_create(
+        [
+            DailySalesRollup(store_id=store_id, date=day, **values)
+            for (store_id, day), values in rows.items()
+        ],
+        batch_size=500,
+    )
+    return len(rows)
@@ -0,0 +1,184 @@
+# core/services/sale_line_service.py
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.models import Product, ProductSize, Return, Sale, SaleLine
+
+
+# -------------------------------
+# HELPERS
+# -------------------------------
+def _to_int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_decimal(value):
+    try:
+        return Decimal(str(value)) if value not in (None, "") else None
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _item_product_id(item):
+    return _to_int(item.get("product_id") or item.get("id"), default=None)
+
+
+def _item_size_label(item):
+    return (
+        item.get("size_label")
+        or item.get("size")
+        or (item.get("sizes", [{}])[0].get("size_label") if item.get("sizes") else None)
+        or ""
+    )
+
+
+def build_sale_lines(sale, products_by_id, sizes_by_key, products_by_name=None):
+    """
+    Turn Sale.products JSON into unsaved SaleLine objects using rows that the
+    caller already loaded:
+      products_by_id   {product_id: Product}
+      sizes_by_key     {(product_id, size_label): ProductSize}
+      products_by_name {(store_id, name): Product}  (legacy items without ids)
+    """
+    lines = []
+    for item in sale.products or []:
+        if not isinstance(item, dict):
+            continue
+
+        product_id = _item_product_id(item)
+        product = products_by_id.get(product_id)
+        if product is None and products_by_name and item.get("product"):
+            product = products_by_name.get((sale.store_id, item["product"]))
+
+        size_label = _item_size_label(item)
+        size = sizes_by_key.get((product.id, size_label)) if product else None
+
+        qty = _to_int(item.get("quantity", 0))
+        unit_price = _to_decimal(item.get("price") or item.get("unit_price"))
+        if unit_price is None:
+            unit_price = size.price if size else Decimal("0.00")
+
+        lines.append(SaleLine(
+            sale=sale,
+            store_id=sale.store_id,
+            product=product,
+            size=size,
+            product_name=(item.get("product") or (product.name if product else "Unknown Product"))[:150],
+            size_label=size_label[:20],
+            unit_price=unit_price,
+            quantity=qty,
+            line_total=unit_price * qty,
+        ))
+    return lines
+
+
+def write_sale_lines(sale, products_by_id=None, sizes_by_key=None):
+    """Create SaleLine rows for a freshly created sale."""
+    if products_by_id is None or sizes_by_key is None:
+        product_ids = {_item_product_id(i) for i in sale.products or [] if isinstance(i, dict)}
+        product_ids.discard(None)
+        products_by_id = Product.objects.in_bulk(product_ids)
+        sizes_by_key = {
+            (s.product_id, s.size_label): s
+            for s in ProductSize.objects.filter(product_id__in=product_ids)
+        }
+
+    return SaleLine.objects.bulk_create(build_sale_lines(sale, products_by_id, sizes_by_key))
+
+
+# -------------------------------
+# BACKFILL
+# -------------------------------
+def _count_existing_returns(sales, lines):
+    """
+    Link returns recorded against these sales before they had lines (by
+    sale or invoice number) and count them in returned_quantity, capped at
+    what the line sold, like 0034_invoice_returns.
+    """
+    by_id = {sale.id: sale for sale in sales}
+    by_invoice = {(sale.store_id, sale.invoice_no): sale for sale in sales if sale.invoice_no}
+    by_item = {}
+    for line in lines:
+        by_item.setdefault((line.sale_id, line.product_id, line.size_label), line)
+
+    returns = Return.objects.filter(sale_line__isnull=True).filter(
+        Q(sale_id__in=by_id)
+        | Q(store_id__in={store_id for store_id, _ in by_invoice}, invoice_no__in={no for _, no in by_invoice})
+    )
+    linked, counted = [], {}
+    for ret in returns:
+        sale = by_id.get(ret.sale_id) or by_invoice.get((ret.store_id, ret.invoice_no))
+        if sale is None:
+            continue
+        item = ret.sale_item if isinstance(ret.sale_item, dict) else {}
+        line = by_item.get((sale.id, _item_product_id(item), _item_size_label(item)))
+        ret.sale_id = sale.id
+        if line:
+            ret.sale_line = line
+            line.returned_quantity = min(line.quantity, line.returned_quantity + ret.quantity)
+            counted[line.id] = line
+        linked.append(ret)
+
+    Return.objects.bulk_update(linked, ["sale", "sale_line"], batch_size=500)
+    SaleLine.objects.bulk_update(counted.values(), ["returned_quantity"], batch_size=500)
+
+
+def backfill_sale_lines(batch_size=1000, store_ids=None):
+    """
+    Parse Sale.products for sales that have no SaleLine rows yet, walking the
+    table in primary-key order one batch at a time, and count returns already
+    made against them. Returns lines created.
+    """
+    base = Sale.objects.filter(lines__isnull=True).order_by("id")
+    if store_ids:
+        base = base.filter(store_id__in=store_ids)
+
+    created = 0
+    last_id = 0
+    while True:
+        batch = list(base.filter(id__gt=last_id).only("id", "store_id", "invoice_no", "products")[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        product_ids = set()
+        names = set()
+        for sale in batch:
+            for item in sale.products or []:
+                if not isinstance(item, dict):
+                    continue
+                pid = _item_product_id(item)
+                if pid:
+                    product_ids.add(pid)
+                elif item.get("product"):
+                    names.add(item["product"])
+
+        products_by_id = Product.objects.in_bulk(product_ids)
+        products_by_name = {
+            (p.store_id, p.name): p
+            for p in Product.objects.filter(
+                store_id__in={s.store_id for s in batch}, name__in=names
+            )
+        } if names else {}
+
+        all_ids = set(products_by_id) | {p.id for p in products_by_name.values()}
+        sizes_by_key = {
+            (s.product_id, s.size_label): s
+            for s in ProductSize.objects.filter(product_id__in=all_ids)
+        }
+
+        lines = []
+        for sale in batch:
+            lines.extend(build_sale_lines(sale, products_by_id, sizes_by_key, products_by_name))
+
+        with transaction.atomic():
+            SaleLine.objects.bulk_create(lines, batch_size=500)
+            _count_existing_returns(batch, lines)
+        created += len(lines)
+
+    return created
@@ -0,0 +1,165 @@
+# core/services/search_service.py
+import re
+
+from django.db import connection
+
+from core.models import Product
+
+# Full-text index over products, kept in a side table next to core_product:
+#   SQLite:   FTS5 virtual table, rowid = product id, ranked with bm25()
+#   Postgres: (product_id, tsvector) table with a GIN index, ts_rank_cd()
+# The write paths that change indexed text call index_products /
+# unindex_products; rebuild_search_index recreates it from scratch.
+SEARCH_TABLE = "core_product_search"
+
+MAX_QUERY_TERMS = 8
+
+# Only the newest SEARCH_WINDOW matches are ranked, which bounds the cost of
+# broad queries ("shirt" on a large catalog); results stop after that many.
+SEARCH_WINDOW = 500
+
+# bm25() column weights, in FTS5 column order
+FTS_COLUMNS = ("name", "keywords", "description", "category", "store_name")
+FTS_WEIGHTS = (10.0, 5.0, 1.0, 3.0, 2.0)
+
+SQLITE_CREATE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    f"{', '.join(FTS_COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')",
+)
+POSTGRES_CREATE = (
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+    "product_id bigint PRIMARY KEY REFERENCES core_product (id) ON DELETE CASCADE, "
+    "document tsvector NOT NULL)",
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING gin (document)",
+)
+# name A, keywords B, categories / store C, description D
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B') || "
+    "setweight(to_tsvector('simple', %s), 'D') || setweight(to_tsvector('simple', %s), 'C') || "
+    "setweight(to_tsvector('simple', %s), 'C')"
+)
+
+
+def _is_postgres():
+    return connection.vendor == "postgresql"
+
+
+def query_terms(text):
+    """Lowercased word tokens of a search box value (at most MAX_QUERY_TERMS)."""
+    return re.findall(r"\w+", (text or "").lower())[:MAX_QUERY_TERMS]
+
+
+# -------------------------------
+# INDEX MAINTENANCE
+# -------------------------------
+def _documents(product_ids):
+    rows = Product.objects.filter(id__in=product_ids).values_list(
+        "id", "name", "keywords", "description",
+        "store_category__name", "store_subcategory__name", "store__store_name",
+    )
+    for pk, name, keywords, description, category, subcategory, store_name in rows:
+        yield (
+            pk,
+            name or "",
+            (keywords or "").replace(",", " "),
+            description or "",
+            " ".join(filter(None, (category, subcategory))),
+            store_name or "",
+        )
+
+
+def unindex_products(product_ids):
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    column = "product_id" if _is_postgres() else "rowid"
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {column} IN ({placeholders})", product_ids)
+
+
+def index_products(product_ids, batch_size=500):
+    """(Re)index these products; ids that no longer exist are dropped from the index."""
+    product_ids = list(product_ids)
+    for start in range(0, len(product_ids), batch_size):
+        chunk = product_ids[start:start + batch_size]
+        documents = list(_documents(chunk))
+        with connection.cursor() as cursor:
+            if _is_postgres():
+                unindex_products(set(chunk) - {doc[0] for doc in documents})
+                cursor.executemany(
+                    f"INSERT INTO {SEARCH_TABLE} (product_id, document) VALUES (%s, {POSTGRES_DOCUMENT}) "
+                    "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                    documents,
+                )
+            else:
+                unindex_products(chunk)
+                cursor.executemany(
+                    f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s, %s)",
+                    documents,
+                )
+
+
+def rebuild_search_index(batch_size=2000):
+    """Drop and refill the whole index. Returns the number of products indexed."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+        for statement in POSTGRES_CREATE if _is_postgres() else SQLITE_CREATE:
+            cursor.execute(statement)
+
+    count = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Product.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        index_products(ids, batch_size=batch_size)
+        count += len(ids)
+        last_id = ids[-1]
+
+    if not _is_postgres():
+        # Merge the segments written batch by batch into one b-tree
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return count
+
+
+# -------------------------------
+# SEARCH
+# -------------------------------
+def search_product_ids(text, limit=20, offset=0):
+    """
+    Ids of products matching every term of `text`, best match first: name
+    above keywords above category / store name above description. The last
+    term is the one being typed and also matches as a prefix ("red shi"
+    finds "Red shirt"); earlier terms match whole words.
+    """
+    terms = query_terms(text)
+    if not terms or offset >= SEARCH_WINDOW:
+        return []
+    limit = min(limit, SEARCH_WINDOW - offset)
+    *words, typed = terms
+
+    with connection.cursor() as cursor:
+        if _is_postgres():
+            tsquery = " & ".join([*words, f"{typed}:*"])
+            cursor.execute(
+                "SELECT product_id FROM ("
+                f"SELECT product_id, ts_rank_cd(document, query) AS score FROM {SEARCH_TABLE}, "
+                "to_tsquery('simple', %s) query WHERE document @@ query ORDER BY product_id DESC LIMIT %s"
+                ") window_ ORDER BY score DESC, product_id DESC LIMIT %s OFFSET %s",
+                [tsquery, SEARCH_WINDOW, limit, offset],
+            )
+        else:
+            match = " ".join([*(f'"{word}"' for word in words), f'"{typed}"*'])
+            weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+            cursor.execute(
+                "SELECT rowid FROM ("
+                f"SELECT rowid, bm25({SEARCH_TABLE}, {weights}) AS score FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s"
+                ") ORDER BY score, rowid DESC LIMIT %s OFFSET %s",
+                [match, SEARCH_WINDOW, limit, offset],
+            )
+        return [row[0] for row in cursor.fetchall()]
@@ -1,3 +1,1103 @@
-from django.test import TestCase
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+import io
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from core.idempotency import purge_expired_keys
+from core.models import (
+    CreditEntry,
+    DailySalesRollup,
+    IdempotencyKey,
+    InvoiceSequence,
+    OfferCategory,
+    Product,
+    ProductCard,
+    ProductSize,
+    Reservation,
+    Return,
+    Sale,
+    SaleLine,
+    Store,
+    StoreCategory,
+    StoreCustomer,
+    reserve_invoice_numbers,
+)
+from core.services.card_service import rebuild_cards
+from core.services.facet_service import refresh_availability
+from core.services.image_service import derivative_name
+from core.services.inventory_service import move_stock
+from core.services import pos_sync_service
+from core.services.rollup_service import rebuild_rollups
+from core.services.sale_line_service import backfill_sale_lines
+from core.services.search_service import index_products
+
+User = get_user_model()
+
+_codes = itertools.count(100000)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class StoreTestCase(TestCase):
+    """A store owner with an authenticated API client, plus small factories."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="x", phone="9000000001", is_store=True)
+        self.store = Store.objects.create(
+            owner=self.owner, store_name="Store", place="Kochi", phone="9000000001", category="clothing"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def make_product(self, name="Shirt", sizes=(("M", "100.00", 10), ("L", "120.00", 5))):
+        product = Product.objects.create(store=self.store, name=name)
+        for label, price, quantity in sizes:
+            ProductSize.objects.create(product=product, size_label=label, price=Decimal(price), quantity=quantity)
+        return product
+
+    def make_customer(self, n):
+        return User.objects.create_user(username=f"customer{n}", password="x", phone=f"8{n:09d}")
+
+    def reserve(self, customer, size, quantity=1):
+        return Reservation.objects.create(
+            unique_code=str(next(_codes)),
+            customer=customer,
+            product=size.product,
+            size=size,
+            store=self.store,
+            quantity=quantity,
+            advance_amount=Decimal("50.00"),
+            reserved_until=timezone.now() + timedelta(days=1),
+        )
+
+    def count_queries(self, method, url, data=None, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data, **kwargs)
+        return response, len(ctx.captured_queries)
+
+
+# ======================================================
+# 📊 DASHBOARD
+# ======================================================
+class SalesSummaryQueryTests(StoreTestCase):
+    def summary_queries(self):
+        cache.clear()
+        response, queries = self.count_queries("get", "/api/pos/sales-dashboard/")
+        self.assertEqual(response.status_code, 200)
+        return queries
+
+    def test_reservation_sections_do_not_query_per_reservation(self):
+        size = self.make_product().sizes.first()
+        empty = self.summary_queries()
+
+        for n in range(20):
+            self.reserve(self.make_customer(n), size)
+        self.assertEqual(self.summary_queries(), empty)
+
+
+class RollupDayTests(StoreTestCase):
+    def rollups(self):
+        return list(DailySalesRollup.objects.filter(store=self.store).values_list("date", "pos_orders", "units_sold"))
+
+    def test_sales_near_midnight_utc_count_on_the_store_local_day(self):
+        product = self.make_product()
+        utc_day = (timezone.now() - timedelta(days=2)).date()
+        # (zone, UTC hour rung up, local day relative to the UTC day)
+        for zone, hour, shift in (("Asia/Kolkata", 20, 1), ("America/New_York", 2, -1)):
+            with self.subTest(zone=zone):
+                self.store.time_zone = zone
+                self.store.save()
+                rung_up = datetime(utc_day.year, utc_day.month, utc_day.day, hour, 30, tzinfo=UTC)
+                response = self.client.post("/api/pos/sync-sales/", {"sales": [{
+                    "client_id": zone,
+                    "cart": [{"id": product.id, "size_label": "M", "quantity": 2}],
+                    "total": 200,
+                    "created_at": rung_up.isoformat(),
+                }]}, format="json")
+                self.assertEqual(response.data["results"][0]["status"], "created")
+
+                expected = [(utc_day + timedelta(days=shift), 1, 2)]
+                self.assertEqual(self.rollups(), expected)
+                rebuild_rollups(store_ids=[self.store.id])
+                self.assertEqual(self.rollups(), expected)
+
+                self.store.sales.all().delete()
+                DailySalesRollup.objects.all().delete()
+
+
+class InventorySummaryTests(StoreTestCase):
+    def test_rows_carry_what_the_store_dashboard_shows(self):
+        self.make_product("Shirt", (("M", "100.00", 3), ("L", "120.00", 0)))
+        self.make_product("Shoe", (("40", "900.00", 0),))
+        rebuild_cards()
+
+        response = self.client.get("/api/pos/inventory-summary/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.data["summary"][key] for key in ("total_products", "total_units", "out_of_stock", "low_stock")},
+            {"total_products": 2, "total_units": 3, "out_of_stock": 1, "low_stock": 1},
+        )
+        shirt = next(row for row in response.data["results"] if row["name"] == "Shirt")
+        self.assertEqual((shirt["stock_left"], shirt["top_size"], shirt["price"]), (3, "M", Decimal("100.00")))
+        self.assertEqual([(s["size_label"], s["quantity"]) for s in shirt["sizes"]], [("M", 3), ("L", 0)])
+
+        searched = self.client.get("/api/pos/inventory-summary/", {"search": "sho"})
+        self.assertEqual([row["name"] for row in searched.data["results"]], ["Shoe"])
+        self.assertEqual(searched.data["summary"]["total_products"], 2)
+
+
+class CacheInvalidationTests(StoreTestCase):
+    def sell(self, product, size_label, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/pos/create-sale/", {
+                "cart": [{"id": product.id, "size_label": size_label, "quantity": quantity}],
+                "subtotal": 1,
+                "discount": 0,
+                "total": 1,
+                "customer": {"name": "A", "phone": "9847012345"},
+                "payment": {"paid_amount": 1, "credit_amount": 0},
+            }, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_sale_invalidates_cached_dashboard(self):
+        product = self.make_product(sizes=(("M", "100.00", 1), ("L", "120.00", 5)))
+        first = self.client.get("/api/pos/inventory-summary/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/api/pos/inventory-summary/")["X-Cache"], "HIT")
+
+        self.sell(product, "M", 1)
+        after = self.client.get("/api/pos/inventory-summary/")
+        self.assertEqual(after["X-Cache"], "MISS")
+        self.assertEqual(after.data["summary"]["total_units"], first.data["summary"]["total_units"] - 1)
+
+    def test_stock_and_size_changes_invalidate_cached_facets(self):
+        product = self.make_product(sizes=(("M", "100.00", 1), ("L", "120.00", 5)))
+        refresh_availability([product.id])
+
+        def sizes(**params):
+            response = self.client.get("/api/products/browse/", params)
+            return {facet["label"]: facet["count"] for facet in response.data["facets"]["sizes"]}
+
+        for params in ({}, {"store": self.store.id}):
+            with self.subTest(params=params):
+                self.assertEqual(sizes(**params), {"M": 1, "L": 1})
+
+        self.sell(product, "M", 1)
+        for params in ({}, {"store": self.store.id}):
+            with self.subTest(params=params):
+                self.assertEqual(sizes(**params), {"L": 1})
+
+        size = product.sizes.get(size_label="M")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/product-sizes/{size.id}/", {"quantity": 3}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(sizes(store=self.store.id), {"M": 1, "L": 1})
+
+
+# ======================================================
+# 🛒 CHECKOUT
+# ======================================================
+class CreateSaleTests(StoreTestCase):
+    def checkout(self, cart):
+        payload = {
+            "cart": cart,
+            "subtotal": 1,
+            "discount": 0,
+            "total": 1,
+            "customer": {"name": "A", "phone": "9847012345"},
+            "payment": {"paid_amount": 1, "credit_amount": 0},
+        }
+        return self.count_queries("post", "/api/pos/create-sale/", payload, format="json")
+
+    def test_query_count_does_not_grow_with_the_cart(self):
+        products = [self.make_product(f"P{i}", (("M", "10.00", 100),)) for i in range(50)]
+        self.checkout([{"id": products[0].id, "size_label": "M", "quantity": 1}])  # first sale of the day seeds counters
+
+        counts = []
+        for n in (1, 50):
+            response, queries = self.checkout(
+                [{"id": product.id, "size_label": "M", "quantity": 2} for product in products[:n]]
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+            counts.append(queries)
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(ProductSize.objects.get(product=products[49]).quantity, 98)
+
+    def test_non_positive_quantity_is_rejected(self):
+        product = self.make_product()
+        for quantity in (-2, 0, "x"):
+            response, _ = self.checkout([
+                {"id": product.id, "size_label": "M", "quantity": 1},
+                {"id": product.id, "size_label": "L", "quantity": quantity},
+            ])
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(ProductSize.objects.get(product=product, size_label="M").quantity, 10)
+        self.assertFalse(self.store.sales.exists())
+
+
+class ReservationSaleTests(StoreTestCase):
+    def test_non_positive_quantity_is_rejected(self):
+        product = self.make_product()
+        size = product.sizes.get(size_label="M")
+        reservation = self.reserve(self.make_customer(1), size)
+
+        for quantity in (-2, 0, "x"):
+            response = self.client.post("/api/create_reservation_sale/", {
+                "reservation_id": reservation.id,
+                "cart": [{"product_id": product.id, "size_label": "M", "quantity": quantity}],
+                "total": 100,
+            }, format="json")
+            self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(ProductSize.objects.get(pk=size.pk).quantity, 10)
+        self.assertFalse(self.store.stock_movements.exists())
+        self.assertFalse(self.store.sales.exists())
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, "reserved")
+
+    def test_sale_reasons_cannot_add_stock(self):
+        size = self.make_product().sizes.get(size_label="M")
+        for reason in ("sale", "reservation_sale"):
+            with self.assertRaises(ValueError):
+                move_stock(self.store, [(size, 2, "INV-1")], reason)
+        self.assertEqual(ProductSize.objects.get(pk=size.pk).quantity, 10)
+
+
+class SyncSalesTests(StoreTestCase):
+    def sync(self, sales):
+        response = self.client.post("/api/pos/sync-sales/", {"sales": sales}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data["results"]
+
+    def sale(self, client_id, product, quantity, **extra):
+        return {
+            "client_id": client_id,
+            "cart": [{"id": product.id, "size_label": "M", "quantity": quantity}],
+            "total": 100,
+            **extra,
+        }
+
+    def test_bad_quantity_rejects_only_its_sale(self):
+        product = self.make_product()
+        sales = [self.sale("ok", product, 1), self.sale("negative", product, -2), self.sale("zero", product, 0)]
+
+        results = self.sync(sales)
+        self.assertEqual([r["status"] for r in results], ["created", "invalid", "invalid"])
+        self.assertEqual(ProductSize.objects.get(product=product, size_label="M").quantity, 9)
+
+        # The terminal resends the same queue: the queue drains
+        self.assertEqual([r["status"] for r in self.sync(sales)], ["duplicate", "invalid", "invalid"])
+
+    def test_numeric_client_id_is_recognized_on_resend(self):
+        product = self.make_product()
+        self.assertEqual(self.sync([self.sale(41, product, 1)])[0]["status"], "created")
+        self.assertEqual([r["status"] for r in self.sync([self.sale(41, product, 1)])], ["duplicate"])
+        self.assertEqual(self.store.sales.get().client_id, "41")
+
+    def test_non_object_customer_or_payment_is_invalid(self):
+        product = self.make_product()
+        results = self.sync([
+            self.sale("c", product, 1, customer="9847012345"),
+            self.sale("p", product, 1, payment=[100]),
+            self.sale("ok", product, 1),
+        ])
+        self.assertEqual([r["status"] for r in results], ["invalid", "invalid", "created"])
+
+    def test_concurrent_resend_reports_duplicates_instead_of_failing(self):
+        product = self.make_product()
+        self.sync([self.sale("a", product, 1)])
+
+        # The resend checked for duplicates before the first request committed
+        real = pos_sync_service._synced
+        lookups = []
+
+        def stale_first(store, client_ids):
+            lookups.append(client_ids)
+            return {} if len(lookups) == 1 else real(store, client_ids)
+
+        with mock.patch.object(pos_sync_service, "_synced", side_effect=stale_first):
+            results = self.sync([self.sale("a", product, 1), self.sale("b", product, 1)])
+
+        self.assertEqual([r["status"] for r in results], ["duplicate", "created"])
+        self.assertEqual(results[0]["sale_id"], self.store.sales.get(client_id="a").id)
+        self.assertEqual(self.store.sales.count(), 2)
+        self.assertEqual(ProductSize.objects.get(product=product, size_label="M").quantity, 8)
+
+    def test_invoice_number_uses_the_offline_day(self):
+        product = self.make_product()
+        rung_up = timezone.now() - timedelta(days=3)
+        results = self.sync([
+            self.sale("old", product, 1, created_at=rung_up.isoformat()),
+            self.sale("new", product, 1),
+        ])
+        old_day = timezone.localdate(rung_up, timezone=self.store.tzinfo).strftime("%Y%m%d")
+        today = timezone.localdate(timezone=self.store.tzinfo).strftime("%Y%m%d")
+        self.assertEqual(results[0]["invoice_no"], f"INV-{old_day}-001")
+        self.assertEqual(results[1]["invoice_no"], f"INV-{today}-001")
+
+
+class IdempotencyKeyTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product()
+
+    def checkout(self, key, quantity=1):
+        return self.client.post("/api/pos/create-sale/", {
+            "cart": [{"id": self.product.id, "size_label": "M", "quantity": quantity}],
+            "subtotal": 100,
+            "discount": 0,
+            "total": 100,
+            "payment": {"paid_amount": 100, "credit_amount": 0},
+        }, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def stock(self):
+        return ProductSize.objects.get(product=self.product, size_label="M").quantity
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.checkout("k1")
+        self.assertEqual(first.status_code, 201)
+
+        retry = self.checkout("k1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(self.store.sales.count(), 1)
+        self.assertEqual(self.stock(), 9)
+
+    def test_same_key_with_another_body_is_refused(self):
+        self.checkout("k1")
+        response = self.checkout("k1", quantity=2)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.store.sales.count(), 1)
+
+    def test_request_still_running_is_refused(self):
+        self.checkout("k1")
+        IdempotencyKey.objects.filter(key="k1").update(status_code=None, response_body=None)
+        response = self.checkout("k1")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.store.sales.count(), 1)
+
+    def test_rejected_request_can_be_retried_with_the_same_key(self):
+        self.assertEqual(self.checkout("k1", quantity=50).status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.filter(key="k1").exists())
+
+        ProductSize.objects.filter(product=self.product, size_label="M").update(quantity=60)
+        self.assertEqual(self.checkout("k1", quantity=50).status_code, 201)
+        self.assertEqual(self.stock(), 10)
+
+    def test_expired_keys_are_purged(self):
+        self.checkout("old")
+        self.checkout("new")
+        IdempotencyKey.objects.filter(key="old").update(
+            created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL + 1)
+        )
+        self.assertEqual(purge_expired_keys(), 1)
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
+
+
+# ======================================================
+# 👤 CUSTOMERS
+# ======================================================
+class CustomerPhoneTests(StoreTestCase):
+    def test_phone_spellings_are_one_customer(self):
+        product = self.make_product()
+        for phone in ("+91 98470-12345", "098470 12345"):
+            response = self.client.post("/api/pos/create-sale/", {
+                "cart": [{"id": product.id, "size_label": "M", "quantity": 1}],
+                "total": 100,
+                "customer": {"name": "Anu", "phone": phone},
+                "payment": {},
+            }, format="json")
+            self.assertEqual(response.status_code, 201, response.data)
+        reservation = self.reserve(self.make_customer(1), product.sizes.first())
+        reservation.customer_phone = "+91-98470 12345"
+        reservation.save()
+
+        self.assertEqual(set(self.store.sales.values_list("customer_phone", flat=True)), {"9847012345"})
+        self.assertEqual(Reservation.objects.get(pk=reservation.pk).customer_phone, "9847012345")
+        customer = StoreCustomer.objects.get(store=self.store)
+        self.assertEqual((customer.phone, customer.pos_orders), ("9847012345", 2))
+
+        response = self.client.get("/api/pos/get-customer-info/", {"phone": "919847012345"})
+        self.assertEqual(response.data["data"]["name"], "Anu")
+
+    def test_typeahead_matches_phone_and_name_prefixes(self):
+        for phone, name in (
+            ("9847012345", "Anu"), ("9847099999", "anand"), ("9123456789", "Joan"), ("9198765432", "Binu"),
+        ):
+            StoreCustomer.objects.create(store=self.store, phone=phone, name=name)
+
+        def search(q, **params):
+            response = self.client.get("/api/pos/customers/search/", {"q": q, **params})
+            self.assertEqual(response.status_code, 200)
+            return [row["phone"] for row in response.data["results"]]
+
+        self.assertEqual(search("+91 9847"), ["9847012345", "9847099999"])
+        self.assertEqual(search("09847 0"), ["9847012345", "9847099999"])
+        self.assertEqual(search("98470 1"), ["9847012345"])
+        # A bare 91 is the start of a local number, not the country code
+        self.assertEqual(search("91"), ["9123456789", "9198765432"])
+        self.assertEqual(search("AN"), ["9847099999", "9847012345"])
+        self.assertEqual(search("an", limit=1), ["9847099999"])
+        self.assertEqual(search("oan"), [])
+        self.assertEqual(search(""), [])
+
+
+# ======================================================
+# 💳 CUSTOMER CREDIT
+# ======================================================
+class CreditLedgerTests(StoreTestCase):
+    phone = "9847012345"
+
+    def credit_sale(self, credit):
+        product = self.make_product(f"P{credit}", (("M", "1000.00", 5),))
+        response = self.client.post("/api/pos/create-sale/", {
+            "cart": [{"id": product.id, "size_label": "M", "quantity": 1}],
+            "subtotal": 1000,
+            "discount": 0,
+            "total": 1000,
+            "customer": {"name": "Anu", "phone": "+91 98470 12345"},
+            "payment": {"paid_amount": 1000 - credit, "credit_amount": credit},
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response
+
+    def settle(self, amount):
+        return self.client.post("/api/settle-credit/", {"phone": self.phone, "amount": amount}, format="json")
+
+    def ledger(self):
+        response = self.client.get("/api/pos/credit-ledger/", {"phone": "098470 12345"})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_credit_sale_and_settlement_post_to_the_ledger(self):
+        self.credit_sale(300)
+        ledger = self.ledger()
+        self.assertEqual(ledger["outstanding_credit"], "300.00")
+        self.assertEqual([(e["kind"], Decimal(e["amount"])) for e in ledger["results"]], [("issue", 300)])
+
+        response = self.settle(100)
+        self.assertEqual((Decimal(response.data["settled_amount"]), Decimal(response.data["remaining_credit"])), (100, 200))
+
+        # Never settles more than is owed
+        response = self.settle(500)
+        self.assertEqual((Decimal(response.data["settled_amount"]), Decimal(response.data["remaining_credit"])), (200, 0))
+
+        self.assertEqual(self.settle(50).status_code, 400)
+        ledger = self.ledger()
+        self.assertEqual(ledger["outstanding_credit"], "0.00")
+        self.assertEqual(sorted(Decimal(e["amount"]) for e in ledger["results"]), [-200, -100, 300])
+        self.assertEqual(StoreCustomer.objects.get(store=self.store, phone=self.phone).outstanding_credit, 0)
+
+    def test_aging_buckets_count_payments_against_the_oldest_debt(self):
+        for credit in (100, 200, 300):
+            self.credit_sale(credit)
+        for days, credit in ((90, 100), (45, 200), (10, 300)):
+            CreditEntry.objects.filter(amount=credit).update(created_at=timezone.now() - timedelta(days=days))
+        self.settle(150)
+
+        response = self.client.get("/api/pos/credit-aging/")
+        self.assertEqual(response.status_code, 200)
+        expected = {"days_0_30": "300.00", "days_31_60": "150.00", "days_60_plus": "0.00", "outstanding": "450.00"}
+        self.assertEqual(response.data["totals"], expected)
+        [customer] = response.data["results"]
+        self.assertEqual(customer["phone"], self.phone)
+        self.assertEqual({key: customer[key] for key in expected}, expected)
+
+
+# ======================================================
+# ↩️ RETURNS AFTER PRODUCT EDITS
+# ======================================================
+class ProductEditReturnTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product()
+        response = self.client.post("/api/pos/create-sale/", {
+            "cart": [
+                {"id": self.product.id, "size_label": "M", "quantity": 2},
+                {"id": self.product.id, "size_label": "L", "quantity": 1},
+            ],
+            "total": 320,
+            "customer": {"phone": "9847012345"},
+            "payment": {},
+        }, format="json")
+        self.invoice_no = response.data["data"]["invoice_no"]
+
+    def edit_sizes(self, sizes):
+        response = self.client.put(
+            f"/api/products/{self.product.id}/",
+            {"name": self.product.name, "sizes": json.dumps(sizes)},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def return_line(self, size_label, quantity=1):
+        return self.client.post("/api/pos/returns/", {
+            "invoice_no": self.invoice_no,
+            "lines": [{"product_id": self.product.id, "size_label": size_label, "quantity": quantity}],
+        }, format="json")
+
+    def quantity(self, size_label):
+        return ProductSize.objects.get(product=self.product, size_label=size_label).quantity
+
+    def test_edit_keeps_size_rows(self):
+        sizes = {s.size_label: s for s in self.product.sizes.all()}
+        reservation = self.reserve(self.make_customer(1), sizes["L"])
+        self.edit_sizes([
+            {"id": sizes["M"].id, "size_label": "M", "price": "110.00", "quantity": 8, "sku": sizes["M"].sku},
+            {"id": sizes["L"].id, "size_label": "L", "price": "120.00", "quantity": 4, "sku": sizes["L"].sku},
+        ])
+        self.assertEqual(
+            set(self.product.sizes.values_list("id", "sku")),
+            {(sizes["M"].id, sizes["M"].sku), (sizes["L"].id, sizes["L"].sku)},
+        )
+        self.assertTrue(Reservation.objects.filter(pk=reservation.pk).exists())
+        self.assertEqual(SaleLine.objects.filter(size__isnull=True).count(), 0)
+
+        response = self.return_line("M", 2)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["data"]["not_restocked"], [])
+        self.assertEqual(self.quantity("M"), 10)
+
+    def test_return_restocks_a_re_added_size_by_label(self):
+        # L is dropped and added back: a new row, the sale line lost its size
+        m = self.product.sizes.get(size_label="M")
+        self.edit_sizes([{"id": m.id, "size_label": "M", "price": "100.00", "quantity": 8}])
+        self.edit_sizes([
+            {"id": m.id, "size_label": "M", "price": "100.00", "quantity": 8},
+            {"size_label": "L", "price": "120.00", "quantity": 0},
+        ])
+        self.assertEqual(SaleLine.objects.filter(size__isnull=True).count(), 1)
+
+        response = self.return_line("L")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["data"]["not_restocked"], [])
+        self.assertEqual(self.quantity("L"), 1)
+
+    def test_return_reports_lines_it_cannot_restock(self):
+        m = self.product.sizes.get(size_label="M")
+        self.edit_sizes([{"id": m.id, "size_label": "M", "price": "100.00", "quantity": 8}])
+
+        response = self.return_line("L")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            [(line["size_label"], line["quantity"]) for line in response.data["data"]["not_restocked"]],
+            [("L", 1)],
+        )
+        self.assertIn("not restocked", response.data["message"])
+
+
+class ReturnBackfillTests(StoreTestCase):
+    def test_backfill_counts_returns_made_before_sale_lines(self):
+        product = self.make_product()
+        sale = Sale.objects.create(
+            store=self.store,
+            invoice_no="INV-20250101-001",
+            products=[{"product_id": product.id, "product": "Shirt", "size": "M", "price": "100.00", "quantity": 3}],
+            total_amount=Decimal("300.00"),
+        )
+        old_return = Return.objects.create(
+            store=self.store,
+            invoice_no=sale.invoice_no,
+            sale_item={"product_id": product.id, "size_label": "M", "quantity": 2, "unit_price": "100.00"},
+            quantity=2,
+            amount=Decimal("200.00"),
+        )
+
+        backfill_sale_lines()
+        line = sale.lines.get()
+        self.assertEqual(line.returned_quantity, 2)
+        old_return.refresh_from_db()
+        self.assertEqual((old_return.sale_id, old_return.sale_line_id), (sale.id, line.id))
+
+        def return_m(quantity):
+            return self.client.post("/api/pos/returns/", {
+                "invoice_no": sale.invoice_no,
+                "lines": [{"product_id": product.id, "size_label": "M", "quantity": quantity}],
+            }, format="json")
+
+        self.assertEqual(return_m(3).status_code, 400)
+        self.assertEqual(ProductSize.objects.get(product=product, size_label="M").quantity, 10)
+        self.assertEqual(return_m(1).status_code, 201)
+        self.assertEqual(ProductSize.objects.get(product=product, size_label="M").quantity, 11)
+
+
+# ======================================================
+# 📏 SIZE ENDPOINTS
+# ======================================================
+class ProductSizeAccessTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        other = User.objects.create_user(username="other", password="x", phone="9000000002", is_store=True)
+        Store.objects.create(owner=other, store_name="Other", place="-", phone="9000000002", category="clothing")
+        self.other = APIClient()
+        self.other.force_authenticate(other)
+        self.product = self.make_product()
+        self.size = self.product.sizes.get(size_label="M")
+
+    def test_other_store_cannot_touch_sizes(self):
+        url = f"/api/product-sizes/{self.size.id}/"
+        self.assertEqual(self.other.patch(url, {"quantity": 0}).status_code, 404)
+        self.assertEqual(self.other.delete(url).status_code, 404)
+        self.assertEqual(
+            self.other.post("/api/product-sizes/", {"product": self.product.id, "size_label": "XL",
+                                                    "price": "1.00", "quantity": 5}).status_code,
+            403,
+        )
+        self.assertEqual(self.product.sizes.count(), 2)
+        self.assertEqual(ProductSize.objects.get(pk=self.size.pk).quantity, 10)
+        self.assertFalse(self.store.stock_movements.exclude(reason="initial").exists())
+
+    def test_owner_edits_sizes(self):
+        response = self.client.patch(f"/api/product-sizes/{self.size.id}/", {"quantity": 4})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post("/api/product-sizes/", {"product": self.product.id, "size_label": "XL",
+                                                            "price": "1.00", "quantity": 5})
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.product.sizes.count(), 3)
+
+    def test_duplicate_sku_is_rejected(self):
+        other_size = self.make_product("Pants").sizes.get(size_label="L")
+        response = self.client.post("/api/product-sizes/", {"product": self.product.id, "size_label": "XL",
+                                                            "price": "1.00", "quantity": 5, "sku": self.size.sku})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("sku", response.data)
+        response = self.client.patch(f"/api/product-sizes/{other_size.id}/", {"sku": self.size.sku})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.product.sizes.count(), 2)
+
+        # Another store's SKUs do not count
+        response = self.other.post("/api/products/", {
+            "name": "Theirs", "sizes": json.dumps([{"size_label": "M", "price": "1", "quantity": 1}]),
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        response = self.other.post("/api/product-sizes/", {"product": response.data["id"], "size_label": "XL",
+                                                           "price": "1.00", "quantity": 5, "sku": self.size.sku})
+        self.assertEqual(response.status_code, 201, response.data)
+
+
+# ======================================================
+# 🛍 PUBLIC PRODUCT LIST
+# ======================================================
+class PublicProductListTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(30):
+            self.make_product(f"P{i}")
+        rebuild_cards()
+        self.anon = APIClient()
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        counts = set()
+        for page_size in (1, 10, 30):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.anon.get("/api/products/all/", {"page_size": page_size})
+            self.assertEqual(len(response.data["results"]), page_size)
+            counts.add(len(ctx.captured_queries))
+        self.assertEqual(counts, {1})
+
+    def test_cursor_pages_have_no_gaps_or_duplicates_on_tied_timestamps(self):
+        ProductCard.objects.update(created_at=timezone.now())
+
+        ids = []
+        url = "/api/products/all/?page_size=7"
+        while url:
+            response = self.anon.get(url)
+            ids += [card["id"] for card in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(ids, sorted(Product.objects.values_list("id", flat=True), reverse=True))
+
+
+class ProductResponseShapeTests(StoreTestCase):
+    """Endpoints that kept the full product shape after listings moved to cards."""
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product(sizes=(("M", "100.00", 10), ("L", "120.00", 5)))
+        self.description = "Hand-woven cotton. " * 10
+        Product.objects.filter(pk=self.product.pk).update(description=self.description)
+        rebuild_cards()
+
+    def test_store_detail_products_keep_price_description_and_images(self):
+        response = self.client.get(f"/api/store/{self.store.id}/")
+        self.assertEqual(response.status_code, 200)
+        product = response.data["category_groups"]["Uncategorized"]["Other"][0]
+        self.assertEqual(product["price"], 100.0)
+        self.assertEqual(product["description"], self.description)
+        self.assertEqual(product["images"], [])
+        self.assertEqual(
+            product["sizes"],
+            [{"size_label": "M", "price": 100.0, "quantity": 10}, {"size_label": "L", "price": 120.0, "quantity": 5}],
+        )
+
+    def test_my_products_and_store_reservations_return_full_products(self):
+        response = self.client.get("/api/products/my_products/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["description"], self.description)
+        self.assertIn("average_price", response.data[0])
+        self.assertIn("images", response.data[0])
+
+        self.reserve(self.make_customer(1), self.product.sizes.get(size_label="M"))
+        response = self.client.get("/api/store/my_store_reservations/")
+        self.assertEqual(response.status_code, 200)
+        product = response.data[0]["product"]
+        self.assertEqual((product["id"], product["description"]), (self.product.id, self.description))
+        self.assertEqual([size["size_label"] for size in product["sizes"]], ["M", "L"])
+
+
+# ======================================================
+# 🔎 PRODUCT SEARCH
+# ======================================================
+class ProductSearchTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        category = StoreCategory.objects.create(store=self.store, name="Ethnic")
+        self.red_shirt = self.make_product("Red shirt")
+        self.described = self.make_product("Kurta")
+        self.keyworded = self.make_product("Tee")
+        self.in_category = self.make_product("Dhoti")
+        Product.objects.filter(pk=self.described.pk).update(description="Pairs well with a red shirt")
+        Product.objects.filter(pk=self.keyworded.pk).update(keywords="shirt,casual")
+        Product.objects.filter(pk=self.in_category.pk).update(store_category=category)
+        index_products(Product.objects.values_list("id", flat=True))
+        rebuild_cards()
+        self.anon = APIClient()
+
+    def search(self, q, **params):
+        response = self.anon.get("/api/products/search/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [card["id"] for card in response.data["results"]]
+
+    def test_name_ranks_above_keywords_above_description(self):
+        self.assertEqual(self.search("shirt"), [self.red_shirt.id, self.keyworded.id, self.described.id])
+
+    def test_every_term_must_match_and_the_last_one_is_a_prefix(self):
+        self.assertEqual(self.search("red shi"), [self.red_shirt.id, self.described.id])
+        self.assertEqual(self.search("re shirt"), [])
+        self.assertEqual(self.search("kurt"), [self.described.id])
+
+    def test_category_and_store_names_match(self):
+        self.assertEqual(self.search("ethnic"), [self.in_category.id])
+        self.assertEqual(len(self.search("store")), 4)
+
+    def test_blank_query_returns_nothing(self):
+        self.assertEqual(self.search(""), [])
+        self.assertEqual(self.search("!!"), [])
+
+    def test_pages_follow_the_ranking(self):
+        first = self.anon.get("/api/products/search/", {"q": "shirt", "page_size": 2}).data
+        self.assertEqual([card["id"] for card in first["results"]], [self.red_shirt.id, self.keyworded.id])
+        second = self.anon.get(first["next"]).data
+        self.assertEqual([card["id"] for card in second["results"]], [self.described.id])
+        self.assertIsNone(second["next"])
+
+    def test_edits_and_deletes_update_the_index(self):
+        response = self.client.patch(f"/api/products/{self.keyworded.id}/", {"name": "Linen tee"})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.search("linen"), [self.keyworded.id])
+
+        self.assertEqual(self.client.delete(f"/api/products/{self.red_shirt.id}/").status_code, 204)
+        self.assertEqual(self.search("shirt"), [self.keyworded.id, self.described.id])
+
+
+# ======================================================
+# 🧭 FACETED BROWSING
+# ======================================================
+class BrowseFacetTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.tops = StoreCategory.objects.create(store=self.store, name="Tops")
+        self.sarees = StoreCategory.objects.create(store=self.store, name="Sarees")
+        self.sale = OfferCategory.objects.create(
+            store=self.store, title="Sale", start_date=now - timedelta(days=1), end_date=now + timedelta(days=1)
+        )
+        self.ended = OfferCategory.objects.create(
+            store=self.store, title="Ended", start_date=now - timedelta(days=9), end_date=now - timedelta(days=1)
+        )
+        self.shirt = self.make_product("Shirt", (("M", "100.00", 10), ("L", "120.00", 5)))
+        self.tee = self.make_product("Tee", (("M", "700.00", 0),))
+        self.saree = self.make_product("Saree", (("S", "2500.00", 1),))
+        Product.objects.filter(pk__in=[self.shirt.pk, self.tee.pk]).update(store_category=self.tops)
+        Product.objects.filter(pk=self.shirt.pk).update(offer_category=self.ended)
+        Product.objects.filter(pk=self.saree.pk).update(store_category=self.sarees, offer_category=self.sale)
+        refresh_availability(Product.objects.values_list("id", flat=True))
+        rebuild_cards()
+        self.anon = APIClient()
+
+    def browse(self, **params):
+        response = self.anon.get("/api/products/browse/", params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return {card["id"] for card in response.data["results"]}, response.data["facets"]
+
+    def test_unfiltered_counts(self):
+        ids, facets = self.browse()
+        self.assertEqual(ids, {self.shirt.id, self.tee.id, self.saree.id})
+        self.assertEqual(
+            [(f["id"], f["count"]) for f in facets["categories"]], [(self.tops.id, 2), (self.sarees.id, 1)]
+        )
+        self.assertEqual([(f["id"], f["count"]) for f in facets["offers"]], [(self.sale.id, 1)])
+        self.assertEqual({f["label"]: f["count"] for f in facets["sizes"]}, {"M": 1, "L": 1, "S": 1})
+        self.assertEqual([f["count"] for f in facets["price_ranges"]], [1, 1, 0, 1, 0])
+        self.assertEqual(facets["in_stock"], 2)
+
+    def test_a_facet_ignores_its_own_selection(self):
+        ids, facets = self.browse(category=self.tops.id)
+        self.assertEqual(ids, {self.shirt.id, self.tee.id})
+        # Other categories still show what selecting them would add
+        self.assertEqual(
+            [(f["id"], f["count"]) for f in facets["categories"]], [(self.tops.id, 2), (self.sarees.id, 1)]
+        )
+        # ...while every other facet is narrowed to the selection
+        self.assertEqual(facets["offers"], [])
+        self.assertEqual({f["label"]: f["count"] for f in facets["sizes"]}, {"M": 1, "L": 1})
+        self.assertEqual([f["count"] for f in facets["price_ranges"]], [1, 1, 0, 0, 0])
+        self.assertEqual(facets["in_stock"], 1)
+
+        ids, facets = self.browse(size="S")
+        self.assertEqual(ids, {self.saree.id})
+        self.assertEqual({f["label"]: f["count"] for f in facets["sizes"]}, {"M": 1, "L": 1, "S": 1})
+        self.assertEqual([(f["id"], f["count"]) for f in facets["categories"]], [(self.sarees.id, 1)])
+
+    def test_filters(self):
+        self.assertEqual(self.browse(offer=self.sale.id)[0], {self.saree.id})
+        self.assertEqual(self.browse(offer=self.ended.id)[0], set())
+        self.assertEqual(self.browse(min_price="500")[0], {self.tee.id, self.saree.id})
+        self.assertEqual(self.browse(max_price="110")[0], {self.shirt.id})
+        self.assertEqual(self.browse(in_stock=1)[0], {self.shirt.id, self.saree.id})
+        # Size and price must hold for the same size: the Tee's M is out of
+        # stock and the Shirt's M is under 500
+        self.assertEqual(self.browse(size="M", min_price="500")[0], set())
+        self.assertEqual(self.browse(category=[self.tops.id, self.sarees.id])[0],
+                         {self.shirt.id, self.tee.id, self.saree.id})
+
+    def test_offer_edits_refresh_the_offer_facet(self):
+        self.assertEqual([f["title"] for f in self.browse()[1]["offers"]], ["Sale"])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(f"/api/offer-category/{self.ended.id}/update/",
+                                       {"end_date": (timezone.now() + timedelta(days=3)).isoformat()})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual({f["title"] for f in self.browse()[1]["offers"]}, {"Sale", "Ended"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/offer-category/{self.sale.id}/delete/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([f["title"] for f in self.browse()[1]["offers"]], ["Ended"])
+
+    def test_invalid_filters_are_rejected(self):
+        for params in ({"min_price": "-1"}, {"max_price": "abc"}, {"category": "x"}, {"min_price": "NaN"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.anon.get("/api/products/browse/", params).status_code, 400)
+
+
+# ======================================================
+# 🔄 POS CATALOG SYNC
+# ======================================================
+class CatalogSyncTests(StoreTestCase):
+    url = "/api/products/sync/"
+
+    def setUp(self):
+        super().setUp()
+        self.kept = self.make_product("Kept")
+        self.gone = self.make_product("Gone")
+
+    def test_full_snapshot_carries_etag_and_unchanged_catalog_gets_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["full"])
+        self.assertEqual({p["id"] for p in response.data["products"]}, {self.kept.id, self.gone.id})
+        self.assertEqual(len(response.data["sizes"]), 4)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith(f'W/"catalog-{self.store.id}-'))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+
+        size = self.kept.sizes.get(size_label="M")
+        self.assertEqual(self.client.patch(f"/api/product-sizes/{size.id}/", {"quantity": 3}).status_code, 200)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_delta_reports_deleted_products_and_sizes(self):
+        snapshot = self.client.get(self.url)
+        gone_sizes = sorted(self.gone.sizes.values_list("id", flat=True))
+        dropped = self.kept.sizes.get(size_label="L")
+
+        self.assertEqual(self.client.delete(f"/api/products/{self.gone.id}/").status_code, 204)
+        self.assertEqual(self.client.delete(f"/api/product-sizes/{dropped.id}/").status_code, 204)
+
+        response = self.client.get(self.url, {"cursor": snapshot.data["cursor"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["full"])
+        self.assertEqual(response.data["deleted"]["products"], [self.gone.id])
+        self.assertEqual(sorted(response.data["deleted"]["sizes"]), sorted(gone_sizes + [dropped.id]))
+        self.assertNotIn(self.gone.id, [p["id"] for p in response.data["products"]])
+
+    def test_bad_cursor_is_rejected(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+# ======================================================
+# 🖼 IMAGE DERIVATIVES
+# ======================================================
+def _upload(name, size=(1600, 1200), fmt="JPEG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 80, 40)).save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f"image/{fmt.lower()}")
+
+
+class ImageDerivativeTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def derived(self, name, width, fmt):
+        return os.path.join(self.media, derivative_name(name, width, fmt))
+
+    def create_product(self, image_name):
+        response = self.client.post("/api/products/", {
+            "name": image_name,
+            "sizes": json.dumps([{"size_label": "M", "price": "10", "quantity": 1}]),
+            "main_image": _upload(image_name, fmt="PNG" if image_name.endswith(".png") else "JPEG"),
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        return Product.objects.get(pk=response.data["id"])
+
+    def test_derivatives_are_written_on_upload(self):
+        product = self.create_product("a.jpg")
+        for width in (160, 480, 1080):
+            for fmt in ("webp", "jpeg"):
+                self.assertTrue(os.path.exists(self.derived(product.main_image.name, width, fmt)))
+        with Image.open(self.derived(product.main_image.name, 480, "webp")) as image:
+            self.assertEqual(image.size, (480, 360))
+
+        response = self.client.post("/api/category/add/", {"name": "Men", "dp_image": _upload("dp.jpg")})
+        self.assertEqual(response.status_code, 201, response.data)
+        category = StoreCategory.objects.get(store=self.store)
+        self.assertTrue(os.path.exists(self.derived(category.dp_image.name, 160, "jpeg")))
+
+    def test_same_stem_images_keep_their_own_derivatives(self):
+        jpg = self.create_product("a.jpg")
+        png = self.create_product("a.png")
+        self.assertNotEqual(
+            derivative_name(jpg.main_image.name, 480, "webp"), derivative_name(png.main_image.name, 480, "webp")
+        )
+        cards = {card["id"]: card for card in APIClient().get("/api/products/all/").data["results"]}
+        self.assertNotEqual(cards[jpg.id]["main_image_srcset"], cards[png.id]["main_image_srcset"])
+
+    def test_reads_do_not_touch_storage(self):
+        self.create_product("a.jpg")
+        response = self.client.post("/api/category/add/", {"name": "Men", "dp_image": _upload("dp.jpg")})
+        self.assertEqual(response.status_code, 201, response.data)
+
+        with mock.patch.object(FileSystemStorage, "exists") as exists, \
+                mock.patch.object(FileSystemStorage, "save") as save:
+            for url in ("/api/products/all/", f"/api/store/{self.store.id}/", "/api/products/my_products/"):
+                self.assertEqual(self.client.get(url).status_code, 200)
+        exists.assert_not_called()
+        save.assert_not_called()
+
+
+# ======================================================
+# 🔒 CONCURRENT CHECKOUTS
+# ======================================================
+class CheckoutConcurrencyTests(TransactionTestCase):
+    threads = 8
+    per_thread = 25
+
+    def test_concurrent_allocation_is_unique_and_gap_free(self):
+        owner = User.objects.create_user(username="owner", password=None, phone="9000000001", is_store=True)
+        store = Store.objects.create(owner=owner, store_name="Store", place="-", phone="0", category="clothing")
+
+        numbers, errors = [], []
+        start = threading.Barrier(self.threads)
+
+        def allocate():
+            try:
+                start.wait()
+                for n in range(self.per_thread):
+                    # Single numbers and small blocks, like checkouts and sync batches
+                    numbers.extend(reserve_invoice_numbers(store, 1 + n % 3))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=allocate) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        expected = sum(1 + n % 3 for n in range(self.per_thread)) * self.threads
+        sequence = sorted(int(number.split("-")[-1]) for number in numbers)
+        self.assertEqual(sequence, list(range(1, expected + 1)))
+        self.assertEqual(InvoiceSequence.objects.get(store=store).last_value, expected)
+
+    def test_concurrent_checkouts_wait_for_each_other(self):
+        owner = User.objects.create_user(username="owner", password=None, phone="9000000001", is_store=True)
+        store = Store.objects.create(owner=owner, store_name="Store", place="-", phone="0", category="clothing")
+        product = Product.objects.create(store=store, name="Shirt")
+        size = ProductSize.objects.create(product=product, size_label="M", price=Decimal("10.00"), quantity=100)
+
+        statuses, errors = [], []
+        start = threading.Barrier(self.threads)
+
+        def checkout():
+            client = APIClient()
+            client.force_authenticate(owner)
+            try:
+                start.wait()
+                for _ in range(5):
+                    # Reads stock, then writes: the read must not block the write lock upgrade
+                    response = client.post("/api/pos/create-sale/", {
+                        "cart": [{"id": product.id, "size_label": "M", "quantity": 1}],
+                        "subtotal": 10,
+                        "discount": 0,
+                        "total": 10,
+                        "payment": {"paid_amount": 10, "credit_amount": 0},
+                    }, format="json")
+                    statuses.append(response.status_code)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=checkout) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(statuses, [201] * self.threads * 5)
+        size.refresh_from_db()
+        self.assertEqual(size.quantity, 100 - self.threads * 5)
+        self.assertEqual(store.sales.values("invoice_no").distinct().count(), self.threads * 5)
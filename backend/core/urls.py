@@ -31,6 +31,8 @@ from core.views.product_views import (
     ProductViewSet,
     ProductSizeViewSet,
     PublicProductListView,
+    search_products,
+    browse_products,
 
     list_categories,
     list_subcategories,
@@ -63,12 +65,28 @@ from core.views.sales_views import (
     get_customer_info,
     process_return,
     settle_credit,
+    list_store_customers,
+    search_store_customers,
+    sync_sales,
 )
 
 # ---------------------------------------
 # ADVANCED ANALYTICS API (UPDATED)
 # ---------------------------------------
-from core.views.analytics_views import store_sales_summary
+from core.views.analytics_views import (
+    store_sales_summary,
+    store_sales_trend,
+    dashboard_kpis,
+    dashboard_top_products,
+    dashboard_customers,
+    dashboard_orders,
+    dashboard_inventory,
+    store_inventory_summary,
+)
+from core.views.export_views import export_store_data
+from core.views.csv_views import bulk_upload_products
+from core.views.credit_views import adjust_credit, credit_aging_report, credit_ledger
+from core.views.inventory_views import scan_code, stock_movements, stock_reconciliation
 
 # ---------------------------------------
 # ADS & STAFF MANAGEMENT
@@ -125,6 +143,9 @@ urlpatterns = [
     # PUBLIC APIS
     # ------------------------------------------------------
     path("products/all/", PublicProductListView.as_view()),
+    path("products/search/", search_products),
+    path("products/browse/", browse_products),
+    path("products/bulk-upload/", bulk_upload_products),
     path("stores/public/", PublicStoreListView.as_view()),
 
     # ------------------------------------------------------
@@ -133,12 +154,31 @@ urlpatterns = [
     path("create_reservation_sale/", create_reservation_sale),
     path("switch-to-store/", SwitchToStoreView.as_view()),
     path("pos/create-sale/", create_sale),
+    path("pos/sync-sales/", sync_sales),
     path("pos/get-customer-info/", get_customer_info),
+    path("pos/customers/", list_store_customers),
+    path("pos/customers/search/", search_store_customers),
     path("pos/process-return/", process_return),
+    path("pos/returns/", process_return),
     path("settle-credit/", settle_credit),
+    path("adjust-credit/", adjust_credit),
+    path("pos/credit-ledger/", credit_ledger),
+    path("pos/credit-aging/", credit_aging_report),
 
     # ⭐ ADVANCED ANALYTICS API
     path("pos/sales-dashboard/", store_sales_summary),
+    path("pos/sales-trend/", store_sales_trend),
+    path("pos/sales-dashboard/kpis/", dashboard_kpis),
+    path("pos/sales-dashboard/trend/", store_sales_trend),
+    path("pos/sales-dashboard/top-products/", dashboard_top_products),
+    path("pos/sales-dashboard/customers/", dashboard_customers),
+    path("pos/sales-dashboard/orders/", dashboard_orders),
+    path("pos/sales-dashboard/inventory/", dashboard_inventory),
+    path("pos/inventory-summary/", store_inventory_summary),
+    path("pos/scan/<str:code>/", scan_code),
+    path("pos/stock-movements/", stock_movements),
+    path("pos/stock-reconciliation/", stock_reconciliation),
+    path("pos/export/<str:dataset>.<str:fmt>", export_store_data),
 
     # ------------------------------------------------------
     # RESERVATION VERIFY + CODE
@@ -1,345 +1,363 @@
-from django.utils.timezone import now, timedelta
+from django.db.models import F
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Sum
-from core.models import Sale, Store, Reservation, Product
+from core.models import Store
+from core.pagination import CURSOR_PARAM, PAGE_SIZE_PARAM, cursor_response, decode_cursor, get_page_size, keyset_page
+from core.services.cache_service import cached_dashboard
+from core.services.image_service import srcset
+from core.services.analytics_service import (
+    BUCKETS,
+    INVENTORY_ORDERING,
+    LOW_STOCK_THRESHOLD,
+    category_sales,
+    compute_kpis,
+    customer_summaries,
+    dashboard_filters,
+    default_range,
+    filtered_querysets,
+    inventory_counts,
+    inventory_queryset,
+    inventory_rows,
+    local_today,
+    order_entries,
+    orders_page,
+    reservation_rows,
+    rollup_eligible,
+    rollup_time_series,
+    time_series,
+    top_products,
+    weekly_trend,
+)
+
+
+def _dashboard_context(request):
+    """
+    Shared prelude for every dashboard endpoint.
+    Returns (store, filters, None) or (None, None, error_response).
+    """
+    user = request.user
+    if not user.is_store:
+        return None, None, Response({"detail": "Not authorized"}, status=403)
+
+    try:
+        store = Store.objects.get(owner=user)
+    except Store.DoesNotExist:
+        return None, None, Response({"detail": "Store not found"}, status=404)
+
+    try:
+        filters = dashboard_filters(request.GET)
+    except ValueError as e:
+        return None, None, Response({"detail": str(e)}, status=400)
+
+    return store, filters, None
+
+
+def _cache_params(request, store, filters, *extra):
+    """Normalized filter set + local date + any section-specific params."""
+    params = {**filters, "_today": local_today(store)}
+    for name in extra:
+        params[name] = request.GET.get(name)
+    return params
+
+
+def _cached_response(request, store, section, params, compute):
+    """Serve a dict section from cache, tagging the response HIT / MISS."""
+    data, hit = cached_dashboard(store, section, params, compute)
+    response = Response({**data, "cache_hit": hit})
+    response["X-Cache"] = "HIT" if hit else "MISS"
+    return response
+
+
+def _cached_page(request, store, section, params, compute):
+    """Same for (results, next_value) pages."""
+    (results, next_value), hit = cached_dashboard(store, section, params, compute)
+    response = cursor_response(request, results, next_value, cache_hit=hit)
+    response["X-Cache"] = "HIT" if hit else "MISS"
+    return response
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def store_sales_summary(request):
+    """Full dashboard in one response (see the section endpoints for paging)."""
+    store, filters, error = _dashboard_context(request)
+    if error:
+        return error
 
-    user = request.user
-    if not user.is_store:
-        return Response({"detail": "Not authorized"}, status=403)
+    def compute():
+        sales_qs, reservations_qs = filtered_querysets(store, filters)
+
+        # Reservations are read once, as plain rows, and reused by every
+        # section below (no per-row product / size / customer lookups).
+        reservations = reservation_rows(reservations_qs)
+
+        kpis = compute_kpis(store, filters, sales_qs, reservations_qs, reservations)
+
+        return {
+            "store_name": store.store_name,
+            "filters_used": filters,
+
+            **kpis,
+
+            "daily_sales": weekly_trend(store, filters, sales_qs, reservations_qs),
+            "category_sales": category_sales(store, kpis),
+            "top_products": top_products(sales_qs, reservations_qs, reservations)[:10],
+
+            "customer_orders": order_entries(store, sales_qs, reservations),     # <-- FULL ORDER LIST
+            "customers": customer_summaries(store, sales_qs, reservations_qs, reservations),  # <-- SUMMARY
+            "products": inventory_rows(store, sales_qs, reservations_qs, reservations),
+        }
+
+    return _cached_response(request, store, "summary", _cache_params(request, store, filters), compute)
+
+
+# =====================================================
+# TIME-SERIES TREND (hour / day / week / month)
+# =====================================================
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def store_sales_trend(request):
+    """
+    Bucketed POS + reservation totals in the store's local timezone.
+    Accepts the dashboard filters plus ?bucket=hour|day|week|month.
+    """
+    store, filters, error = _dashboard_context(request)
+    if error:
+        return error
+
+    bucket = request.GET.get("bucket", "day")
+    if bucket not in BUCKETS:
+        return Response({"detail": f"bucket must be one of {', '.join(BUCKETS)}"}, status=400)
 
-    # -------------------------------
-    # GET STORE
-    # -------------------------------
     try:
-        store = Store.objects.get(owner=user)
-    except Store.DoesNotExist:
-        return Response({"detail": "Store not found"}, status=404)
+        default_start, default_end = default_range(store, bucket)
+        start = filters["start_date"] or default_start
+        end = filters["end_date"] or default_end
+
+        def compute():
+            if bucket != "hour" and rollup_eligible(filters):
+                series = rollup_time_series(store, filters, bucket, start, end)
+            else:
+                sales_qs, reservations_qs = filtered_querysets(store, filters)
+                series = time_series(store, sales_qs, reservations_qs, bucket, start, end)
+
+            return {
+                "bucket": bucket,
+                "start_date": start,
+                "end_date": end,
+                "timezone": store.time_zone,
+                "series": series,
+            }
+
+        params = {**_cache_params(request, store, filters), "bucket": bucket}
+        return _cached_response(request, store, "trend", params, compute)
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=400)
+
+
+# =====================================================
+# DASHBOARD SECTIONS (same filters, cursor paginated)
+# =====================================================
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dashboard_kpis(request):
+    store, filters, error = _dashboard_context(request)
+    if error:
+        return error
+
+    def compute():
+        sales_qs, reservations_qs = filtered_querysets(store, filters)
+        kpis = compute_kpis(store, filters, sales_qs, reservations_qs)
+        return {
+            "store_name": store.store_name,
+            "filters_used": filters,
+            **kpis,
+            "category_sales": category_sales(store, kpis),
+        }
+
+    return _cached_response(request, store, "kpis", _cache_params(request, store, filters), compute)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dashboard_top_products(request):
+    store, filters, error = _dashboard_context(request)
+    if error:
+        return error
 
-    # -------------------------------
-    # FILTERS
-    # -------------------------------
-    start_date = request.GET.get("start_date")
-    end_date = request.GET.get("end_date")
-    category_filter = request.GET.get("category")
-    customer_phone = request.GET.get("customer")
-    customer_name = request.GET.get("customer_name")
-    product_filter = request.GET.get("product")
-    sale_type_filter = request.GET.get("sale_type")
-    reservation_status = request.GET.get("reservation_status")
-
-    # -------------------------------
-    # BASE QUERIES
-    # -------------------------------
-    sales_qs = Sale.objects.filter(store=store)
-    reservations_qs = Reservation.objects.filter(product__store=store)
-
-    # -------------------------------
-    # DATE RANGE FILTER
-    # -------------------------------
-    if start_date:
-        sales_qs = sales_qs.filter(created_at__date__gte=start_date)
-        reservations_qs = reservations_qs.filter(created_at__date__gte=start_date)
-
-    if end_date:
-        sales_qs = sales_qs.filter(created_at__date__lte=end_date)
-        reservations_qs = reservations_qs.filter(created_at__date__lte=end_date)
-
-    # -------------------------------
-    # CATEGORY FILTER
-    # -------------------------------
-    if category_filter:
-        sales_qs = sales_qs.filter(store__category=category_filter)
-        reservations_qs = reservations_qs.filter(product__store__category=category_filter)
-
-    # -------------------------------
-    # CUSTOMER PHONE FILTER
-    # -------------------------------
-    if customer_phone:
-        sales_qs = sales_qs.filter(customer_phone__icontains=customer_phone)
-        reservations_qs = reservations_qs.filter(customer__phone__icontains=customer_phone)
-
-    # -------------------------------
-    # CUSTOMER NAME FILTER
-    # -------------------------------
-    if customer_name:
-        sales_qs = sales_qs.filter(customer_name__icontains=customer_name)
-        reservations_qs = reservations_qs.filter(customer__username__icontains=customer_name)
-
-    # -------------------------------
-    # PRODUCT FILTER
-    # -------------------------------
-    sales_list = list(sales_qs)
-
-    if product_filter:
-        pf = product_filter.lower()
-
-        # Filter POS sale items
-        sales_list = [
-            s for s in sales_list
-            if any(
-                pf in (item.get("product") or "").lower()
-                for item in s.products
-            )
-        ]
-
-        # Filter reservation product
-        reservations_qs = reservations_qs.filter(product__name__icontains=product_filter)
-
-    # -------------------------------
-    # RESERVATION STATUS
-    # -------------------------------
-    if reservation_status:
-        reservations_qs = reservations_qs.filter(status=reservation_status)
-
-    # -------------------------------
-    # SALE TYPE
-    # -------------------------------
-    if sale_type_filter == "pos":
-        reservations_qs = reservations_qs.none()
-    elif sale_type_filter == "reservation":
-        sales_list = []
-
-    # =====================================================
-    # KPI CALCULATIONS
-    # =====================================================
-    total_sales = len(sales_list)
-    pos_revenue = sum(float(s.total_amount) for s in sales_list)
-
-    total_reservations = reservations_qs.count()
-    completed_reservations = reservations_qs.filter(status="completed").count()
-
-    reservation_revenue = float(
-        reservations_qs.aggregate(total=Sum("advance_amount"))["total"] or 0
-    )
-
-    total_revenue = pos_revenue + reservation_revenue
-    total_orders = total_sales + total_reservations
-    avg_order_value = round(total_revenue / total_orders, 2) if total_orders else 0
-
-    conversion_rate = (
-        round(completed_reservations / total_reservations * 100, 2)
-        if total_reservations else 0
-    )
-
-    # =====================================================
-    # WEEKLY TREND
-    # =====================================================
-    today = now().date()
-    daily_sales = []
-
-    for i in range(7):
-        d = today - timedelta(days=6 - i)
-        label = d.strftime("%b %d")
-
-        pos_total = sum(
-            float(s.total_amount)
-            for s in sales_list
-            if s.created_at.date() == d
+    try:
+        cursor = decode_cursor(request) or {}
+        offset = int(cursor.get("o", 0))
+    except (ValueError, TypeError, AttributeError):
+        return Response({"detail": "Invalid cursor."}, status=400)
+
+    limit = get_page_size(request, default=10)
+
+    def compute():
+        sales_qs, reservations_qs = filtered_querysets(store, filters)
+        ranked = top_products(sales_qs, reservations_qs)
+        next_value = {"o": offset + limit} if offset + limit < len(ranked) else None
+        return ranked[offset:offset + limit], next_value
+
+    params = _cache_params(request, store, filters, CURSOR_PARAM, PAGE_SIZE_PARAM)
+    return _cached_page(request, store, "top-products", params, compute)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dashboard_orders(request):
+    store, filters, error = _dashboard_context(request)
+    if error:
+        return error
+
+    def compute():
+        sales_qs, reservations_qs = filtered_querysets(store, filters)
+        return orders_page(
+            store, sales_qs, reservations_qs, after=after, limit=get_page_size(request)
         )
 
-        res_total = float(
-            reservations_qs.filter(created_at__date=d)
-            .aggregate(total=Sum("advance_amount"))["total"] or 0
+    try:
+        after = decode_cursor(request)
+        params = _cache_params(request, store, filters, CURSOR_PARAM, PAGE_SIZE_PARAM)
+        return _cached_page(request, store, "orders", params, compute)
+    except (ValueError, TypeError, KeyError):
+        return Response({"detail": "Invalid cursor."}, status=400)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dashboard_customers(request):
+    store, filters, error = _dashboard_context(request)
+    if error:
+        return error
+
+    try:
+        after = decode_cursor(request)
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=400)
+
+    limit = get_page_size(request)
+
+    def compute():
+        sales_qs, reservations_qs = filtered_querysets(store, filters)
+        rows, has_more = customer_summaries(
+            store, sales_qs, reservations_qs, after_phone=after, limit=limit
         )
+        return rows, (rows[-1]["phone"] or "") if has_more and rows else None
 
-        daily_sales.append({
-            "day": label,
-            "pos_total": pos_total,
-            "reservation_total": res_total,
-        })
+    params = _cache_params(request, store, filters, CURSOR_PARAM, PAGE_SIZE_PARAM)
+    return _cached_page(request, store, "customers", params, compute)
 
-    # =====================================================
-    # CATEGORY BREAKDOWN
-    # =====================================================
-    category_map = {}
 
-    for sale in sales_list:
-        cat = store.category or "Other"
-        category_map[cat] = category_map.get(cat, 0) + float(sale.total_amount)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dashboard_inventory(request):
+    store, filters, error = _dashboard_context(request)
+    if error:
+        return error
 
-    for r in reservations_qs:
-        cat = r.product.store.category or "Other"
-        category_map[cat] = category_map.get(cat, 0) + float(r.advance_amount)
+    try:
+        after = decode_cursor(request)
+        after_id = int(after) if after is not None else None
+    except (ValueError, TypeError):
+        return Response({"detail": "Invalid cursor."}, status=400)
 
-    category_sales = [
-        {"category": c, "revenue": round(v, 2)}
-        for c, v in category_map.items()
-    ]
+    limit = get_page_size(request)
 
-    # =====================================================
-    # TOP PRODUCTS
-    # =====================================================
-    product_stats = {}
-
-    for sale in sales_list:
-        for item in sale.products:
-            name = item.get("product") or "Unknown Product"
-            qty = int(item.get("quantity", 0))
-
-            product_stats.setdefault(name, {"quantity": 0, "reservation_quantity": 0})
-            product_stats[name]["quantity"] += qty
-
-    for r in reservations_qs:
-        name = r.product.name
-        product_stats.setdefault(name, {"quantity": 0, "reservation_quantity": 0})
-        product_stats[name]["reservation_quantity"] += r.quantity
-
-    top_products = sorted(
-        [
-            {
-                "name": name,
-                "quantity": stats["quantity"],
-                "reservation_quantity": stats["reservation_quantity"],
-                "total_sold": stats["quantity"] + stats["reservation_quantity"],
-            }
-            for name, stats in product_stats.items()
-        ],
-        key=lambda x: x["total_sold"],
-        reverse=True
-    )[:10]
-
-    # =====================================================
-    # CUSTOMER ANALYTICS + FULL ORDER DETAILS
-    # =====================================================
-    customer_map = {}
-    customer_orders = []
-
-    # ------- POS ORDERS -------
-    for sale in sales_list:
-
-        # FIXED PRODUCT NAME + SIZE DISPLAY
-        item_string = ", ".join([
-            f"{(i.get('product') or 'Unknown Product')} "
-            f"{'(' + i.get('size') + ')' if i.get('size') else ''} × {i.get('quantity')}"
-            for i in sale.products
-        ])
-
-        entry = {
-            "name": sale.customer_name or "Unknown",
-            "phone": sale.customer_phone or "N/A",
-            "order_id": sale.id,
-            "type": "pos",
-            "items": item_string,
-            "amount": float(sale.total_amount),
-            "date": sale.created_at.strftime("%Y-%m-%d %H:%M"),
-            "status": "completed",
-        }
-        customer_orders.append(entry)
-
-        phone = entry["phone"]
-        c = customer_map.setdefault(phone, {
-            "name": entry["name"],
-            "phone": phone,
-            "pos_orders": 0,
-            "reservations": 0,
-            "total_orders": 0,
-            "total_spent": 0,
-            "last_purchase": None,
-        })
-
-        c["pos_orders"] += 1
-        c["total_orders"] += 1
-        c["total_spent"] += entry["amount"]
-        c["last_purchase"] = sale.created_at
-
-    # ------- RESERVATION ORDERS -------
-    for r in reservations_qs:
-
-        item_string = f"{r.product.name} ({r.size.size_label}) × {r.quantity}"
-
-        entry = {
-            "name": r.customer.username,
-            "phone": r.customer.phone,
-            "order_id": r.id,
-            "type": "reservation",
-            "items": item_string,
-            "amount": float(r.advance_amount),
-            "date": r.created_at.strftime("%Y-%m-%d %H:%M"),
-            "status": r.status,
-        }
-        customer_orders.append(entry)
-
-        phone = r.customer.phone
-        c = customer_map.setdefault(phone, {
-            "name": entry["name"],
-            "phone": phone,
-            "pos_orders": 0,
-            "reservations": 0,
-            "total_orders": 0,
-            "total_spent": 0,
-            "last_purchase": None,
-        })
-
-        c["reservations"] += 1
-        c["total_orders"] += 1
-        c["total_spent"] += entry["amount"]
-        c["last_purchase"] = r.created_at
-
-    # Build customer summary list
-    customers_list = [
+    def compute():
+        sales_qs, reservations_qs = filtered_querysets(store, filters)
+        rows, has_more = inventory_rows(
+            store, sales_qs, reservations_qs, after_id=after_id, limit=limit
+        )
+        return rows, rows[-1]["id"] if has_more and rows else None
+
+    params = _cache_params(request, store, filters, CURSOR_PARAM, PAGE_SIZE_PARAM)
+    return _cached_page(request, store, "inventory", params, compute)
+
+
+# =====================================================
+# INVENTORY SUMMARY (stock computed in SQL)
+# =====================================================
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def store_inventory_summary(request):
+    """
+    Stock totals plus a page of products with stock_left / top_size and
+    what the store dashboard shows per product (image, price, sizes).
+    ?ordering=stock_left|-stock_left|name|-name|id (default stock_left),
+    ?low_stock=<n> threshold (default 5), ?search= (name contains; the
+    totals stay catalog-wide), cursor paginated.
+    """
+    user = request.user
+    if not user.is_store:
+        return Response({"detail": "Not authorized"}, status=403)
+
+    try:
+        store = Store.objects.get(owner=user)
+    except Store.DoesNotExist:
+        return Response({"detail": "Store not found"}, status=404)
+
+    ordering = request.GET.get("ordering", "stock_left")
+    field = ordering.lstrip("-")
+    if field not in INVENTORY_ORDERING:
+        return Response({"detail": f"ordering must be one of {', '.join(INVENTORY_ORDERING)}"}, status=400)
+
+    try:
+        low_stock = int(request.GET.get("low_stock", LOW_STOCK_THRESHOLD))
+        after = decode_cursor(request)
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=400)
+
+    limit = get_page_size(request)
+    search = request.GET.get("search", "").strip()
+
+    def compute():
+        products = inventory_queryset(store)
+        if search:
+            products = products.filter(name__icontains=search)
+        rows, next_after = keyset_page(
+            products.values(
+                "id", "name", "stock_left", "top_size",
+                # Display fields come from the product card
+                image=F("card__main_image"),
+                image_variants=F("card__main_image_variants"),
+                price=F("card__min_price"),
+                size_stock=F("card__sizes"),
+            ),
+            field,
+            after=after,
+            limit=limit,
+            descending=ordering.startswith("-"),
+        )
+        return {"summary": inventory_counts(store, low_stock), "results": rows, "next": next_after}
+
+    params = {
+        "_today": local_today(store),
+        "ordering": ordering,
+        "low_stock": low_stock,
+        "search": search,
+        CURSOR_PARAM: request.GET.get(CURSOR_PARAM),
+        PAGE_SIZE_PARAM: limit,
+    }
+    try:
+        data, hit = cached_dashboard(store, "inventory-summary", params, compute)
+    except (ValueError, TypeError):
+        return Response({"detail": "Invalid cursor."}, status=400)
+
+    results = [
         {
-            **c,
-            "last_purchase": (
-                c["last_purchase"].strftime("%Y-%m-%d %H:%M")
-                if c["last_purchase"] else None
-            )
+            "id": row["id"],
+            "name": row["name"],
+            "stock_left": row["stock_left"],
+            "top_size": row["top_size"],
+            "main_image": request.build_absolute_uri(row["image"]) if row["image"] else None,
+            "main_image_srcset": srcset(row["image_variants"], request.build_absolute_uri),
+            "price": row["price"],
+            "sizes": row["size_stock"] or [],
         }
-        for c in customer_map.values()
+        for row in data["results"]
     ]
-
-    # =====================================================
-    # PRODUCT INVENTORY
-    # =====================================================
-    inventory = []
-    for p in Product.objects.filter(store=store).prefetch_related("sizes"):
-        sizes = p.sizes.all()
-        total_stock = sum(s.quantity for s in sizes)
-        top_size = max(sizes, key=lambda s: s.quantity).size_label if sizes else "N/A"
-
-        inventory.append({
-            "id": p.id,
-            "name": p.name,
-            "stock_left": total_stock,
-            "top_size": top_size,
-            "total_sales": product_stats.get(p.name, {}).get("quantity", 0),
-            "reservation_sales": product_stats.get(p.name, {}).get("reservation_quantity", 0),
-        })
-
-    # =====================================================
-    # RESPONSE
-    # =====================================================
-    return Response({
-        "store_name": store.store_name,
-        "filters_used": {
-            "start_date": start_date,
-            "end_date": end_date,
-            "category": category_filter,
-            "product": product_filter,
-            "customer": customer_phone,
-            "customer_name": customer_name,
-            "sale_type": sale_type_filter,
-            "reservation_status": reservation_status,
-        },
-
-        "total_sales": total_sales,
-        "total_reservations": total_reservations,
-        "converted_reservations": completed_reservations,
-        "reservation_conversion_rate": conversion_rate,
-        "total_revenue": round(total_revenue, 2),
-        "avg_order_value": avg_order_value,
-
-        "daily_sales": daily_sales,
-        "category_sales": category_sales,
-        "top_products": top_products,
-
-        "customer_orders": customer_orders,     # <-- FULL ORDER LIST
-        "customers": customers_list,            # <-- SUMMARY
-        "products": inventory,
-    })
+    response = cursor_response(request, results, data["next"], summary=data["summary"], cache_hit=hit)
+    response["X-Cache"] = "HIT" if hit else "MISS"
+    return response
@@ -3,8 +3,10 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from django.db import transaction
 from decimal import Decimal
+from core.idempotency import idempotent
 from core.models import BuyNowOrder, ProductSize
 from core.serializers import BuyNowOrderSerializer
+from core.services.inventory_service import InsufficientStock, move_stock
 
 
 class BuyNowOrderViewSet(viewsets.ModelViewSet):
@@ -32,6 +34,7 @@ class BuyNowOrderViewSet(viewsets.ModelViewSet):
     # ✅ CREATE BUY NOW ORDER
     # -------------------------------------------
     @transaction.atomic
+    @idempotent
     def create(self, request, *args, **kwargs):
         user = request.user
 
@@ -70,9 +73,15 @@ class BuyNowOrderViewSet(viewsets.ModelViewSet):
             total_price=total_price,
         )
 
-        # Deduct stock
-        size.quantity -= quantity
-        size.save()
+        # Deduct stock (conditional, so two buyers cannot both take the last unit)
+        try:
+            move_stock(size.product.store, [(size, -quantity, f"buy-now:{order.id}")], "buy_now", user=user)
+        except InsufficientStock:
+            transaction.set_rollback(True)
+            return Response(
+                {"error": "This size just sold out, please try again."},
+                status=status.HTTP_409_CONFLICT,
+            )
 
         return Response(
             {
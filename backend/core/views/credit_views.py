@@ -0,0 +1,119 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from core.models import CreditEntry
+from core.pagination import cursor_response, decode_cursor, get_page_size, keyset_page
+from core.serializers import CreditEntrySerializer
+from core.services.cache_service import bump_store_version
+from core.services.credit_service import adjust_customer_credit, credit_aging, outstanding_balance
+from core.services.customer_service import normalize_phone
+
+
+# -------------------------------
+# CREDIT LEDGER (one customer)
+# -------------------------------
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def credit_ledger(request):
+    """?phone= required; newest entries first, cursor paginated, plus the current balance."""
+    store = getattr(request.user, "store", None)
+    if not store:
+        return Response({"success": False, "message": "User not linked to store."}, status=400)
+
+    phone = normalize_phone(request.query_params.get("phone"))
+    if not phone:
+        return Response({"success": False, "message": "Phone number is required."}, status=400)
+
+    try:
+        rows, next_after = keyset_page(
+            CreditEntry.objects.filter(store=store, phone=phone).select_related("sale", "created_by"),
+            "created_at",
+            after=decode_cursor(request),
+            limit=get_page_size(request),
+            descending=True,
+        )
+    except (ValueError, TypeError):
+        return Response({"success": False, "message": "Invalid cursor."}, status=400)
+
+    return cursor_response(
+        request,
+        CreditEntrySerializer(rows, many=True).data,
+        next_after,
+        phone=phone,
+        outstanding_credit=str(outstanding_balance(store, phone)),
+    )
+
+
+# -------------------------------
+# ADJUST CREDIT
+# -------------------------------
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+@transaction.atomic
+def adjust_credit(request):
+    """
+    {"phone", "amount", "note"}: a signed correction (positive adds to what
+    the customer owes, negative writes it off). The note is required.
+    """
+    user = request.user
+    store = getattr(user, "store", None)
+    if not store:
+        return Response({"success": False, "message": "User not linked to store."}, status=400)
+
+    note = (request.data.get("note") or "").strip()
+    try:
+        amount = Decimal(str(request.data.get("amount") or 0))
+    except InvalidOperation:
+        return Response({"success": False, "message": "Invalid amount."}, status=400)
+    if not note:
+        return Response({"success": False, "message": "A note is required for adjustments."}, status=400)
+
+    try:
+        balance = adjust_customer_credit(store, request.data.get("phone"), amount, note=note[:255], user=user)
+    except ValueError as e:
+        return Response({"success": False, "message": str(e)}, status=400)
+
+    bump_store_version(store.id)
+    return Response({
+        "success": True,
+        "message": "Credit adjusted.",
+        "adjusted_amount": str(amount),
+        "remaining_credit": str(balance),
+    })
+
+
+# -------------------------------
+# CREDIT AGING
+# -------------------------------
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def credit_aging_report(request):
+    """
+    Outstanding credit by age (0-30 / 31-60 / 60+ days): store totals plus
+    one row per customer, ordered by phone and cursor paginated.
+    """
+    store = getattr(request.user, "store", None)
+    if not store:
+        return Response({"success": False, "message": "User not linked to store."}, status=400)
+
+    try:
+        after = decode_cursor(request)
+    except ValueError:
+        after = False
+    if after is not None and not isinstance(after, str):
+        return Response({"success": False, "message": "Invalid cursor."}, status=400)
+
+    limit = get_page_size(request)
+    totals, customers = credit_aging(store, after_phone=after)
+    rows = list(customers[:limit + 1])
+    next_after = rows[limit - 1]["phone"] if len(rows) > limit else None
+
+    def money(row):
+        return {key: f"{value:.2f}" if isinstance(value, Decimal) else value for key, value in row.items()}
+
+    return cursor_response(request, [money(r) for r in rows[:limit]], next_after, totals=money(totals))
+
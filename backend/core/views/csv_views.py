@@ -4,6 +4,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.core.files.base import ContentFile
 from core.models import Product, ProductImage, ProductSize, StoreCategory, StoreSubCategory, OfferCategory
+from core.services.card_service import refresh_cards
+from core.services.facet_service import refresh_availability
+from core.services.image_service import derive_images
+from core.services.inventory_service import log_movements, sku_conflicts
+from core.services.search_service import index_products
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -25,8 +30,20 @@ def bulk_upload_products(request):
     decoded_csv = csv_file.read().decode("utf-8").splitlines()
     reader = csv.DictReader(decoded_csv)
 
-    for row in reader:
+    errors = []
+    seen_skus = set()
+
+    for line_no, row in enumerate(reader, start=2):
         name = row["name"]
+
+        # Sizes are "label:price:qty" or "label:price:qty:sku", separated by "|"
+        size_entries = [s.split(":") for s in row["sizes"].split("|")] if row["sizes"] else []
+        row_skus = [entry[3].strip() for entry in size_entries if len(entry) > 3 and entry[3].strip()]
+        taken = sku_conflicts(store, row_skus) + sorted(seen_skus.intersection(row_skus))
+        if taken:
+            errors.append({"line": line_no, "name": name, "message": f"SKU already in use: {', '.join(taken)}"})
+            continue
+        seen_skus.update(row_skus)
         description = row.get("description", "")
         keywords = row.get("keywords", "")
 
@@ -71,31 +88,39 @@ def bulk_upload_products(request):
                 ContentFile(zip_data.read(main_img_name)),
                 save=True
             )
+            derive_images(product, "main_image")
 
         # GALLERY IMAGES
         gallery_names = row["gallery_images"].split("|") if row["gallery_images"] else []
         for img_name in gallery_names:
             if img_name.strip() in zip_data.namelist():
-                ProductImage.objects.create(
+                image = ProductImage.objects.create(
                     product=product,
                     image=ContentFile(zip_data.read(img_name), name=img_name)
                 )
+                derive_images(image, "image")
 
-        # SIZES
-        size_entries = row["sizes"].split("|") if row["sizes"] else []
-        for s in size_entries:
-            size_label, price, qty = s.split(":")
-            ProductSize.objects.create(
+        # SIZES (a blank SKU gets an internal barcode)
+        new_sizes = []
+        for size_label, price, qty, *sku in size_entries:
+            new_sizes.append(ProductSize.objects.create(
                 product=product,
                 size_label=size_label,
                 price=price,
-                quantity=qty
-            )
+                quantity=int(qty),
+                sku=sku[0] if sku else "",
+            ))
+        log_movements(store, [(s, s.quantity, "csv-import") for s in new_sizes], "initial", user=request.user)
+
+        created_products.append(product)
 
-        created_products.append(product.name)
+    index_products([p.id for p in created_products])
+    refresh_availability([p.id for p in created_products])
+    refresh_cards([p.id for p in created_products])
 
     return Response({
         "status": "success",
         "created_count": len(created_products),
-        "products": created_products
+        "products": [p.name for p in created_products],
+        "errors": errors,
     })
@@ -0,0 +1,52 @@
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from core.models import Store
+from core.services.analytics_service import dashboard_filters
+from core.services.export_service import DATASETS, EXPORT_FORMATS, export_stream
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+
+# =====================================================
+# ✅ STREAMING EXPORT (sales / sale-lines / reservations / returns)
+# =====================================================
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_store_data(request, dataset, fmt):
+    """
+    GET pos/export/<dataset>.<csv|jsonl> with the sales dashboard filters.
+    Rows are read in chunks and written as they are produced, so the
+    response starts immediately and memory stays flat for any date range.
+    """
+    user = request.user
+    if not user.is_store:
+        return Response({"detail": "Not authorized"}, status=403)
+
+    try:
+        store = Store.objects.get(owner=user)
+    except Store.DoesNotExist:
+        return Response({"detail": "Store not found"}, status=404)
+
+    if dataset not in DATASETS:
+        return Response({"detail": f"dataset must be one of {', '.join(DATASETS)}"}, status=404)
+    if fmt not in EXPORT_FORMATS:
+        return Response({"detail": f"format must be one of {', '.join(EXPORT_FORMATS)}"}, status=404)
+
+    try:
+        filters = dashboard_filters(request.GET)
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=400)
+
+    response = StreamingHttpResponse(
+        export_stream(store, dataset, filters, fmt),
+        content_type=CONTENT_TYPES[fmt],
+    )
+    filename = f"{dataset}-{timezone.localdate(timezone=store.tzinfo).isoformat()}.{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
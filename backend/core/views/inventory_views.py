@@ -0,0 +1,113 @@
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from core.models import ProductSize, StockMovement
+from core.pagination import cursor_response, decode_cursor, get_page_size, keyset_page
+from core.serializers import StockMovementSerializer
+from core.services.inventory_service import stock_discrepancies
+
+
+# -------------------------------
+# BARCODE SCAN
+# -------------------------------
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def scan_code(request, code):
+    """Product, size, price and stock for a scanned SKU: one lookup on the (store, sku) index."""
+    store = getattr(request.user, "store", None)
+    if not store:
+        return Response({"success": False, "message": "User not linked to store."}, status=400)
+
+    try:
+        size = (
+            ProductSize.objects.select_related("product")
+            .only("id", "size_label", "price", "quantity", "sku", "product__id", "product__name", "product__main_image")
+            .get(store=store, sku=code.strip())
+        )
+    except ProductSize.DoesNotExist:
+        return Response({"success": False, "message": "No product with this code."}, status=404)
+
+    product = size.product
+    return Response({
+        "success": True,
+        "data": {
+            "product_id": product.id,
+            "product": product.name,
+            "main_image": request.build_absolute_uri(product.main_image.url) if product.main_image else None,
+            "size": {
+                "id": size.id,
+                "size_label": size.size_label,
+                "price": str(size.price),
+                "quantity": size.quantity,
+                "sku": size.sku,
+            },
+        },
+    })
+
+
+# -------------------------------
+# STOCK HISTORY
+# -------------------------------
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def stock_movements(request):
+    """Newest first, optionally ?product= / ?size= / ?reason=, cursor paginated."""
+    store = getattr(request.user, "store", None)
+    if not store:
+        return Response({"success": False, "message": "User not linked to store."}, status=400)
+
+    qs = StockMovement.objects.filter(store=store).select_related("product", "created_by")
+    params = request.query_params
+    try:
+        if params.get("product"):
+            qs = qs.filter(product_id=int(params["product"]))
+        if params.get("size"):
+            qs = qs.filter(size_id=int(params["size"]))
+    except ValueError:
+        return Response({"success": False, "message": "product and size must be ids."}, status=400)
+    if params.get("reason"):
+        qs = qs.filter(reason=params["reason"])
+
+    try:
+        rows, next_after = keyset_page(
+            qs, "created_at", after=decode_cursor(request), limit=get_page_size(request), descending=True
+        )
+    except (ValueError, TypeError):
+        return Response({"success": False, "message": "Invalid cursor."}, status=400)
+
+    return cursor_response(request, StockMovementSerializer(rows, many=True).data, next_after)
+
+
+# -------------------------------
+# RECONCILIATION
+# -------------------------------
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def stock_reconciliation(request):
+    """Sizes whose on-hand quantity differs from the sum of their movements."""
+    store = getattr(request.user, "store", None)
+    if not store:
+        return Response({"success": False, "message": "User not linked to store."}, status=400)
+
+    rows = list(
+        stock_discrepancies(store)
+        .order_by("product_id", "id")
+        .values("id", "product_id", "product__name", "size_label", "quantity", "ledger_quantity")[:500]
+    )
+    return Response({
+        "success": True,
+        "in_sync": not rows,
+        "results": [
+            {
+                "size_id": r["id"],
+                "product_id": r["product_id"],
+                "product": r["product__name"],
+                "size_label": r["size_label"],
+                "quantity": r["quantity"],
+                "ledger_quantity": r["ledger_quantity"],
+                "difference": r["quantity"] - r["ledger_quantity"],
+            }
+            for r in rows
+        ],
+    })
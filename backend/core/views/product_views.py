@@ -1,23 +1,40 @@
+from decimal import Decimal, InvalidOperation
+
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import api_view, action, permission_classes
 from rest_framework.response import Response
 from django.core.exceptions import PermissionDenied
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from core.models import (
     Product,
+    ProductCard,
+    ProductImage,
     ProductSize,
     StoreCategory,
     StoreSubCategory,
     OfferCategory,
 )
 
+from core.pagination import NewestFirstPagination, cursor_response, decode_cursor, encode_cursor, get_page_size
 from core.serializers import (
+    CatalogProductSerializer,
+    CatalogSizeSerializer,
+    ProductCardSerializer,
     ProductSerializer,
     ProductSizeSerializer,
     StoreCategorySerializer,
     StoreSubCategorySerializer,
     OfferCategorySerializer,
 )
+from core.services.cache_service import bump_store_version
+from core.services.card_service import refresh_cards
+from core.services.catalog_service import catalog_changes, catalog_version, record_deletions
+from core.services.facet_service import facet_counts, matching_cards, refresh_availability
+from core.services.inventory_service import log_movements
+from core.services.search_service import index_products, search_product_ids, unindex_products
 
 
 # ==========================================================
@@ -35,6 +52,17 @@ class IsStoreOwnerOrReadOnly(permissions.BasePermission):
         return obj.store.owner == request.user
 
 
+# ==========================================================
+# SERIALIZER PREFETCHING
+# ==========================================================
+def with_serializer_relations(qs):
+    """Everything ProductSerializer reads, in a fixed number of queries per page."""
+    return qs.select_related("store", "store_category", "store_subcategory", "offer_category").prefetch_related(
+        Prefetch("sizes", queryset=ProductSize.objects.order_by("id")),
+        Prefetch("images", queryset=ProductImage.objects.order_by("id")),
+    )
+
+
 # ==========================================================
 # PRODUCT VIEWSET
 # ==========================================================
@@ -47,6 +75,9 @@ class ProductViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         qs = Product.objects.select_related("store").order_by("-id")
+        if self.action in ("list", "retrieve"):
+            # Not for writes: the serializer re-reads sizes after replacing them
+            qs = with_serializer_relations(qs)
 
         if not user.is_authenticated or not getattr(user, "is_store", False):
             return qs
@@ -62,7 +93,11 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
-        serializer.save(store=request.user.store)
+        product = serializer.save(store=request.user.store)
+        index_products([product.id])
+        refresh_availability([product.id])
+        refresh_cards([product.id])
+        bump_store_version(request.user.store.id)
 
         return Response(serializer.data, status=201)
 
@@ -78,42 +113,205 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(product, data=data, partial=True, context={"request": request})
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        index_products([product.id])
+        refresh_availability([product.id])
+        refresh_cards([product.id])
+        bump_store_version(product.store_id)
 
         return Response(serializer.data)
 
     def perform_destroy(self, instance):
         if instance.store.owner != self.request.user:
             raise PermissionDenied("You can delete only your products.")
+        store_id = instance.store_id
+        sizes = list(instance.sizes.all())
+        log_movements(instance.store, [(s, -s.quantity, "") for s in sizes], "removed", user=self.request.user)
+        record_deletions(instance.store, product_ids=[instance.id], size_ids=[s.id for s in sizes])
+        unindex_products([instance.id])
         instance.delete()
+        bump_store_version(store_id)
 
     @action(detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated])
     def my_products(self, request):
         if not hasattr(request.user, "store"):
             return Response({"detail": "You do not have a store."}, status=403)
 
-        qs = Product.objects.filter(store=request.user.store).order_by("-id")
+        # Full products, not cards: the POS grid and catalogSync.js use this shape
+        qs = with_serializer_relations(Product.objects.filter(store=request.user.store)).order_by("-id")
         serializer = self.get_serializer(qs, many=True, context={"request": request})
         return Response(serializer.data)
 
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated])
+    def sync(self, request):
+        """
+        Catalog delta for POS terminals: ?cursor= from the previous response
+        (omit it for a full snapshot). The ETag is the catalog version, so a
+        client sending it back as If-None-Match gets an empty 304 when
+        nothing changed.
+        """
+        if not hasattr(request.user, "store"):
+            return Response({"detail": "You do not have a store."}, status=403)
+        store = request.user.store
+
+        version = catalog_version(store)
+        etag = f'W/"catalog-{store.id}-{int(version.timestamp() * 1_000_000) if version else 0}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        sent = [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]
+        if etag in sent:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        try:
+            cursor = decode_cursor(request)
+            since = parse_datetime(cursor) if cursor is not None else None
+            if cursor is not None and (since is None or timezone.is_naive(since)):
+                raise ValueError
+        except (ValueError, TypeError):
+            return Response({"success": False, "message": "Invalid cursor."}, status=400)
+
+        changes = catalog_changes(store, since)
+        context = {"request": request}
+        return Response(
+            {
+                "success": True,
+                "full": changes["full"],
+                "cursor": encode_cursor(changes["cursor"].isoformat()),
+                "products": CatalogProductSerializer(changes["products"], many=True, context=context).data,
+                "sizes": CatalogSizeSerializer(changes["sizes"], many=True).data,
+                "deleted": changes["deleted"],
+            },
+            headers=headers,
+        )
+
 
 # ==========================================================
 # PRODUCT SIZE VIEWSET
 # ==========================================================
 class ProductSizeViewSet(viewsets.ModelViewSet):
-    queryset = ProductSize.objects.all()
     serializer_class = ProductSizeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        # Only the owner's sizes: every write below lands in their store's ledger
+        return ProductSize.objects.filter(product__store__owner=self.request.user).select_related("product__store")
+
+    # Every quantity change lands in the stock movement ledger
+    def perform_create(self, serializer):
+        product_id = str(self.request.data.get("product") or "")
+        product = (
+            Product.objects.filter(pk=product_id, store__owner=self.request.user).first()
+            if product_id.isdigit() else None
+        )
+        if product is None:
+            raise PermissionDenied("You can add sizes only to your products.")
+        size = serializer.save(product=product)
+        log_movements(size.product.store, [(size, size.quantity, "")], "initial", user=self.request.user)
+        refresh_availability([size.product_id])
+        refresh_cards([size.product_id])
+
+    def perform_update(self, serializer):
+        before = serializer.instance.quantity
+        size = serializer.save()
+        log_movements(size.product.store, [(size, size.quantity - before, "")], "adjust", user=self.request.user)
+        refresh_availability([size.product_id])
+        refresh_cards([size.product_id])
+
+    def perform_destroy(self, instance):
+        log_movements(instance.product.store, [(instance, -instance.quantity, "")], "removed", user=self.request.user)
+        record_deletions(instance.product.store, size_ids=[instance.id])
+        instance.delete()
+        refresh_cards([instance.product_id])
+
 
 # ==========================================================
 # PUBLIC PRODUCT LIST
 # ==========================================================
 class PublicProductListView(generics.ListAPIView):
-    serializer_class = ProductSerializer
+    """Marketplace feed of product cards, newest first, cursor paginated (?cursor= / ?page_size=)."""
+    serializer_class = ProductCardSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = NewestFirstPagination
 
     def get_queryset(self):
-        return Product.objects.all().order_by("-id")
+        return ProductCard.objects.all()
+
+
+# ==========================================================
+# PRODUCT SEARCH
+# ==========================================================
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def search_products(request):
+    """
+    Marketplace search: ?q= matched against product name, keywords,
+    description, category names and store name (words may be partly
+    typed), best match first. Paginated with ?cursor= / ?page_size=.
+    """
+    query = request.query_params.get("q", "").strip()
+    try:
+        offset = int(decode_cursor(request) or 0)
+    except (ValueError, TypeError):
+        return Response({"success": False, "message": "Invalid cursor."}, status=400)
+    limit = get_page_size(request)
+
+    ids = search_product_ids(query, limit=limit + 1, offset=offset) if query else []
+    next_offset = offset + limit if len(ids) > limit else None
+    ids = ids[:limit]
+
+    cards = ProductCard.objects.in_bulk(ids)
+    results = ProductCardSerializer(
+        [cards[pk] for pk in ids if pk in cards], many=True, context={"request": request}
+    ).data
+    return cursor_response(request, results, next_offset)
+
+
+# ==========================================================
+# FACETED BROWSING
+# ==========================================================
+def _id_list(request, param):
+    return [int(value) for value in request.query_params.getlist(param) if value]
+
+
+def _price(request, param):
+    value = request.query_params.get(param)
+    if value in (None, ""):
+        return None
+    price = Decimal(value)
+    if not price.is_finite() or price < 0:
+        raise InvalidOperation
+    return price
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def browse_products(request):
+    """
+    Marketplace listing with filters and facet counts. Filters (repeat a
+    parameter to select several values): ?store=, ?category=,
+    ?subcategory=, ?offer= (active offers only), ?size= (in stock),
+    ?min_price= / ?max_price=, ?in_stock=1. Newest first, paginated with
+    ?cursor= / ?page_size=.
+    """
+    try:
+        filters = {
+            "store": int(request.query_params.get("store") or 0) or None,
+            "categories": _id_list(request, "category"),
+            "subcategories": _id_list(request, "subcategory"),
+            "offers": _id_list(request, "offer"),
+            "sizes": [value for value in request.query_params.getlist("size") if value],
+            "min_price": _price(request, "min_price"),
+            "max_price": _price(request, "max_price"),
+            "in_stock": request.query_params.get("in_stock") in ("1", "true"),
+        }
+    except (ValueError, InvalidOperation):
+        return Response({"success": False, "message": "Invalid filter."}, status=400)
+
+    paginator = NewestFirstPagination()
+    page = paginator.paginate_queryset(matching_cards(filters), request)
+    response = paginator.get_paginated_response(
+        ProductCardSerializer(page, many=True, context={"request": request}).data
+    )
+    response.data["facets"] = facet_counts(filters)
+    return response
 
 
 # ==========================================================
@@ -154,6 +352,9 @@ def update_category(request, pk):
     serializer = StoreCategorySerializer(category, data=data, partial=True, context={"request": request})
     if serializer.is_valid():
         serializer.save()
+        product_ids = list(category.products.values_list("id", flat=True))
+        index_products(product_ids)
+        refresh_cards(product_ids)
         return Response(serializer.data)
     return Response(serializer.errors, status=400)
 
@@ -195,6 +396,9 @@ def update_subcategory(request, pk):
     serializer = StoreSubCategorySerializer(sub, data=request.data, partial=True, context={"request": request})
     if serializer.is_valid():
         serializer.save()
+        product_ids = list(sub.products.values_list("id", flat=True))
+        index_products(product_ids)
+        refresh_cards(product_ids)
         return Response(serializer.data)
     return Response(serializer.errors, status=400)
 
@@ -245,6 +449,10 @@ def update_offer_category(request, pk):
 
     if serializer.is_valid():
         serializer.save()
+        # Title and dates feed the offer facet as well as the cards
+        product_ids = list(offer.products.values_list("id", flat=True))
+        refresh_availability(product_ids)
+        refresh_cards(product_ids)
         return Response(serializer.data)
 
     return Response(serializer.errors, status=400)
@@ -258,5 +466,8 @@ def delete_offer_category(request, pk):
     except OfferCategory.DoesNotExist:
         return Response({"error": "Offer category not found"}, status=404)
 
+    product_ids = list(offer.products.values_list("id", flat=True))
     offer.delete()
+    refresh_availability(product_ids)
+    refresh_cards(product_ids)
     return Response({"message": "Offer deleted"}, status=200)
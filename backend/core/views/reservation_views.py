@@ -4,20 +4,27 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.db.models import Prefetch
 from decimal import Decimal
 import json
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Reservation, Product, ProductSize, Store, Sale, CustomerCredit
+from core.idempotency import idempotent
+from core.models import Reservation, ProductImage, ProductSize, Store, Sale
 from core.serializers import ReservationPOSSerializer, ReservationSerializer
+from core.services.credit_service import issue_credits
+from core.services.customer_service import record_customer_reservation, record_customer_sale
+from core.services.inventory_service import move_stock
+from core.services.rollup_service import complete_reservation, record_reservation, record_sale
+from core.services.sale_line_service import write_sale_lines
 
 # -----------------------------
 # ✅ Reservation ViewSet
 # -----------------------------
 class ReservationViewSet(viewsets.ModelViewSet):
     queryset = Reservation.objects.select_related(
-        "product", "product__store", "size", "customer"
-    ).prefetch_related("product__sizes").order_by("-created_at")
+        "product", "product__store", "product__card", "size", "customer"
+    ).order_by("-created_at")
     serializer_class = ReservationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -27,6 +34,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
             return self.queryset.filter(product__store=user.store)
         return self.queryset.filter(customer=user)
 
+    @transaction.atomic
     def perform_create(self, serializer):
         user = self.request.user
         # Attach customer
@@ -37,6 +45,8 @@ class ReservationViewSet(viewsets.ModelViewSet):
         elif hasattr(user, "store"):
             reservation.store = user.store
         reservation.save()
+        record_reservation(reservation)
+        record_customer_reservation(reservation)
 
 
 # -----------------------------
@@ -45,6 +55,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
 class VerifyReservationCodeView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @transaction.atomic
     def post(self, request, pk):
         try:
             reservation = Reservation.objects.select_related("product", "size").get(pk=pk)
@@ -64,15 +75,13 @@ class VerifyReservationCodeView(APIView):
         if size.quantity < reservation.quantity:
             return Response({"success": False, "message": f"Not enough stock for {size.product.name} ({size.size_label})."}, status=400)
 
-        
-
-        reservation.status = "completed"
-        reservation.save()
+        complete_reservation(reservation)
 
         # Auto log sale
-        Sale.objects.create(
+        sale = Sale.objects.create(
             store=reservation.product.store,
             products=[{
+                "product_id": reservation.product_id,
                 "product": reservation.product.name,
                 "size": reservation.size.size_label,
                 "price": str(reservation.size.price),
@@ -81,6 +90,13 @@ class VerifyReservationCodeView(APIView):
             }],
             total_amount=Decimal(reservation.advance_amount),
         )
+        write_sale_lines(
+            sale,
+            products_by_id={reservation.product_id: reservation.product},
+            sizes_by_key={(reservation.product_id, size.size_label): size},
+        )
+        record_sale(sale)
+        record_customer_sale(sale)
 
         return Response({
             "success": True,
@@ -95,6 +111,8 @@ class VerifyReservationCodeView(APIView):
 # -----------------------------
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated])
+@transaction.atomic
+@idempotent
 def create_reservation_sale(request):
     user = request.user
     data = request.data
@@ -123,6 +141,26 @@ def create_reservation_sale(request):
         except Exception:
             return Response({"success": False, "message": "Invalid subtotal, discount, or total."}, status=400)
 
+        lines = []
+        for item in cart_items:
+            product_id = item.get("product_id")
+            size_label = item.get("size_label")
+            if not product_id or not size_label:
+                return Response(
+                    {"success": False, "message": "Each cart item must have product_id and size_label."},
+                    status=400,
+                )
+            try:
+                quantity = int(item.get("quantity", 1))
+            except (TypeError, ValueError):
+                quantity = 0
+            if quantity <= 0:
+                return Response(
+                    {"success": False, "message": f"Invalid quantity for product {product_id}."},
+                    status=400,
+                )
+            lines.append((int(product_id), size_label, quantity))
+
         customer_data = data.get("customer", {})
         payment_data = data.get("payment", {})
         credit_amount = Decimal(str(payment_data.get("credit_amount", 0) or 0))
@@ -144,42 +182,31 @@ def create_reservation_sale(request):
                 is_credit=(credit_amount > 0),
             )
 
-            # 6️⃣ Deduct stock for each cart item
-            for item in cart_items:
-                product_id = item.get("product_id")
-                size_label = item.get("size_label")
-                quantity = int(item.get("quantity", 1))
-
-                if not product_id or not size_label:
-                    raise ValueError("Each cart item must have product_id and size_label.")
-
-                product = get_object_or_404(Product, id=product_id, store=store)
-                
-                # Ensure size belongs to product
-                try:
-                    size_obj = ProductSize.objects.get(product=product, size_label=size_label)
-                except ProductSize.DoesNotExist:
-                    raise ValueError(f"Size '{size_label}' not found for product '{product.name}'.")
-
-                if size_obj.quantity < quantity:
-                    raise ValueError(f"Not enough stock for {product.name} ({size_label}).")
-
-                size_obj.quantity -= quantity
-                size_obj.save()
+            # 6️⃣ Deduct stock for every cart item (one read, one conditional UPDATE)
+            sizes = {
+                (s.product_id, s.size_label): s
+                for s in ProductSize.objects.filter(
+                    product_id__in={product_id for product_id, _, _ in lines}, product__store=store
+                ).select_related("product")
+            }
+            moves = []
+            for product_id, size_label, quantity in lines:
+                size_obj = sizes.get((product_id, size_label))
+                if size_obj is None:
+                    raise ValueError(f"Size '{size_label}' not found for product {product_id}.")
+                moves.append((size_obj, -quantity, sale.invoice_no))
+            move_stock(store, moves, "reservation_sale", user=user)
+
+            write_sale_lines(sale)
 
             # 7️⃣ Complete reservation
-            reservation.status = "completed"
-            reservation.save()
+            complete_reservation(reservation)
 
             # 8️⃣ Handle customer credit
-            if credit_amount > 0:
-                CustomerCredit.objects.create(
-                    store=store,
-                    customer_name=customer_data.get("name", ""),
-                    customer_phone=customer_data.get("phone", ""),
-                    amount=credit_amount,
-                    reference_sale=sale,
-                )
+            issue_credits([sale], user=user)
+
+            record_sale(sale)
+            record_customer_sale(sale)
 
         # ✅ Success response
         return Response({
@@ -191,6 +218,7 @@ def create_reservation_sale(request):
 
     except Exception as e:
         # Catch all errors
+        transaction.set_rollback(True)
         return Response({"success": False, "message": str(e)}, status=400)
 
 
@@ -203,8 +231,14 @@ def my_store_reservations(request):
         return Response({"error": "Store not found"}, status=404)
 
     reservations = Reservation.objects.filter(product__store=store)\
-        .select_related("product", "size", "customer")\
-        .prefetch_related("product__sizes", "product__images")\
+        .select_related(
+            "product__store", "product__store_category", "product__store_subcategory",
+            "product__offer_category", "size", "customer",
+        )\
+        .prefetch_related(
+            Prefetch("product__sizes", queryset=ProductSize.objects.order_by("id")),
+            Prefetch("product__images", queryset=ProductImage.objects.order_by("id")),
+        )\
         .order_by("-created_at")
 
     serializer = ReservationPOSSerializer(reservations, many=True, context={"request": request})
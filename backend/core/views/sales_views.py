@@ -1,12 +1,20 @@
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from django.db import transaction
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import permissions, status
 from rest_framework.response import Response
-from core.models import (
-    Sale, ProductSize, Reservation, CustomerCredit, Return, Store, Product, generate_invoice_no
-)
-from core.serializers import ProductSerializer
+from core.models import Sale, ProductSize, Reservation, Product, StoreCustomer
+from core.idempotency import idempotent
+from core.pagination import cursor_response, decode_cursor, get_page_size, keyset_page
+from core.serializers import ProductSerializer, StoreCustomerSerializer
+from core.services.cache_service import bump_store_version
+from core.services.credit_service import issue_credits, outstanding_balance, settle_customer_credit
+from core.services.customer_service import normalize_phone, record_customer_sale, search_customers
+from core.services.inventory_service import InsufficientStock, move_stock
+from core.services.pos_sync_service import SYNC_MAX_SALES, sync_sales as sync_sales_batch
+from core.services.return_service import ReturnRejected, process_invoice_return
+from core.services.rollup_service import complete_reservation, record_sale
+from core.services.sale_line_service import write_sale_lines
 # -------------------------------
 # GET CUSTOMER INFO
 # -------------------------------
@@ -24,38 +32,97 @@ def get_customer_info(request):
     if not store:
         return Response({"success": False, "message": "User not linked to store."}, status=400)
 
-    latest_sale = (
-        Sale.objects.filter(store=store, customer_phone=phone)
-        .order_by("-created_at")
+    customer = (
+        StoreCustomer.objects.filter(store=store, phone=normalize_phone(phone))
+        .only("name", "outstanding_credit")
         .first()
     )
-    credit_entries = CustomerCredit.objects.filter(store=store, customer_phone=phone)
-    outstanding = sum([c.amount for c in credit_entries], Decimal("0.00"))
 
     return Response({
         "success": True,
         "data": {
-            "name": latest_sale.customer_name if latest_sale else "",
+            "name": customer.name if customer else "",
             "phone": phone,
-            "outstanding_credit": str(outstanding),
+            "outstanding_credit": str(customer.outstanding_credit if customer else Decimal("0.00")),
         }
     })
 
 
 # -------------------------------
-# CREATE SALE (FIXED)
+# CUSTOMER TYPEAHEAD
+# -------------------------------
+TYPEAHEAD_MAX = 25
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def search_store_customers(request):
+    """?q=<phone digits or name prefix>&limit= (default 10); matches as the cashier types."""
+    store = getattr(request.user, "store", None)
+    if not store:
+        return Response({"success": False, "message": "User not linked to store."}, status=400)
+
+    try:
+        limit = max(1, min(int(request.query_params.get("limit", 10)), TYPEAHEAD_MAX))
+    except (TypeError, ValueError):
+        limit = 10
+
+    rows = search_customers(store, request.query_params.get("q"), limit=limit)
+    for row in rows:
+        row["outstanding_credit"] = str(row["outstanding_credit"])
+    return Response({"success": True, "results": rows})
+
+
+# -------------------------------
+# STORE CUSTOMERS (paginated, sortable)
+# -------------------------------
+CUSTOMER_ORDERING = ("phone", "name", "total_orders", "total_spent", "outstanding_credit", "last_purchase")
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def list_store_customers(request):
+    """?ordering=<field> or -<field> (default -last_purchase), cursor paginated."""
+    store = getattr(request.user, "store", None)
+    if not store:
+        return Response({"success": False, "message": "User not linked to store."}, status=400)
+
+    ordering = request.query_params.get("ordering", "-last_purchase")
+    field = ordering.lstrip("-")
+    if field not in CUSTOMER_ORDERING:
+        return Response(
+            {"success": False, "message": f"ordering must be one of {', '.join(CUSTOMER_ORDERING)}"},
+            status=400,
+        )
+
+    try:
+        rows, next_after = keyset_page(
+            StoreCustomer.objects.filter(store=store),
+            field,
+            after=decode_cursor(request),
+            limit=get_page_size(request),
+            descending=ordering.startswith("-"),
+        )
+    except (ValueError, TypeError):
+        return Response({"success": False, "message": "Invalid cursor."}, status=400)
+
+    return cursor_response(request, StoreCustomerSerializer(rows, many=True).data, next_after)
+
+
+# -------------------------------
+# CREATE SALE
 # -------------------------------
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated])
 @transaction.atomic
+@idempotent
 def create_sale(request):
     """
     Handles sale creation, reservation linkage, credit settlement, and stock deduction.
-    Includes FIXED PRODUCT NORMALIZATION so analytics shows correct item names.
+    Every cart line is resolved from one batched read, and stock for all lines
+    is decremented by one conditional UPDATE, so the query count does not grow
+    with the cart.
     """
-    print("=== 🧾 DEBUG: POS Checkout Payload ===")
-    print(request.data)
-
     try:
         user = request.user
         data = request.data
@@ -84,20 +151,35 @@ def create_sale(request):
             )
 
         # ------------------------------------------
-        # STOCK VALIDATION
+        # STOCK VALIDATION (one read for every line)
         # ------------------------------------------
-        product_ids = [item.get("id") or item.get("product_id") for item in cart]
-        size_objs = ProductSize.objects.filter(product_id__in=product_ids)
-        size_map = {(s.product_id, s.size_label): s for s in size_objs}
-
+        lines = []
         for item in cart:
             product_id = item.get("id") or item.get("product_id")
-            qty = int(item.get("quantity", 0))
             size_label = (
                 item.get("size_label")
                 or (item.get("sizes", [{}])[0].get("size_label") if item.get("sizes") else None)
             )
+            try:
+                qty = int(item.get("quantity", 0))
+            except (TypeError, ValueError):
+                qty = 0
+            if qty <= 0:
+                return Response(
+                    {"success": False, "message": f"Invalid quantity for product {product_id}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            lines.append((product_id, size_label, qty))
 
+        size_map = {
+            (s.product_id, s.size_label): s
+            for s in ProductSize.objects.filter(
+                product_id__in={product_id for product_id, _, _ in lines}, product__store=store
+            ).select_related("product")
+        }
+
+        demand = {}
+        for product_id, size_label, qty in lines:
             size_obj = size_map.get((product_id, size_label))
             if not size_obj:
                 return Response(
@@ -105,7 +187,8 @@ def create_sale(request):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            if size_obj.quantity < qty:
+            demand[size_obj.id] = demand.get(size_obj.id, 0) + qty
+            if size_obj.quantity < demand[size_obj.id]:
                 return Response(
                     {
                         "success": False,
@@ -114,109 +197,100 @@ def create_sale(request):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            size_obj.quantity -= qty
-            size_obj.save()
-
         # ------------------------------------------
         # RESERVATION
         # ------------------------------------------
         reservation = None
         if reservation_id:
             try:
-                reservation = Reservation.objects.get(id=reservation_id)
-
-                if reservation.product.store != store:
-                    return Response(
-                        {"success": False, "message": "Reservation does not belong to this store."},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-                reservation.status = "completed"
-                reservation.save()
-
+                reservation = Reservation.objects.select_related("product__store").get(id=reservation_id)
             except Reservation.DoesNotExist:
+                transaction.set_rollback(True)
                 return Response(
                     {"success": False, "message": "Invalid reservation ID."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
+            if reservation.product.store_id != store.id:
+                transaction.set_rollback(True)
+                return Response(
+                    {"success": False, "message": "Reservation does not belong to this store."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            complete_reservation(reservation)
+
         # ------------------------------------------
-        # 🔥 FIXED PART — Normalize product data
+        # Normalize product data from the rows read above
         # ------------------------------------------
         fixed_products = []
-
-        for item in cart:
-            product_id = item.get("product_id") or item.get("id")
-            size_label = item.get("size_label") or (
-                item.get("sizes", [{}])[0].get("size_label") if item.get("sizes") else None
-            )
-            qty = int(item.get("quantity", 1))
-
-            # Fetch real DB objects
-            product_obj = Product.objects.filter(id=product_id).first()
-            size_obj = ProductSize.objects.filter(product_id=product_id, size_label=size_label).first()
-
+        for product_id, size_label, qty in lines:
+            size_obj = size_map[(product_id, size_label)]
             fixed_products.append({
                 "product_id": product_id,
-                "product": product_obj.name if product_obj else "Unknown Product",
+                "product": size_obj.product.name,
                 "size": size_label or "",
-                "price": str(size_obj.price) if size_obj else "0",
+                "price": str(size_obj.price),
                 "quantity": qty,
             })
 
+        # ------------------------------------------
+        # PAYMENT LOGIC
+        # ------------------------------------------
+        paid = Decimal(str(payment.get("paid_amount", 0)))
+        credit = Decimal(str(payment.get("credit_amount", 0)))
+        settle_amount = Decimal(str(payment.get("settle_credit_amount", 0) or 0))
+        customer_phone = customer.get("phone")
+
         # ------------------------------------------
         # CREATE SALE WITH FIXED PRODUCT LIST
         # ------------------------------------------
         sale = Sale.objects.create(
             store=store,
-            products=fixed_products,  # ← Fixed here
+            products=fixed_products,
             subtotal=subtotal,
             discount=discount,
             total_amount=total,
             customer_name=customer.get("name"),
-            customer_phone=customer.get("phone"),
+            customer_phone=customer_phone,
             payment=payment,
             reservation=reservation,
+            is_credit=credit > 0,
+            credit_amount=credit if credit > 0 else Decimal("0.00"),
         )
 
         # ------------------------------------------
-        # PAYMENT LOGIC
+        # STOCK DEDUCTION (one conditional UPDATE)
         # ------------------------------------------
-        paid = Decimal(str(payment.get("paid_amount", 0)))
-        credit = Decimal(str(payment.get("credit_amount", 0)))
-        settle_amount = Decimal(str(payment.get("settle_credit_amount", 0) or 0))
-        customer_phone = customer.get("phone")
-
-        if credit > 0:
-            sale.is_credit = True
-            sale.credit_amount = credit
-            sale.save()
-
-            CustomerCredit.objects.create(
-                store=store,
-                customer_name=customer.get("name"),
-                customer_phone=customer_phone,
-                amount=credit,
-                reference_sale=sale,
+        try:
+            move_stock(
+                store,
+                [(size_map[(product_id, size_label)], -qty, sale.invoice_no) for product_id, size_label, qty in lines],
+                "sale",
+                user=user,
+            )
+        except InsufficientStock:
+            # Stock moved between the read and the update (another checkout)
+            transaction.set_rollback(True)
+            return Response(
+                {"success": False, "message": "Insufficient stock, please retry."},
+                status=status.HTTP_409_CONFLICT,
             )
 
+        write_sale_lines(
+            sale,
+            products_by_id={s.product_id: s.product for s in size_map.values()},
+            sizes_by_key=size_map,
+        )
+
+        issue_credits([sale], user=user)
+
         # Credit settlement logic
         if settle_amount > 0 and customer_phone:
-            credits = CustomerCredit.objects.filter(
-                store=store, customer_phone=customer_phone
-            ).order_by("-created_at")
-
-            remaining = settle_amount
-            for credit_entry in credits:
-                if remaining <= 0:
-                    break
-                if credit_entry.amount <= remaining:
-                    remaining -= credit_entry.amount
-                    credit_entry.amount = 0
-                else:
-                    credit_entry.amount -= remaining
-                    remaining = 0
-                credit_entry.save()
+            settle_customer_credit(store, customer_phone, settle_amount, user=user, sale=sale)
+
+        record_sale(sale)
+        record_customer_sale(sale)
 
         return Response(
             {
@@ -232,51 +306,102 @@ def create_sale(request):
         )
 
     except Exception as e:
+        transaction.set_rollback(True)
         return Response(
             {"success": False, "message": f"Error: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
 
+# -------------------------------
+# OFFLINE SYNC (queued POS sales)
+# -------------------------------
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def sync_sales(request):
+    """
+    Body: {"sales": [{client_id, cart, subtotal, discount, total, customer,
+    payment, created_at?}, ...]} in the order they were rung up. Returns a
+    result per sale: created / duplicate / insufficient_stock / invalid.
+    """
+    store = getattr(request.user, "store", None)
+    if not store:
+        return Response({"success": False, "message": "User not linked to a store."}, status=400)
+
+    entries = request.data.get("sales")
+    if not isinstance(entries, list) or not entries:
+        return Response({"success": False, "message": "sales must be a non-empty list."}, status=400)
+    if len(entries) > SYNC_MAX_SALES:
+        return Response(
+            {"success": False, "message": f"At most {SYNC_MAX_SALES} sales per request."},
+            status=400,
+        )
+
+    results = sync_sales_batch(store, entries)
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+
+    return Response({"success": True, "counts": counts, "results": results})
+
+
 # -------------------------------
 # PROCESS RETURN
 # -------------------------------
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated])
 @transaction.atomic
+@idempotent
 def process_return(request):
-    """Process product return"""
-    try:
-        user = request.user
-        store = getattr(user, "store", None)
-        payload = request.data
-        sale_item = payload.get("sale_item")
-        reason = payload.get("reason", "")
-        invoice_no = payload.get("invoice_no")
-
-        if not (store and sale_item):
-            return Response({"success": False, "message": "Invalid data."}, status=400)
-
-        product_id = sale_item.get("product_id") or sale_item.get("id")
-        size_label = sale_item.get("size_label")
-        qty = int(sale_item.get("quantity", 0))
+    """
+    Return items of one invoice: {"invoice_no", "lines": [{"sale_line_id"} or
+    {"product_id", "size_label"}, "quantity"], "reason"}. The older
+    single-item {"sale_item": {...}} body is accepted as a one-line return.
+    Lines are checked against what the invoice sold (less earlier returns)
+    and restocked together.
+    """
+    user = request.user
+    store = getattr(user, "store", None)
+    if not store:
+        return Response({"success": False, "message": "User not linked to store."}, status=400)
 
-        size_obj = ProductSize.objects.get(product_id=product_id, size_label=size_label)
-        size_obj.quantity += qty
-        size_obj.save()
+    payload = request.data
+    lines = payload.get("lines")
+    if lines is None and payload.get("sale_item"):
+        lines = [payload["sale_item"]]
 
-        Return.objects.create(
-            store=store,
-            sale_item=sale_item,
-            reason=reason,
-            invoice_no=invoice_no,
-            processed_by=user,
+    try:
+        sale, returns, not_restocked = process_invoice_return(
+            store, payload.get("invoice_no"), lines, reason=payload.get("reason", ""), user=user
         )
+    except ReturnRejected as e:
+        return Response({"success": False, "message": e.message, "errors": e.errors}, status=e.status)
 
-        return Response({"success": True, "message": "Return processed."}, status=201)
-
-    except Exception as e:
-        return Response({"success": False, "message": str(e)}, status=500)
+    return Response(
+        {
+            "success": True,
+            "message": (
+                "Return processed, but some items were not restocked (their product or size was deleted)."
+                if not_restocked else "Return processed."
+            ),
+            "data": {
+                "invoice_no": sale.invoice_no,
+                "return_ids": [ret.id for ret in returns],
+                "units_returned": sum(ret.quantity for ret in returns),
+                "refund_amount": str(sum((ret.amount for ret in returns), Decimal("0.00"))),
+                "not_restocked": [
+                    {
+                        "return_id": ret.id,
+                        "product": ret.sale_item["product"],
+                        "size_label": ret.sale_item["size_label"],
+                        "quantity": ret.quantity,
+                    }
+                    for ret in not_restocked
+                ],
+            },
+        },
+        status=201,
+    )
 
 
 # -------------------------------
@@ -292,45 +417,28 @@ def settle_credit(request):
         return Response({"success": False, "message": "User not linked to store."}, status=400)
 
     phone = request.data.get("phone")
-    amount = Decimal(str(request.data.get("amount") or 0))
+    try:
+        amount = Decimal(str(request.data.get("amount") or 0))
+    except InvalidOperation:
+        return Response({"success": False, "message": "Invalid amount."}, status=400)
 
     if not phone or amount <= 0:
         return Response({"success": False, "message": "Invalid phone or amount."}, status=400)
 
-    try:
-        credits = CustomerCredit.objects.filter(store=store, customer_phone=phone).order_by("-created_at")
-        total_credit = sum(c.amount for c in credits)
-        if total_credit <= 0:
-            return Response({"success": False, "message": "No outstanding credit to settle."}, status=400)
-
-        if amount > total_credit:
-            amount = total_credit
-
-        remaining = amount
-        for credit in credits:
-            if remaining <= 0:
-                break
-            if credit.amount <= remaining:
-                remaining -= credit.amount
-                credit.amount = 0
-            else:
-                credit.amount -= remaining
-                remaining = 0
-            credit.save()
-
-        remaining_credit = sum(
-            c.amount for c in CustomerCredit.objects.filter(store=store, customer_phone=phone)
-        )
+    if outstanding_balance(store, phone) <= 0:
+        return Response({"success": False, "message": "No outstanding credit to settle."}, status=400)
 
-        return Response({
-            "success": True,
-            "message": f"Credit settled successfully. ₹{amount} reduced from outstanding.",
-            "settled_amount": str(amount),
-            "remaining_credit": str(remaining_credit),
-        })
+    amount = settle_customer_credit(store, phone, amount, user=user)
+    bump_store_version(store.id)
 
-    except Exception as e:
-        return Response({"success": False, "message": str(e)}, status=500)
+    remaining_credit = outstanding_balance(store, phone)
+
+    return Response({
+        "success": True,
+        "message": f"Credit settled successfully. ₹{amount} reduced from outstanding.",
+        "settled_amount": str(amount),
+        "remaining_credit": str(remaining_credit),
+    })
 
 
 # -------------------------------
@@ -359,28 +467,36 @@ def product_detail(request, pk):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def update_stock_after_sale(request):
+    """Deduct stock for {"items": [{"size_id", "quantity"}]} in one conditional UPDATE."""
+    store = getattr(request.user, "store", None)
+    if not store:
+        return Response({"error": "User not linked to store."}, status=status.HTTP_400_BAD_REQUEST)
+
+    wanted = {}
     try:
-        items = request.data.get("items", [])
-        for item in items:
+        for item in request.data.get("items", []):
             size_id = item.get("size_id")
             qty = int(item.get("quantity", 0))
-            if not size_id or qty <= 0:
-                continue
-
-            size = ProductSize.objects.filter(id=size_id).first()
-            if not size:
-                continue
-
-            if size.quantity < qty:
-                return Response(
-                    {"error": f"Insufficient stock for size {size.size_label}"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            if size_id and qty > 0:
+                wanted[int(size_id)] = wanted.get(int(size_id), 0) + qty
+    except (AttributeError, TypeError, ValueError):
+        return Response(
+            {"error": "items must be a list of {size_id, quantity}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-            size.quantity -= qty
-            size.save()
+    sizes = ProductSize.objects.filter(id__in=wanted, product__store=store).select_related("product").in_bulk()
+    try:
+        move_stock(
+            store,
+            [(sizes[size_id], -qty, "update-stock") for size_id, qty in wanted.items() if size_id in sizes],
+            "adjust",
+            user=request.user,
+        )
+    except InsufficientStock as e:
+        return Response(
+            {"error": f"Insufficient stock for size {e.size.size_label}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-        return Response({"success": True, "message": "Stock updated successfully"})
-    except Exception as e:
-        print("Error updating stock:", e)
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return Response({"success": True, "message": "Stock updated successfully"})
@@ -2,8 +2,11 @@ from rest_framework import viewsets, generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from core.models import Store
-from core.serializers import StoreSerializer
+from core.models import ProductCard, ProductImage, Store
+from core.serializers import ProductCardSerializer, StoreSerializer
+from core.services.card_service import refresh_cards
+from core.services.image_service import image_variants, srcset
+from core.services.search_service import index_products
 
 
 class StoreViewSet(viewsets.ModelViewSet):
@@ -14,6 +17,14 @@ class StoreViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    def perform_update(self, serializer):
+        old_name = serializer.instance.store_name
+        store = serializer.save()
+        if store.store_name != old_name:
+            product_ids = list(store.products.values_list("id", flat=True))
+            index_products(product_ids)
+            refresh_cards(product_ids)
+
 
 # core/views.py
 class SwitchToStoreView(generics.GenericAPIView):
@@ -41,6 +52,21 @@ class SwitchToStoreView(generics.GenericAPIView):
         return Response(StoreSerializer(store).data, status=201)
 
 
+def _store_product(card, descriptions, images):
+    """A card plus what store pages read from the full product: price of the first size, description, gallery."""
+    sizes = [
+        {"size_label": size["size_label"], "price": float(size["price"]), "quantity": size["quantity"]}
+        for size in card["sizes"]
+    ]
+    return {
+        **card,
+        "price": sizes[0]["price"] if sizes else None,
+        "description": descriptions.get(card["id"]),
+        "images": images.get(card["id"], []),
+        "sizes": sizes,
+    }
+
+
 # ✅ FINALIZED store_detail VIEW
 # ✅ FINALIZED store_detail VIEW (RESTORED PRICE + DETAILS)
 @api_view(["GET"])
@@ -50,53 +76,17 @@ def store_detail(request, pk):
     except Store.DoesNotExist:
         return Response({"error": "Store not found"}, status=404)
 
-    # PRODUCT FETCHING
-    products = store.products.select_related(
-        "store_category",
-        "store_subcategory",
-        "offer_category",
-    ).prefetch_related("sizes", "images")
+    # PRODUCT CARDS (one query, see core.services.card_service)
+    cards = ProductCard.objects.filter(store=store).order_by("pk")
+    cards = ProductCardSerializer(cards, many=True, context={"request": request}).data
 
-    # =============================
-    # FULL PRODUCT SERIALIZER
-    # =============================
-    def serialize_product(p):
-        first_size = p.sizes.first()
-        price = float(first_size.price) if first_size else None
-
-        return {
-            "id": p.id,
-            "name": p.name,
-            "price": price,
-            "description": p.description,
-
-            "store_id": p.store.id,
-            "store_name": p.store.store_name,
-
-            "store_category": p.store_category.name if p.store_category else None,
-            "store_subcategory": p.store_subcategory.name if p.store_subcategory else None,
-            "offer_category": p.offer_category.title if p.offer_category else None,
-
-            "main_image": request.build_absolute_uri(p.main_image.url)
-            if p.main_image else None,
-
-            "images": [
-                request.build_absolute_uri(img.image.url)
-                for img in p.images.all()
-                if img.image
-            ],
-
-            "sizes": [
-                {
-                    "size_label": s.size_label,
-                    "price": float(s.price),
-                    "quantity": s.quantity
-                }
-                for s in p.sizes.all()
-            ],
-
-            "created_at": p.created_at,
-        }
+    # Full description and gallery are not on the card
+    descriptions = dict(store.products.values_list("id", "description"))
+    images = {}
+    for image in ProductImage.objects.filter(product__store=store).only("product_id", "image").order_by("id"):
+        if image.image:
+            images.setdefault(image.product_id, []).append(request.build_absolute_uri(image.image.url))
+    serialized = [_store_product(card, descriptions, images) for card in cards]
 
     # =============================
     # CATEGORY BLOCKS
@@ -107,6 +97,7 @@ def store_detail(request, pk):
             "name": c.name,
             "dp_image": request.build_absolute_uri(c.dp_image.url)
             if hasattr(c, "dp_image") and c.dp_image else None,
+            "dp_image_srcset": srcset(image_variants(c.dp_image), request.build_absolute_uri),
         }
         for c in store.categories.all()
     ]
@@ -122,6 +113,7 @@ def store_detail(request, pk):
                 "name": s.name,
                 "dp_image": request.build_absolute_uri(s.dp_image.url)
                 if hasattr(s, "dp_image") and s.dp_image else None,
+                "dp_image_srcset": srcset(image_variants(s.dp_image), request.build_absolute_uri),
             }
             for s in cat.subcategories.all()
         ]
@@ -135,6 +127,7 @@ def store_detail(request, pk):
             "title": o.title,
             "banner_image": request.build_absolute_uri(o.banner_image.url)
             if o.banner_image else None,
+            "banner_image_srcset": srcset(image_variants(o.banner_image), request.build_absolute_uri),
             "start_date": o.start_date,
             "end_date": o.end_date,
             "is_active": o.is_active,
@@ -146,22 +139,21 @@ def store_detail(request, pk):
     # OFFER GROUPS (FULL PRODUCT)
     # =============================
     offer_groups = {}
-    for p in products:
-        if p.offer_category:
-            title = p.offer_category.title
-            offer_groups.setdefault(title, []).append(serialize_product(p))
+    for card in serialized:
+        if card["offer_category"]:
+            offer_groups.setdefault(card["offer_category"], []).append(card)
 
     # =============================
     # CATEGORY GROUPS (FULL PRODUCT)
     # =============================
     category_groups = {}
-    for p in products:
-        cat = p.store_category.name if p.store_category else "Uncategorized"
-        sub = p.store_subcategory.name if p.store_subcategory else "Other"
+    for card in serialized:
+        cat = card["store_category"] or "Uncategorized"
+        sub = card["store_subcategory"] or "Other"
 
         category_groups.setdefault(cat, {})
         category_groups[cat].setdefault(sub, [])
-        category_groups[cat][sub].append(serialize_product(p))
+        category_groups[cat][sub].append(card)
 
     # =============================
     # FINAL RESPONSE
@@ -175,6 +167,8 @@ def store_detail(request, pk):
 
         "logo": request.build_absolute_uri(store.logo.url) if store.logo else None,
         "cover_image": request.build_absolute_uri(store.cover_image.url) if store.cover_image else None,
+        "logo_srcset": srcset(image_variants(store.logo), request.build_absolute_uri),
+        "cover_image_srcset": srcset(image_variants(store.cover_image), request.build_absolute_uri),
 
         "category_blocks": category_blocks,
         "subcategory_blocks": subcategory_blocks,
@@ -211,7 +205,13 @@ def update_store_profile(request):
     serializer = StoreSerializer(store, data=request.data, partial=True, context={"request": request})
 
     if serializer.is_valid():
+        old_name = store.store_name
         serializer.save()
+        if store.store_name != old_name:
+            # Store name is part of every product's search document and card
+            product_ids = list(store.products.values_list("id", flat=True))
+            index_products(product_ids)
+            refresh_cards(product_ids)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -108,6 +108,21 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Take the write lock when a transaction starts. Checkouts, syncs and
+        # returns read stock and then write in one transaction
+        # (select_for_update is a no-op on SQLite); in the default DEFERRED
+        # mode SQLite cannot wait to upgrade that read lock while another
+        # writer commits, and fails at once with "database is locked"
+        # whatever the timeout. IMMEDIATE makes them queue for up to
+        # `timeout` seconds instead (CheckoutConcurrencyTests). Only atomic
+        # blocks are affected; autocommit reads never take the write lock.
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+        # On disk rather than in memory, so concurrency tests see the same
+        # locking (and busy timeout) as the real database.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -133,6 +148,9 @@ TIME_ZONE = "UTC"
 USE_I18N = True
 USE_TZ = True
 
+# Default reporting timezone for stores (dashboard buckets, rollup days)
+STORE_TIME_ZONE = os.environ.get("STORE_TIME_ZONE", "Asia/Kolkata")
+
 
 # ----------------------------
 # STATIC / MEDIA (FIXED)
@@ -175,11 +193,59 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "idempotency-key",
+    "if-none-match",
 ]
 
+# Catalog sync (products/sync/) sends its version as an ETag
+CORS_EXPOSE_HEADERS = ["etag"]
+
 CORS_ALLOW_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
 
 
+# ----------------------------
+# CACHE
+# ----------------------------
+# Local memory by default; CACHE_BACKEND=file for a shared on-disk cache
+# across gunicorn workers, or REDIS_URL to use Redis (needs redis-py).
+REDIS_URL = os.environ.get("REDIS_URL")
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+elif CACHE_BACKEND == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("CACHE_DIR", str(BASE_DIR / ".cache")),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "tryvo-default",
+        }
+    }
+
+# Seconds a computed dashboard response is reused (writes invalidate earlier)
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get("DASHBOARD_CACHE_TIMEOUT", 300))
+
+# Seconds catalog facet counts are reused (not invalidated by writes)
+FACET_CACHE_TIMEOUT = int(os.environ.get("FACET_CACHE_TIMEOUT", 60))
+
+# Seconds a stored Idempotency-Key response is replayed before it expires
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+
+# Seconds deleted product / size ids are kept for POS catalog delta syncs
+CATALOG_TOMBSTONE_TTL = int(os.environ.get("CATALOG_TOMBSTONE_TTL", 30 * 24 * 60 * 60))
+
+
 # ----------------------------
 # REST FRAMEWORK + JWT
 # ----------------------------
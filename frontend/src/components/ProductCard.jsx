@@ -1,6 +1,7 @@
 import React, { useMemo, useState } from "react";
 import { useNavigate, Link } from "react-router-dom";
 import { Star } from "lucide-react";
+import ResponsiveImage from "./ResponsiveImage";
 
 export default function FlipProductCardPremium({ product }) {
   const navigate = useNavigate();
@@ -62,8 +63,10 @@ export default function FlipProductCardPremium({ product }) {
         {/* FRONT SIDE */}
         <div className="absolute w-full h-full backface-hidden rounded-3xl overflow-hidden shadow-2xl bg-gray-900">
           <div className="relative w-full h-full">
-            <img
+            <ResponsiveImage
               src={imageUrl}
+              srcset={product.main_image_srcset}
+              sizes="288px"
               alt={product.name}
               className="object-cover w-full h-full"
             />
@@ -92,7 +95,13 @@ export default function FlipProductCardPremium({ product }) {
         {/* BACK SIDE */}
         <div className="absolute w-full h-full backface-hidden rotate-y-180 rounded-3xl overflow-hidden shadow-2xl">
           <div className="absolute w-full h-full">
-            <img src={imageUrl} alt={product.name} className="object-cover w-full h-full" />
+            <ResponsiveImage
+              src={imageUrl}
+              srcset={product.main_image_srcset}
+              sizes="288px"
+              alt={product.name}
+              className="object-cover w-full h-full"
+            />
             <div className="absolute inset-0 bg-black/75"></div>
           </div>
 
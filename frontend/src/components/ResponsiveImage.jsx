@@ -0,0 +1,18 @@
+import React from "react";
+
+// Renders an uploaded image through its server-generated derivatives
+// (`*_srcset`: { webp, jpeg }), letting the browser pick the smallest
+// width that fills `sizes`. Falls back to the original when there is none.
+export default function ResponsiveImage({ src, srcset, sizes, alt = "", className, loading = "lazy" }) {
+  if (!srcset) {
+    return <img src={src} alt={alt} className={className} loading={loading} decoding="async" />;
+  }
+
+  return (
+    <picture>
+      {srcset.webp && <source type="image/webp" srcSet={srcset.webp} sizes={sizes} />}
+      {srcset.jpeg && <source type="image/jpeg" srcSet={srcset.jpeg} sizes={sizes} />}
+      <img src={src} alt={alt} className={className} loading={loading} decoding="async" />
+    </picture>
+  );
+}
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from "react";
 import { useParams } from "react-router-dom";
 import API from "../api/axios";
 import ProductCard from "./ProductCard";
+import ResponsiveImage from "./ResponsiveImage";
 
 export default function StorePage() {
   const { id } = useParams();
@@ -97,10 +98,13 @@ export default function StorePage() {
 
         <div className="absolute inset-x-0 -bottom-10 flex justify-center">
           <div className="backdrop-blur-xl bg-white/40 border border-white/60 shadow-2xl rounded-2xl px-10 py-6 text-center">
-            <img
+            <ResponsiveImage
               src={store.logo}
+              srcset={store.logo_srcset}
+              sizes="96px"
               alt={store.store_name}
               className="w-24 h-24 rounded-full border-4 border-white shadow-xl object-cover mx-auto -mt-16"
+              loading="eager"
             />
             <h1 className="text-3xl font-bold text-gray-900 mt-3">
               {store.store_name}
@@ -6,6 +6,7 @@ export default function ProductGrid({
   addToCart,
   search,
   setSearch,
+  onScan,
 }) {
   const filtered = (products || []).filter((p) =>
     (p.name || "").toLowerCase().includes((search || "").toLowerCase())
@@ -21,6 +22,20 @@ export default function ProductGrid({
           onChange={(e) => setSearch(e.target.value)}
           className="border p-2 rounded w-1/2"
         />
+        {onScan && (
+          <input
+            type="text"
+            placeholder="📷 Scan barcode / SKU"
+            onKeyDown={(e) => {
+              const code = e.target.value.trim();
+              if (e.key === "Enter" && code) {
+                onScan(code);
+                e.target.value = "";
+              }
+            }}
+            className="border p-2 rounded w-1/3"
+          />
+        )}
       </div>
 
       <div className="grid grid-cols-2 sm:grid-cols-3 lg:grid-cols-5 gap-3">
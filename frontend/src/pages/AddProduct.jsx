@@ -75,7 +75,7 @@ export default function AddProduct() {
   // SIZE SYSTEM
   // ==========================================
   const addSize = () =>
-    setSizes([...sizes, { size_label: "", price: "", quantity: "" }]);
+    setSizes([...sizes, { size_label: "", price: "", quantity: "", sku: "" }]);
 
   const updateSize = (index, field, value) => {
     const updated = [...sizes];
@@ -253,6 +253,11 @@ export default function AddProduct() {
                 type="number"
                 onChange={(e) => updateSize(i, "quantity", e.target.value)}
               />
+              <input
+                placeholder="SKU / barcode (auto if blank)"
+                value={size.sku || ""}
+                onChange={(e) => updateSize(i, "sku", e.target.value)}
+              />
               <button type="button" onClick={() => removeSize(i)}>X</button>
             </div>
           ))}
@@ -58,6 +58,9 @@ export default function BulkUpload() {
       <p className="text-gray-600 mb-6">
         Upload a <b>CSV file</b> and a <b>ZIP file containing images</b>.  
         Products will be created automatically with images, categories, sizes, and more.
+        <br />
+        Sizes column: <code>label:price:qty</code> or <code>label:price:qty:sku</code>,
+        separated by <code>|</code> (blank SKUs get a generated barcode).
       </p>
 
       <form onSubmit={handleSubmit} className="space-y-5">
@@ -116,7 +116,7 @@ export default function EditProduct() {
   // Size system
   // -----------------------------------------
   const addSize = () =>
-    setSizes([...sizes, { size_label: "", price: "", quantity: "" }]);
+    setSizes([...sizes, { size_label: "", price: "", quantity: "", sku: "" }]);
 
   const updateSize = (index, field, value) => {
     const updated = [...sizes];
@@ -261,6 +261,11 @@ export default function EditProduct() {
                 value={size.quantity}
                 onChange={(e) => updateSize(i, "quantity", e.target.value)}
               />
+              <input
+                placeholder="SKU / barcode (auto if blank)"
+                value={size.sku || ""}
+                onChange={(e) => updateSize(i, "sku", e.target.value)}
+              />
               <button type="button" onClick={() => removeSize(i)}>X</button>
             </div>
           ))}
@@ -13,11 +13,12 @@ export default function Home() {
   const [ads, setAds] = useState([]);
   const [activeBanner, setActiveBanner] = useState(0);
   const [products, setProducts] = useState([]);
-  const [stores, setStores] = useState([]);
   const [search, setSearch] = useState("");
   const [category, setCategory] = useState("all");
   const [categories, setCategories] = useState(["all"]);
   const [loading, setLoading] = useState(true);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const discoverRef = useRef(null);
 
@@ -37,45 +38,54 @@ export default function Home() {
     }
   }, []);
 
-  // Fetch Products
-  const fetchProducts = useCallback(async () => {
+  // Fetch Products: the feed, or server-side search results when a query is
+  // typed. Cursor paginated; `url` is the previous page's `next`.
+  const latestFeed = useRef(null);
+  const fetchProducts = useCallback(async (url, firstPage = false) => {
+    if (firstPage) latestFeed.current = url;
+    const feed = latestFeed.current;
     try {
-      setLoading(true);
-      const res = await API.get("products/all/");
+      if (firstPage) setLoading(true);
+      else setLoadingMore(true);
+      const res = await API.get(url);
+      // A newer query was typed while this one was in flight
+      if (feed !== latestFeed.current) return;
       const data = normalizeArray(res.data);
 
-      setProducts(data);
-
-      const uniqueCats = [
-        "all",
-        ...new Set(data.map((p) => p.category || "Uncategorized")),
-      ];
-      setCategories(uniqueCats);
+      setProducts((prev) => (firstPage ? data : [...prev, ...data]));
+      setNextPage(res.data?.next || null);
     } catch (err) {
       console.error("Error loading products:", err);
-      setProducts([]);
-      setCategories(["all"]);
+      if (firstPage && feed === latestFeed.current) setProducts([]);
     } finally {
-      setLoading(false);
+      if (feed === latestFeed.current) {
+        setLoading(false);
+        setLoadingMore(false);
+      }
     }
   }, []);
 
-  // Fetch Stores (used only for search matching)
-  const fetchStores = useCallback(async () => {
-    try {
-      const res = await API.get("stores/");
-      setStores(normalizeArray(res.data));
-    } catch (err) {
-      console.error("Error loading stores:", err);
-      setStores([]);
-    }
-  }, []);
+  // Re-query as the search box changes (debounced)
+  useEffect(() => {
+    const query = search.trim();
+    const url = query
+      ? `products/search/?q=${encodeURIComponent(query)}`
+      : "products/all/";
+    const timer = setTimeout(() => fetchProducts(url, true), query ? 250 : 0);
+    return () => clearTimeout(timer);
+  }, [search, fetchProducts]);
+
+  // Categories of the products loaded so far
+  useEffect(() => {
+    setCategories([
+      "all",
+      ...new Set(products.map((p) => p.category || "Uncategorized")),
+    ]);
+  }, [products]);
 
   useEffect(() => {
-    fetchProducts();
     fetchAds();
-    fetchStores();
-  }, [fetchProducts, fetchAds, fetchStores]);
+  }, [fetchAds]);
 
   // Auto banner slider
   useEffect(() => {
@@ -87,27 +97,11 @@ export default function Home() {
     }
   }, [ads]);
 
-  const query = search.toLowerCase();
   const safeProducts = Array.isArray(products) ? products : [];
-  const safeStores = Array.isArray(stores) ? stores : [];
-
-  // Filter products
-  const filteredProducts = safeProducts.filter((p) => {
-    const matchesSearch =
-      p.name?.toLowerCase().includes(query) ||
-      p.keywords?.toLowerCase().includes(query) ||
-      p.category?.toLowerCase().includes(query) ||
-      p.store_name?.toLowerCase().includes(query);
 
-    const matchesCategory = category === "all" || p.category === category;
-    return matchesSearch && matchesCategory;
-  });
-
-  // Filter stores only for search relevance (not rendered separately)
-  const storeMatch = safeStores.some(
-    (s) =>
-      s.store_name?.toLowerCase().includes(query) ||
-      s.owner?.toLowerCase().includes(query)
+  // Search happens on the server (name, keywords, categories, store name)
+  const filteredProducts = safeProducts.filter(
+    (p) => category === "all" || p.category === category
   );
 
   const activeAd = ads[activeBanner];
@@ -241,7 +235,7 @@ export default function Home() {
       {/* PRODUCTS */}
       <div className="p-8">
         <h2 className="text-3xl font-extrabold mb-6">
-          {search || storeMatch ? "Search Results" : "Trending on Tryvo"}
+          {search.trim() ? "Search Results" : "Trending on Tryvo"}
         </h2>
 
         {loading ? (
@@ -255,6 +249,18 @@ export default function Home() {
             ))}
           </div>
         )}
+
+        {!loading && nextPage && (
+          <div className="flex justify-center mt-10">
+            <button
+              onClick={() => fetchProducts(nextPage)}
+              disabled={loadingMore}
+              className="px-6 py-3 rounded-full border border-black font-semibold hover:bg-black hover:text-white transition disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* FOOTER */}
@@ -1,7 +1,8 @@
-import React, { useEffect, useState, useCallback } from "react";
+import React, { useEffect, useState, useCallback, useRef } from "react";
 import { useLocation } from "react-router-dom";
 import API from "../api/axios";
 import { getAuth } from "../utils/auth";
+import { syncCatalog } from "../utils/catalogSync";
 import ProductGrid from "../components/pos/ProductGrid";
 import CartSection from "../components/pos/CartSection";
 import CustomerPanel from "../components/pos/CustomerPanel";
@@ -27,6 +28,9 @@ export default function POS() {
   const [reservationId, setReservationId] = useState(null);
   const [discount, setDiscount] = useState(0);
   const [invoiceNo, setInvoiceNo] = useState("");
+  // Same key for retries of an unchanged checkout, so the server replays
+  // the first sale instead of creating (and deducting stock for) another
+  const pendingCheckout = useRef(null);
 
   const [paymentMode, setPaymentMode] = useState("cash");
   const [paidAmount, setPaidAmount] = useState(0);
@@ -90,10 +94,7 @@ export default function POS() {
   useEffect(() => {
     const fetchProducts = async () => {
       try {
-        const res = await API.get("products/my_products/", {
-          headers: { Authorization: `Bearer ${auth.access}` },
-        });
-        setProducts(Array.isArray(res.data) ? res.data : res.data.results || []);
+        setProducts(await syncCatalog());
       } catch (err) {
         console.error("Product fetch failed:", err);
       }
@@ -130,6 +131,17 @@ export default function POS() {
     });
   }, []);
 
+  // Barcode / SKU scan: one indexed lookup, straight into the cart
+  const scanToCart = useCallback(async (code) => {
+    try {
+      const res = await API.get(`pos/scan/${encodeURIComponent(code)}/`);
+      const { product_id, product, size } = res.data.data;
+      addToCart({ id: product_id, name: product, sizes: [size], selectedSize: size });
+    } catch (err) {
+      alert(err.response?.data?.message || "Scan failed.");
+    }
+  }, [addToCart]);
+
   // Quantity and removal logic
   const updateQuantity = useCallback((id, sizeLabel, qty) => {
     setCart((prev) =>
@@ -234,13 +246,22 @@ export default function POS() {
 
     console.log("🧾 Final Sale Payload:", payload);
 
+    const body = JSON.stringify(payload);
+    if (pendingCheckout.current?.body !== body) {
+      pendingCheckout.current = { body, key: crypto.randomUUID() };
+    }
+
     setLoading(true);
     try {
       const res = await API.post("pos/create-sale/", payload, {
-        headers: { Authorization: `Bearer ${auth.access}` },
+        headers: {
+          Authorization: `Bearer ${auth.access}`,
+          "Idempotency-Key": pendingCheckout.current.key,
+        },
       });
 
       if (res.data?.success) {
+        pendingCheckout.current = null;
         const data = res.data.data || {};
         setInvoiceNo(data.invoice_no || "");
         alert(
@@ -377,6 +398,7 @@ export default function POS() {
         addToCart={addToCart}
         search={search}
         setSearch={setSearch}
+        onScan={scanToCart}
       />
 
       <CartSection
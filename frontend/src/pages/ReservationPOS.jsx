@@ -2,6 +2,7 @@ import React, { useEffect, useState } from "react";
 import { useLocation, useNavigate } from "react-router-dom";
 import API from "../api/axios";
 import { getAuth } from "../utils/auth";
+import { syncCatalog } from "../utils/catalogSync";
 import { toast } from "react-toastify";
 import "react-toastify/dist/ReactToastify.css";
 
@@ -71,13 +72,7 @@ export default function ReservationPOS() {
   useEffect(() => {
     const fetchProducts = async () => {
       try {
-        const res = await API.get("products/my_products/", {
-          headers: { Authorization: `Bearer ${auth.access}` },
-        });
-
-        setProducts(
-          Array.isArray(res.data) ? res.data : res.data.results || []
-        );
+        setProducts(await syncCatalog());
       } catch (err) {
         console.error(err);
       }
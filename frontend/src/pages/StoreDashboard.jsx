@@ -1,6 +1,7 @@
-import React, { useEffect, useState, useMemo } from "react";
+import React, { useEffect, useState, useCallback, useRef } from "react";
 import { Link, useNavigate } from "react-router-dom";
 import API from "../api/axios";
+import ResponsiveImage from "../components/ResponsiveImage";
 import { getAuth, clearAuthData } from "../utils/auth";
 import {
   LayoutDashboard,
@@ -13,24 +14,28 @@ import {
   DollarSign,
   LogOut,
   Search,
-  Filter,
   X,
 } from "lucide-react";
 
+// Matches the server's default low-stock threshold (inventory-summary ?low_stock=)
+const LOW_STOCK = 5;
+
 export default function StoreDashboard() {
   const [products, setProducts] = useState([]);
+  const [summary, setSummary] = useState(null);
+  const [nextPage, setNextPage] = useState(null);
   const [ads, setAds] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
   const [search, setSearch] = useState("");
-  const [category, setCategory] = useState("all");
   const [selectedAd, setSelectedAd] = useState(null);
 
   const navigate = useNavigate();
   const auth = getAuth();
   const user = auth?.user;
+  const allowed = Boolean(auth && user?.is_store);
 
-  // ✅ Fetch Products + Ads
   useEffect(() => {
     if (!auth || !user) {
       clearAuthData();
@@ -39,55 +44,70 @@ export default function StoreDashboard() {
     }
     if (!user.is_store) {
       navigate("/");
-      return;
     }
+  }, [navigate, auth, user]);
 
-    const fetchData = async () => {
-      try {
-        const [productsRes, adsRes] = await Promise.all([
-          API.get("products/my_products/", {
-            headers: { Authorization: `Bearer ${auth.access}` },
-          }),
-          API.get("ads/", {
-            headers: { Authorization: `Bearer ${auth.access}` },
-          }),
-        ]);
-        setProducts(productsRes.data);
-        setAds(adsRes.data || []);
-      } catch (err) {
-        console.error("Error fetching store data:", err);
-        setError("⚠️ Failed to load data. Please try again later.");
-      } finally {
+  // ✅ Fetch Ads
+  useEffect(() => {
+    if (!allowed) return;
+    API.get("ads/")
+      .then((res) => setAds(res.data || []))
+      .catch((err) => console.error("Error fetching ads:", err));
+  }, [allowed]);
+
+  // ✅ Fetch Inventory: stock totals plus one page of products, lowest stock
+  // first. `url` is the previous page's `next`.
+  const latestQuery = useRef(null);
+  const fetchInventory = useCallback(async (url, firstPage = false) => {
+    if (firstPage) latestQuery.current = url;
+    const query = latestQuery.current;
+    try {
+      if (!firstPage) setLoadingMore(true);
+      const res = await API.get(url);
+      // A newer search was typed while this one was in flight
+      if (query !== latestQuery.current) return;
+      setSummary(res.data.summary);
+      setProducts((prev) => (firstPage ? res.data.results : [...prev, ...res.data.results]));
+      setNextPage(res.data.next || null);
+      setError("");
+    } catch (err) {
+      console.error("Error fetching store data:", err);
+      if (firstPage) setError("⚠️ Failed to load data. Please try again later.");
+    } finally {
+      if (query === latestQuery.current) {
         setLoading(false);
+        setLoadingMore(false);
       }
-    };
+    }
+  }, []);
 
-    fetchData();
-  }, [navigate, auth, user]);
+  const firstPageUrl = useCallback(() => {
+    const query = search.trim();
+    return query
+      ? `pos/inventory-summary/?search=${encodeURIComponent(query)}`
+      : "pos/inventory-summary/";
+  }, [search]);
+
+  // Re-query as the search box changes (debounced)
+  useEffect(() => {
+    if (!allowed) return;
+    const timer = setTimeout(() => fetchInventory(firstPageUrl(), true), search.trim() ? 250 : 0);
+    return () => clearTimeout(timer);
+  }, [allowed, search, firstPageUrl, fetchInventory]);
 
   // ✅ Delete Product
   const handleDelete = async (id) => {
     if (!window.confirm("Are you sure you want to delete this product?")) return;
     try {
-      await API.delete(`products/${id}/`, {
-        headers: { Authorization: `Bearer ${auth.access}` },
-      });
-      setProducts((prev) => prev.filter((p) => p.id !== id));
+      await API.delete(`products/${id}/`);
+      // Totals changed too, so reload the first page
+      fetchInventory(firstPageUrl(), true);
     } catch (err) {
       console.error("Error deleting product:", err);
       alert("Failed to delete product. Please try again.");
     }
   };
 
-  // ✅ Filter Products
-  const filteredProducts = useMemo(() => {
-    return products.filter((p) => {
-      const matchSearch = p.name.toLowerCase().includes(search.toLowerCase());
-      const matchCategory = category === "all" || p.category === category;
-      return matchSearch && matchCategory;
-    });
-  }, [products, search, category]);
-
   if (loading)
     return (
       <div className="flex justify-center items-center h-[80vh] text-[#111111] font-medium">
@@ -199,7 +219,17 @@ export default function StoreDashboard() {
           </div>
         )}
 
-        {/* Filters */}
+        {/* Inventory Totals */}
+        {summary && (
+          <div className="grid grid-cols-2 lg:grid-cols-4 gap-4 mb-8">
+            <StatCard label="Products" value={summary.total_products} />
+            <StatCard label="Units in stock" value={summary.total_units} />
+            <StatCard label="Low stock" value={summary.low_stock} tone="text-orange-500" />
+            <StatCard label="Out of stock" value={summary.out_of_stock} tone="text-red-500" />
+          </div>
+        )}
+
+        {/* Search */}
         <div className="flex flex-wrap justify-between items-center mb-8 gap-4 bg-[#FDFDFD] border border-[#EAEAEA] rounded-2xl p-4 shadow-sm">
           <div className="flex items-center gap-2 w-full sm:w-80">
             <Search size={18} className="text-[#111111]" />
@@ -211,23 +241,10 @@ export default function StoreDashboard() {
               className="w-full bg-transparent border border-[#EAEAEA] rounded-lg p-2 text-[#111111] focus:outline-none focus:ring-2 focus:ring-[#DDF247]"
             />
           </div>
-
-          <div className="flex items-center gap-2">
-            <Filter size={18} className="text-[#111111]" />
-            <select
-              value={category}
-              onChange={(e) => setCategory(e.target.value)}
-              className="border border-[#EAEAEA] bg-transparent rounded-lg p-2 text-[#111111] focus:outline-none focus:ring-2 focus:ring-[#DDF247]"
-            >
-              <option value="all">All Categories</option>
-              <option value="clothing">Clothing</option>
-              <option value="footwear">Footwear</option>
-            </select>
-          </div>
         </div>
 
         {/* Product Grid */}
-        {filteredProducts.length === 0 ? (
+        {products.length === 0 ? (
           <div className="text-center text-[#5A5A5A] mt-20">
             <p className="text-lg font-medium mb-3">No matching products found.</p>
             <Link to="/store/add-product" className="text-[#DDF247] font-semibold hover:underline">
@@ -236,8 +253,8 @@ export default function StoreDashboard() {
           </div>
         ) : (
           <div className="grid sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-8">
-            {filteredProducts.map((p) => {
-              const totalQty = p.sizes?.reduce((sum, s) => sum + (s.quantity || 0), 0) || 0;
+            {products.map((p) => {
+              const totalQty = p.stock_left;
               return (
                 <div
                   key={p.id}
@@ -245,8 +262,10 @@ export default function StoreDashboard() {
                 >
                   <div className="relative h-52 overflow-hidden">
                     {p.main_image ? (
-                      <img
+                      <ResponsiveImage
                         src={p.main_image}
+                        srcset={p.main_image_srcset}
+                        sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
                         alt={p.name}
                         className="h-full w-full object-cover transition-transform duration-500 hover:scale-105"
                       />
@@ -255,7 +274,7 @@ export default function StoreDashboard() {
                         No Image
                       </div>
                     )}
-                    {totalQty <= 5 && (
+                    {totalQty <= LOW_STOCK && (
                       <div className="absolute top-3 right-3 bg-red-500 text-white text-xs px-2 py-1 rounded-full">
                         Low Stock
                       </div>
@@ -265,8 +284,8 @@ export default function StoreDashboard() {
                   <div className="p-4 flex-1 flex flex-col justify-between">
                     <div>
                       <h3 className="text-lg font-semibold mb-1 truncate">{p.name}</h3>
-                      <p className="text-sm text-[#5A5A5A] mb-3 capitalize">
-                        {p.category || "Uncategorized"}
+                      <p className="text-sm text-[#5A5A5A] mb-3">
+                        Top size: {p.top_size}
                       </p>
 
                       {/* ✅ Show Sizes + Quantity like S - 2 pcs, M - 10 pcs */}
@@ -283,7 +302,7 @@ export default function StoreDashboard() {
                                   : "border-red-400 text-red-500 bg-red-50"
                               }`}
                             >
-                              {s.size_label || s.size} - {s.quantity} pcs
+                              {s.size_label} - {s.quantity} pcs
                             </div>
                           ))}
                         </div>
@@ -299,7 +318,7 @@ export default function StoreDashboard() {
                           {totalQty > 0 ? `Total: ${totalQty}` : "Out of stock"}
                         </span>
                         <span className="text-[#111111] font-semibold">
-                          ₹{p.sizes?.[0]?.price || p.price || 0}
+                          ₹{p.price || 0}
                         </span>
                       </div>
                     </div>
@@ -326,6 +345,18 @@ export default function StoreDashboard() {
           </div>
         )}
 
+        {nextPage && (
+          <div className="flex justify-center mt-10">
+            <button
+              onClick={() => fetchInventory(nextPage)}
+              disabled={loadingMore}
+              className="px-6 py-3 rounded-full border border-[#111111] font-semibold hover:bg-[#DDF247] transition disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
+
         <footer className="text-center text-sm text-[#5A5A5A] py-10 mt-12 border-t border-[#EAEAEA]">
           © {new Date().getFullYear()}{" "}
           <span className="font-semibold text-[#111111]">Adovert</span> — Empowering Local Stores 🌍
@@ -335,6 +366,15 @@ export default function StoreDashboard() {
   );
 }
 
+function StatCard({ label, value, tone = "text-[#111111]" }) {
+  return (
+    <div className="bg-[#FDFDFD] border border-[#EAEAEA] rounded-2xl p-4 shadow-sm">
+      <p className="text-sm text-[#5A5A5A]">{label}</p>
+      <p className={`text-2xl font-bold ${tone}`}>{value}</p>
+    </div>
+  );
+}
+
 function SidebarLink({ to, icon, label }) {
   return (
     <Link
@@ -0,0 +1,77 @@
+import API from "../api/axios";
+import { getUser } from "./auth";
+
+// Local copy of the store catalog, kept current with products/sync/ deltas
+// so a POS reload only downloads what changed (or an empty 304).
+function storageKey() {
+  return `posCatalog:${getUser()?.id ?? "anon"}`;
+}
+
+function load() {
+  try {
+    return JSON.parse(localStorage.getItem(storageKey())) || null;
+  } catch {
+    return null;
+  }
+}
+
+function save(catalog) {
+  try {
+    localStorage.setItem(storageKey(), JSON.stringify(catalog));
+  } catch {
+    // Quota exceeded: next load falls back to a full snapshot
+    localStorage.removeItem(storageKey());
+  }
+}
+
+function upsert(rows, changed) {
+  const byId = new Map(rows.map((r) => [r.id, r]));
+  changed.forEach((r) => byId.set(r.id, r));
+  return [...byId.values()];
+}
+
+// Shape ProductGrid / the cart already use (my_products/ rows)
+function toProducts({ products, sizes }) {
+  const sizesByProduct = new Map();
+  sizes.forEach((s) => {
+    if (!sizesByProduct.has(s.product_id)) sizesByProduct.set(s.product_id, []);
+    sizesByProduct.get(s.product_id).push(s);
+  });
+  return [...products]
+    .sort((a, b) => b.id - a.id)
+    .map((p) => ({
+      ...p,
+      images: p.image ? [{ image_url: p.image }] : [],
+      sizes: (sizesByProduct.get(p.id) || []).sort((a, b) => a.id - b.id),
+    }));
+}
+
+export async function syncCatalog() {
+  const cached = load();
+  const res = await API.get("products/sync/", {
+    params: cached ? { cursor: cached.cursor } : {},
+    headers: cached?.etag ? { "If-None-Match": cached.etag } : {},
+    validateStatus: (status) => status === 200 || status === 304,
+  });
+
+  if (res.status === 304) return toProducts(cached);
+
+  const { full, cursor, products, sizes, deleted } = res.data;
+  let catalog;
+  if (full || !cached) {
+    catalog = { products, sizes };
+  } else {
+    const goneProducts = new Set(deleted.products);
+    const goneSizes = new Set(deleted.sizes);
+    catalog = {
+      products: upsert(cached.products.filter((p) => !goneProducts.has(p.id)), products),
+      sizes: upsert(
+        cached.sizes.filter((s) => !goneSizes.has(s.id) && !goneProducts.has(s.product_id)),
+        sizes
+      ),
+    };
+  }
+
+  save({ ...catalog, cursor, etag: res.headers.etag || null });
+  return toProducts(catalog);
+}